@@ -1,6 +1,7 @@
 from auric.evaluator import Env, evaluate, type_of
-from auric.parser import parse
+from auric.parser import parse, parse_many
 from auric.macros import register_macro, register_type_macro, expand_type_macros
+from auric.macro_profile import MacroProfiler, profile_macros
 
 # Alias for backward compatibility with old code
 elaborate = parse
@@ -11,7 +12,10 @@ __all__ = [
     "evaluate",
     "type_of",
     "parse",
+    "parse_many",
     "register_macro",
     "register_type_macro",
     "expand_type_macros",
+    "MacroProfiler",
+    "profile_macros",
 ]
@@ -5,8 +5,11 @@ from auric.evaluator import Env, evaluate, type_of
 from auric.tt_parser import parse_with_tt_macros as parse
 
 
-def run_file(file_path: str):
-    """Run an Auric source file."""
+def run_file(file_path: str, macro_profile: bool = False):
+    """Run an Auric source file.
+
+    With macro_profile, per-macro expansion statistics are printed at the end.
+    """
     path = Path(file_path)
 
     if not path.exists():
@@ -22,60 +25,29 @@ def run_file(file_path: str):
     # Read source
     source = path.read_text()
 
+    profiler = None
+    if macro_profile:
+        from auric import macro_profile as profiling
+
+        profiler = profiling.enable()
+
     try:
         # Parse
         sigs, defs = parse(source)
         print(f"✓ Parsed {len(defs)} definitions")
 
-        # Separate and expand user-defined macros
-        from auric.macro_expander import collect_macros, expand_macros as expand_user_macros, expand_expr as expand_user_macro_expr
-        from auric.ast import Record as RecordAST
+        # Separate user-defined macros, then expand and stage to a fixpoint
+        from auric.macro_expander import collect_macros
+        from auric.expansion import expand_program
 
         macros, regular_defs = collect_macros(defs)
-
         if macros:
             print(f"✓ Found {len(macros)} user-defined macros")
 
-            # Multi-pass expansion with const propagation for user-defined macros
-            # First pass: expand without const values
-            expanded_defs = expand_user_macros(regular_defs, macros)
-
-            # Build const_defs from Record literals
-            const_defs = {name: val for name, val in expanded_defs.items() if isinstance(val, RecordAST)}
-
-            # Second pass: expand with const propagation (inline Records)
-            if const_defs:
-                expanded_defs = {
-                    name: expand_user_macro_expr(expr, macros, const_defs)
-                    for name, expr in expanded_defs.items()
-                }
-
-            print(f"✓ Expanded user-defined macros")
-        else:
-            expanded_defs = regular_defs
-
-        # Expand expression-level macros (old system)
-        from auric.macros import expand_macros as expand_expr_macros
-        from auric.ast import Record as RecordAST
-        from auric.staging import evaluate_consts_at_comptime
-
-        # First pass: expand without const propagation
-        first_pass = {name: expand_expr_macros(expr) for name, expr in expanded_defs.items()}
-
-        # Automatic staging: normalize const values at compile-time
-        normalized = evaluate_consts_at_comptime(first_pass)
-
-        # Build const_defs for inlining (only Records for compile-time unrolling)
-        # Now includes both original Records and normalized Records from staging
-        const_defs = {name: val for name, val in normalized.items() if isinstance(val, RecordAST)}
-
-        # Second pass: expand with const propagation (for loops unroll here)
-        # Use normalized definitions so Records are already inlined
-        final_defs = {name: expand_expr_macros(expr, const_defs) for name, expr in normalized.items()}
-        print(f"✓ Expanded expression macros")
-
-        # Final staging pass: normalize any new expressions from second expansion
-        final_defs = evaluate_consts_at_comptime(final_defs)
+        final_defs, stats = expand_program(regular_defs, macros)
+        print(f"✓ Expanded macros in {stats.passes} passes ({stats.nodes_visited} nodes visited)")
+        if stats.normalized:
+            print(f"✓ Normalized {stats.normalized} definitions at compile-time")
 
         # Type check
         env: Env = {}
@@ -113,6 +85,40 @@ def run_file(file_path: str):
 
         traceback.print_exc()
         sys.exit(1)
+    finally:
+        if profiler is not None:
+            profiling.disable()
+            print("\n" + "=" * 60)
+            print("Macro profile:")
+            print("=" * 60)
+            print(profiler.format_report())
+
+
+def parse_files(file_paths: list[str]):
+    """Parse several Auric source files in parallel and list their definitions."""
+    import time
+
+    from auric.parser import parse_many
+
+    for file_path in file_paths:
+        if not Path(file_path).exists():
+            print(f"Error: File '{file_path}' not found")
+            sys.exit(1)
+
+    try:
+        start = time.perf_counter()
+        sigs, defs = parse_many(file_paths)
+        elapsed = time.perf_counter() - start
+    except SyntaxError as e:
+        print(f"✗ Syntax Error: {e}")
+        sys.exit(1)
+
+    print(f"✓ Parsed {len(defs)} definitions from {len(file_paths)} files in {elapsed * 1000:.1f} ms")
+    for name in defs:
+        if name in sigs:
+            print(f"  {name} : {sigs[name]}")
+        else:
+            print(f"  {name}")
 
 
 def repl():
@@ -158,10 +164,20 @@ def repl():
 
 def main():
     """Main entry point for Auric CLI."""
-    if len(sys.argv) > 1:
-        # Run file mode
-        file_path = sys.argv[1]
-        run_file(file_path)
+    if len(sys.argv) > 2 and sys.argv[1] == "parse":
+        # Parse-only mode: auric parse FILE...
+        parse_files(sys.argv[2:])
+    elif len(sys.argv) > 1:
+        # Run file mode: auric [run] FILE [--macro-profile]
+        args = sys.argv[1:]
+        if args[0] == "run":
+            args = args[1:]
+        macro_profile = "--macro-profile" in args
+        files = [arg for arg in args if arg != "--macro-profile"]
+        if len(files) != 1:
+            print("Usage: auric [run] FILE [--macro-profile]")
+            sys.exit(1)
+        run_file(files[0], macro_profile)
     else:
         # REPL mode
         repl()
@@ -2,41 +2,219 @@
 
 from __future__ import annotations
 
+import weakref
 from dataclasses import dataclass
+from operator import is_
 from typing import Dict, List, Optional
 
+# ============================================================
+# Hash-consed nodes
+# ============================================================
+#
+# Every shape, type, index and expression node is immutable and hash-consed:
+# constructing a node that is structurally equal to a live one returns that
+# same object. Equality is therefore identity, hashing returns a fingerprint
+# computed once from the children's fingerprints, and nodes can be used as
+# dict keys. List and dict fields are stored as FrozenList and FrozenDict.
+
+
+class FrozenList(tuple):
+    """Immutable list field of a node; compares equal to a list with the same items."""
+
+    __slots__ = ()
+
+    def __eq__(self, other):
+        if isinstance(other, list):
+            other = tuple(other)
+        return tuple.__eq__(self, other)
+
+    def __ne__(self, other):
+        return not self == other
+
+    __hash__ = tuple.__hash__
+
+    def __add__(self, other):
+        return FrozenList(tuple.__add__(self, tuple(other)))
+
+    def __radd__(self, other):
+        return FrozenList(tuple(other) + tuple(self))
+
+    def __repr__(self) -> str:
+        return repr(list(self))
+
+
+class FrozenDict(dict):
+    """Immutable dict field of a node."""
+
+    __slots__ = ()
+
+    def _immutable(self, *args, **kwargs):
+        raise TypeError("FrozenDict is immutable")
+
+    __setitem__ = __delitem__ = __ior__ = _immutable
+    clear = pop = popitem = setdefault = update = _immutable
+
+    def __hash__(self):
+        return hash(frozenset(self.items()))
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+
+def _freeze(value, top: bool = False) -> tuple:
+    """Frozen form of a field value and its interning key.
+
+    Lists become FrozenList, dicts FrozenDict and sets frozenset, recursively;
+    a tuple given for a whole field is taken as a list. In keys, child nodes
+    stand for themselves, so they are compared by identity.
+    """
+    t = type(value)
+    if t is str or type(t) is _NodeMeta:
+        return value, value
+    if t is list or t is FrozenList or (top and t is tuple):
+        pairs = [_freeze(v) for v in value]
+        return FrozenList(v for v, _ in pairs), tuple(k for _, k in pairs)
+    if t is tuple:
+        pairs = [_freeze(v) for v in value]
+        return tuple(v for v, _ in pairs), tuple(k for _, k in pairs)
+    if t is dict or t is FrozenDict:
+        frozen = {}
+        keys = []
+        for name, v in value.items():
+            frozen[name], k = _freeze(v)
+            keys.append((name, k))
+        return FrozenDict(frozen), (dict, tuple(keys))
+    if t is set or t is frozenset:
+        value = frozenset(value)
+        return value, (frozenset, value)
+    if t is float:
+        return value, (float, value.hex())
+    # Keep 1, 1.0 and True apart
+    return value, (t, value)
+
+
+_interned: "weakref.WeakValueDictionary[tuple, Node]" = weakref.WeakValueDictionary()
+
+
+class _NodeMeta(type):
+    """Turns annotated class attributes into slotted fields, with class-level values as defaults."""
+
+    def __new__(mcs, name, bases, ns):
+        if "__slots__" not in ns:
+            fields = tuple(ns.get("__annotations__", {}))
+            ns["_defaults"] = {f: ns.pop(f) for f in fields if f in ns}
+            ns["_fields"] = fields
+            ns["__slots__"] = fields
+            ns["__match_args__"] = fields
+        return super().__new__(mcs, name, bases, ns)
+
+
+class Node(metaclass=_NodeMeta):
+    """Base of all immutable, hash-consed syntax and type nodes."""
+
+    __slots__ = ("_fp", "__weakref__")
+    _fields: tuple[str, ...] = ()
+    _defaults: dict = {}
+
+    def __new__(cls, *args, **kwargs):
+        if kwargs or len(args) != len(cls._fields):
+            args = cls._bind(args, kwargs)
+        values = []
+        key = [cls]
+        for v in args:
+            v, k = _freeze(v, True)
+            values.append(v)
+            key.append(k)
+        key = tuple(key)
+        node = _interned.get(key)
+        if node is None:
+            node = object.__new__(cls)
+            for f, v in zip(cls._fields, values):
+                object.__setattr__(node, f, v)
+            object.__setattr__(node, "_fp", hash(key))
+            _interned[key] = node
+        return node
+
+    @classmethod
+    def _bind(cls, args: tuple, kwargs: dict) -> list:
+        """Field values from positional and keyword arguments, filling in defaults."""
+        fields = cls._fields
+        if len(args) > len(fields):
+            raise TypeError(f"{cls.__name__}() takes {len(fields)} arguments but {len(args)} were given")
+        values = list(args)
+        for f in fields[len(args):]:
+            if f in kwargs:
+                values.append(kwargs.pop(f))
+            elif f in cls._defaults:
+                values.append(cls._defaults[f])
+            else:
+                raise TypeError(f"{cls.__name__}() missing required argument: '{f}'")
+        if kwargs:
+            raise TypeError(f"{cls.__name__}() got unexpected arguments: {', '.join(kwargs)}")
+        return values
+
+    @property
+    def fingerprint(self) -> int:
+        """Structural hash, computed once when the node is created."""
+        return self._fp
+
+    def __hash__(self) -> int:
+        return self._fp
+
+    def __eq__(self, other) -> bool:
+        return self is other
+
+    def __ne__(self, other) -> bool:
+        return self is not other
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError(f"{type(self).__name__} is immutable")
+
+    def __reduce__(self):
+        return (type(self), tuple(getattr(self, f) for f in self._fields))
+
+    def __repr__(self) -> str:
+        args = ", ".join(f"{f}={getattr(self, f)!r}" for f in self._fields)
+        return f"{type(self).__name__}({args})"
+
+
+def unchanged(new, old) -> bool:
+    """Whether rewriting left every child the same object.
+
+    Rewriters return the original node in that case rather than building
+    (and re-interning) an identical one, so untouched subtrees cost nothing.
+    """
+    return all(map(is_, new, old))
+
 # ============================================================
 # Type System: Shapes
 # ============================================================
 
 
-@dataclass(frozen=True)
-class Top: ...
+class Top(Node): ...
 
 
-@dataclass(frozen=True)
-class Bot: ...
+class Bot(Node): ...
 
 
-@dataclass(frozen=True)
-class Base:
+class Base(Node):
     name: str
 
 
-@dataclass(frozen=True)
-class Union:
+class Union(Node):
     left: "Shape"
     right: "Shape"
 
 
-@dataclass(frozen=True)
-class Inter:
+class Inter(Node):
     left: "Shape"
     right: "Shape"
 
 
-@dataclass(frozen=True)
-class Diff:
+class Diff(Node):
     left: "Shape"
     minus: str
 
@@ -49,37 +227,31 @@ Shape = Top | Bot | Base | Union | Inter | Diff
 # ============================================================
 
 
-@dataclass(frozen=True)
-class TyVar:
+class TyVar(Node):
     name: str
 
 
-@dataclass(frozen=True)
-class ShapeT:
+class ShapeT(Node):
     shape: Shape
 
 
-@dataclass(frozen=True)
-class RefT:
+class RefT(Node):
     shape: Shape
     pred: str
 
 
-@dataclass(frozen=True)
-class Arrow:
+class Arrow(Node):
     param: "Type"
     ret: "Type"
     effects: frozenset[str] = frozenset()  # Set of effect names
 
 
-@dataclass(frozen=True)
-class Forall:
+class Forall(Node):
     tv: str
     body: "Type"
 
 
-@dataclass(frozen=True)
-class TyApp:
+class TyApp(Node):
     head: "Type"
     arg: "Type"
 
@@ -89,26 +261,22 @@ class TyApp:
 # ============================================================
 
 
-@dataclass(frozen=True)
-class IdxVar:
+class IdxVar(Node):
     """Type-level variable: n in Vec[T, n]"""
     name: str
 
 
-@dataclass(frozen=True)
-class IdxZero:
+class IdxZero(Node):
     """Type-level zero"""
     pass
 
 
-@dataclass(frozen=True)
-class IdxSucc:
+class IdxSucc(Node):
     """Type-level successor: succ(n)"""
     pred: "Index"
 
 
-@dataclass(frozen=True)
-class IdxUnknown:
+class IdxUnknown(Node):
     """Unknown index: _ for existential types"""
     pass
 
@@ -121,8 +289,7 @@ Index = IdxVar | IdxZero | IdxSucc | IdxUnknown
 # ============================================================
 
 
-@dataclass(frozen=True)
-class DepApp:
+class DepApp(Node):
     """Dependent type application: Vec[T, n]
 
     Examples:
@@ -135,8 +302,7 @@ class DepApp:
     index_args: List[Index]     # Index parameters [n]
 
 
-@dataclass(frozen=True)
-class ForallIdx:
+class ForallIdx(Node):
     """Index quantification: forall n: Nat. Body
 
     Example:
@@ -148,8 +314,7 @@ class ForallIdx:
     body: "Type"
 
 
-@dataclass(frozen=True)
-class RecordT:
+class RecordT(Node):
     """Record type: .{ x: Int, y: String } or .{ _0: Int, _1: String }
 
     Examples:
@@ -204,37 +369,31 @@ class Region:
 # ============================================================
 
 
-@dataclass
-class Lam:
+class Lam(Node):
     params: List[str]  # Multiple parameters: (x, y, z) => body
     body: "Exp"
 
 
-@dataclass
-class Var:
+class Var(Node):
     name: str
 
 
-@dataclass
-class App:
+class App(Node):
     fn: "Exp"
     args: List["Exp"]  # Multiple arguments: f(x, y, z)
 
 
-@dataclass
-class TyAbs:
+class TyAbs(Node):
     tv: str
     body: "Exp"
 
 
-@dataclass
-class TyAppE:
+class TyAppE(Node):
     fn: "Exp"
     arg_ty: Type
 
 
-@dataclass
-class Case:
+class Case(Node):
     scr: Exp
     alts: Dict[str, tuple[List[str], Exp]]
 
@@ -243,24 +402,21 @@ class Case:
         return self.scr
 
 
-@dataclass
-class Perform:
+class Perform(Node):
     """Invoke an effect: Print("hello") or Read()"""
 
     effect_name: str
     args: "Exp"  # Argument to the effect
 
 
-@dataclass
-class Handle:
+class Handle(Node):
     """Handle effects: handle expr { Effect(p) -> body; ... resume() }"""
 
     body: "Exp"  # Expression that may perform effects
     handlers: Dict[str, tuple[List[str], Exp]]  # effect_name -> (patterns, handler_body)
 
 
-@dataclass
-class Record:
+class Record(Node):
     """Record literal: .{ x = 1, y = 2 } or .{ 1, 2 }
 
     Examples:
@@ -270,8 +426,7 @@ class Record:
     fields: Dict[str, "Exp"]  # field_name -> field_value
 
 
-@dataclass
-class Spread:
+class Spread(Node):
     """Spread operator for record merging (comptime-only): ..record
 
     Used to merge records at compile-time. For indexed fields (_0, _1, ...),
@@ -287,8 +442,7 @@ class Spread:
     record: "Exp"  # Expression that evaluates to a record
 
 
-@dataclass
-class FieldAccess:
+class FieldAccess(Node):
     """Field access: record.field
 
     Examples:
@@ -299,8 +453,7 @@ class FieldAccess:
     field: str
 
 
-@dataclass
-class MacroInvocation:
+class MacroInvocation(Node):
     """Macro invocation to be expanded before type checking
 
     Examples:
@@ -312,8 +465,7 @@ class MacroInvocation:
     args: List["Exp"]
 
 
-@dataclass
-class For:
+class For(Node):
     """For loop: for i = ..expr { body }
 
     Examples:
@@ -325,8 +477,7 @@ class For:
     body: "Exp"         # Body expression executed for each element
 
 
-@dataclass
-class Const:
+class Const(Node):
     """Constant literal: 42, 3.14, 'a', @true
 
     Replaces: IntLit, FloatLit, CharLit, BoolLit
@@ -340,13 +491,28 @@ class Const:
         'a'        -> Const('a', ShapeT(Base("u8")))
         @true      -> Const(True, ShapeT(Base("bool")))
         @false     -> Const(False, ShapeT(Base("bool")))
+        @succ(@succ(@zero)), once normalized -> Const(2, ShapeT(Base("@Nat")))
     """
     value: any          # Python int, float, str (single char), or bool
     ty: Type            # Explicit type: ShapeT(Base("i64")), etc.
 
 
-@dataclass
-class If:
+NAT_TYPE = ShapeT(Base("@Nat"))
+
+
+def nat_literal(n: int) -> Const:
+    """The literal for natural number n, in place of n nested @succ applications."""
+    return Const(n, NAT_TYPE)
+
+
+def nat_literal_value(e: "Exp") -> int | None:
+    """n if `e` is a natural number literal, else None."""
+    if isinstance(e, Const) and e.ty is NAT_TYPE and isinstance(e.value, int):
+        return e.value
+    return None
+
+
+class If(Node):
     """If expression (legacy - now implemented as macro that desugars to Case)
 
     Modern syntax uses the if macro from std/builtins:
@@ -359,8 +525,7 @@ class If:
     else_branch: "Exp"
 
 
-@dataclass
-class Seq:
+class Seq(Node):
     """Sequence of expressions: { expr1; expr2; expr3 }
 
     Examples:
@@ -369,8 +534,7 @@ class Seq:
     exprs: List["Exp"]
 
 
-@dataclass
-class MacroDef:
+class MacroDef(Node):
     """Macro definition: macro name = (params) => body
 
     Examples:
@@ -381,8 +545,7 @@ class MacroDef:
     body: "Exp"
 
 
-@dataclass
-class Let:
+class Let(Node):
     """Let binding: let name = value; body
 
     All let bindings are recursive by default - the value can reference the name.
@@ -402,3 +565,119 @@ class Let:
 
 
 Exp = Lam | Var | App | TyAbs | TyAppE | Case | Perform | Handle | Record | Spread | FieldAccess | MacroInvocation | For | Const | If | Seq | MacroDef | Let
+
+
+def _children(node: Node) -> list:
+    """The nodes directly below `node`, looking inside list and dict fields."""
+    found = []
+    stack = [getattr(node, f) for f in node._fields]
+    while stack:
+        value = stack.pop()
+        if isinstance(value, Node):
+            found.append(value)
+        elif isinstance(value, dict):
+            stack.extend(value.values())
+        elif isinstance(value, (tuple, list)):
+            stack.extend(value)
+    return found
+
+
+def _fold(e: Node, memo: "weakref.WeakKeyDictionary", combine) -> object:
+    """combine(node, child results) for `e`, bottom-up and without recursion.
+
+    Results are remembered per node in `memo`, so shared subtrees are folded
+    once however often they occur.
+    """
+    result = memo.get(e)
+    if result is not None:
+        return result
+    stack = [e]
+    while stack:
+        node = stack[-1]
+        if node in memo:
+            stack.pop()
+            continue
+        children = _children(node)
+        pending = [child for child in children if child not in memo]
+        if pending:
+            stack.extend(pending)
+            continue
+        stack.pop()
+        memo[node] = combine(node, [memo[child] for child in children])
+    return memo[e]
+
+
+_sizes: "weakref.WeakKeyDictionary[Node, int]" = weakref.WeakKeyDictionary()
+_names: "weakref.WeakKeyDictionary[Node, frozenset]" = weakref.WeakKeyDictionary()
+
+
+def ast_size(e: object) -> int:
+    """Number of AST nodes in `e`, counting shared subtrees once per occurrence.
+
+    Sizes are remembered per node, so measuring a tree built from already
+    measured parts costs only the new nodes, even if it is exponentially
+    larger than its distinct nodes.
+    """
+    if isinstance(e, Node):
+        return _fold(e, _sizes, lambda node, sizes: 1 + sum(sizes))
+    if isinstance(e, dict):
+        return sum(ast_size(v) for v in e.values())
+    if isinstance(e, (tuple, list)):
+        return sum(ast_size(v) for v in e)
+    return 0
+
+
+def _own_name(node: Node) -> Optional[str]:
+    return node.name if isinstance(node, Var) else node.macro_name if isinstance(node, MacroInvocation) else None
+
+
+def names_in(e: object) -> frozenset:
+    """Variable and macro invocation names occurring anywhere in `e`.
+
+    Each distinct node is walked once, and the result is remembered for the
+    node passed in. Subtrees' sets are not kept: along a long spine (a cons
+    list) they would cost quadratic time and space.
+    """
+    if isinstance(e, Node):
+        found = _names.get(e)
+        if found is None:
+            names = set()
+            seen = {e}
+            stack = [e]
+            while stack:
+                node = stack.pop()
+                own = _own_name(node)
+                if own is not None:
+                    names.add(own)
+                for child in _children(node):
+                    if child not in seen:
+                        seen.add(child)
+                        stack.append(child)
+            found = _names[e] = frozenset(names)
+        return found
+    if isinstance(e, dict):
+        return frozenset().union(*(names_in(v) for v in e.values()))
+    if isinstance(e, (tuple, list)):
+        return frozenset().union(*(names_in(v) for v in e))
+    return frozenset()
+
+
+# names -> node -> whether the node mentions one of names; see `mentions`
+_mentions: "Dict[frozenset, weakref.WeakKeyDictionary[Node, bool]]" = {}
+_MENTIONS_SETS = 16
+
+
+def mentions(e: Node, names: frozenset) -> bool:
+    """Whether a variable or macro invocation in `e` has a name in `names`.
+
+    Answers are remembered per node for the last few name sets asked
+    about, so repeated questions about the same macros cost one lookup per
+    node, and answering for a new tree costs one step per new node however
+    many names it holds.
+    """
+    memo = _mentions.get(names)
+    if memo is None:
+        if len(_mentions) >= _MENTIONS_SETS:
+            del _mentions[next(iter(_mentions))]
+        memo = _mentions[names] = weakref.WeakKeyDictionary()
+    return _fold(e, memo, lambda node, found: _own_name(node) in names or any(found))
@@ -0,0 +1,330 @@
+"""Front-end benchmarks for Auric.
+
+Run with `python -m auric.bench`. The default benchmark generates a synthetic
+program and reports tokens/sec and definitions/sec for each front-end stage:
+`lex`, `group_tokens`, `parse_with_tt_macros` and `parser.parse`. Pass
+`--json FILE` to also write the results for tracking across releases.
+
+`--nesting` instead parses inputs of doubling nesting depth; with every
+construct parsed in place on one token buffer the time per token stays flat
+as depth grows.
+
+`--dispatch` measures the cost of routing one AST node to its handler: a
+chain of `isinstance` checks in the order `eval_exp` used to test them,
+against the type-keyed table of `auric.visitor`.
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import platform
+import random
+import sys
+import time
+from dataclasses import asdict, dataclass
+from typing import Callable, Dict, List
+
+from auric import parser
+from auric.ast import (
+    App,
+    Base,
+    Case,
+    Const,
+    FieldAccess,
+    Handle,
+    If,
+    Lam,
+    Let,
+    MacroDef,
+    Perform,
+    Record,
+    Seq,
+    ShapeT,
+    TyAbs,
+    TyAppE,
+    Var,
+)
+from auric.lexer import lex
+from auric.parser import parse_expr
+from auric.token_tree import group_tokens
+from auric.tt_parser import parse_with_tt_macros
+from auric.visitor import Visitor, handles
+
+# Token tree macro used by the synthetic programs
+MACRO_DEF = """macro twice => {
+    twice $e -> @seq ( $e , $e ) ;
+}
+"""
+
+
+@dataclass
+class ProgramConfig:
+    """Shape of a synthetic program."""
+
+    defs: int = 200  # number of const definitions
+    depth: int = 4  # nesting depth of calls and records in each body
+    width: int = 4  # clauses per pattern block
+    record_size: int = 4  # fields per record literal
+    macro_density: float = 0.25  # fraction of definitions that invoke a macro
+    seed: int = 0
+
+
+def _body(cfg: ProgramConfig, rng: random.Random, depth: int) -> str:
+    if depth == 0:
+        clauses = " ".join(f"k{j} x -> g(x, {j});" for j in range(cfg.width - 1))
+        return f"n => {{ @zero -> 0; {clauses} }}"
+    inner = _body(cfg, rng, depth - 1)
+    if depth % 2:
+        return f"f{rng.randrange(10)}(n, {inner})"
+    fields = ", ".join(f"a{j} = {j}" for j in range(cfg.record_size - 1))
+    return f".{{ {fields}, b = {inner} }}"
+
+
+def generate_program(cfg: ProgramConfig, macros: bool = True) -> str:
+    """Generate Auric source shaped by `cfg`.
+
+    Every definition is a function whose body nests calls and record literals
+    `depth` levels deep around a pattern block. With `macros=False` the macro
+    definition is left out (invocations then parse as plain applications),
+    so the source is accepted by `parser.parse`.
+    """
+    rng = random.Random(cfg.seed)
+    lines = [MACRO_DEF] if macros else []
+    for i in range(cfg.defs):
+        body = _body(cfg, rng, cfg.depth)
+        if rng.random() < cfg.macro_density:
+            body = f"twice ({body})"
+        lines.append(f"const d{i}: @Nat -> @Nat = (n) => {{\n  {body}\n}}\n")
+    return "".join(lines)
+
+
+def bench_front_end(cfg: ProgramConfig, repeat: int = 3) -> List[dict]:
+    """Time each front-end stage on a synthetic program."""
+    src = generate_program(cfg)
+    plain_src = generate_program(cfg, macros=False)
+    tokens = lex(src)
+    plain_tokens = lex(plain_src)
+
+    def quiet_tt_parse():
+        # parse_with_tt_macros reports progress on stdout
+        with contextlib.redirect_stdout(io.StringIO()):
+            parse_with_tt_macros(src)
+
+    stages = [
+        ("lex", lambda: lex(src), len(tokens)),
+        ("group_tokens", lambda: group_tokens(tokens), len(tokens)),
+        ("parse_with_tt_macros", quiet_tt_parse, len(tokens)),
+        ("parser.parse", lambda: parser.parse(plain_src), len(plain_tokens)),
+    ]
+    results = []
+    for name, fn, n_tokens in stages:
+        seconds = _best_of(fn, repeat)
+        results.append(
+            {
+                "stage": name,
+                "tokens": n_tokens,
+                "defs": cfg.defs,
+                "seconds": seconds,
+                "tokens_per_sec": n_tokens / seconds,
+                "defs_per_sec": cfg.defs / seconds,
+            }
+        )
+    return results
+
+
+def nested_calls(depth: int) -> str:
+    """f(f(f(... x, 1 ...), 1), 1)"""
+    return "f(" * depth + "x" + ", 1)" * depth
+
+
+def nested_blocks(depth: int) -> str:
+    """{ 1; { 1; { ... x ... } } }"""
+    return "{ 1; " * depth + "x" + " }" * depth
+
+
+def nested_matches(depth: int) -> str:
+    """x => { zero -> x => { zero -> ... ; succ n -> n; }; succ n -> n; }"""
+    return "x => { zero -> " * depth + "x" + "; succ n -> n; }" * depth
+
+
+def nested_records(depth: int) -> str:
+    """.{ a = 1, b = .{ a = 1, b = ... } }"""
+    return ".{ a = 1, b = " * depth + "x" + " }" * depth
+
+
+NESTED_INPUTS: Dict[str, Callable[[int], str]] = {
+    "calls": nested_calls,
+    "blocks": nested_blocks,
+    "matches": nested_matches,
+    "records": nested_records,
+}
+
+
+def _best_of(fn: Callable[[], object], repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_nesting(depths: List[int], repeat: int = 5) -> List[dict]:
+    """Time parse_expr on each nested input at each depth."""
+    results = []
+    for name, make in NESTED_INPUTS.items():
+        for depth in depths:
+            src = make(depth)
+            n_tokens = len(lex(src))
+            seconds = _best_of(lambda: parse_expr(src), repeat)
+            results.append(
+                {
+                    "input": name,
+                    "depth": depth,
+                    "tokens": n_tokens,
+                    "seconds": seconds,
+                    "us_per_token": seconds / n_tokens * 1e6,
+                }
+            )
+    return results
+
+
+def dispatch_samples() -> List[tuple]:
+    """One node of each expression type, in the order the old passes tested them."""
+    x = Var("x")
+    return [
+        ("Var", x),
+        ("Lam", Lam(["x"], x)),
+        ("TyAbs", TyAbs("a", x)),
+        ("App", App(x, [x])),
+        ("TyAppE", TyAppE(x, ShapeT(Base("i64")))),
+        ("Case", Case(x, {"@zero": ([], x)})),
+        ("Perform", Perform("print", x)),
+        ("Handle", Handle(x, {})),
+        ("Record", Record({"a": x})),
+        ("FieldAccess", FieldAccess(x, "a")),
+        ("Const", Const(1, ShapeT(Base("i64")))),
+        ("If", If(x, x, x)),
+        ("Let", Let("y", x, x)),
+        ("Seq", Seq([x, x])),
+        ("MacroDef", MacroDef("m", [], x)),
+    ]
+
+
+def _chain_dispatch(e, ctx):
+    # The isinstance chain every pass used before auric.visitor
+    if isinstance(e, Var):
+        return 0
+    if isinstance(e, Lam):
+        return 1
+    if isinstance(e, TyAbs):
+        return 2
+    if isinstance(e, App):
+        return 3
+    if isinstance(e, TyAppE):
+        return 4
+    if isinstance(e, Case):
+        return 5
+    if isinstance(e, Perform):
+        return 6
+    if isinstance(e, Handle):
+        return 7
+    if isinstance(e, Record):
+        return 8
+    if isinstance(e, FieldAccess):
+        return 9
+    if isinstance(e, Const):
+        return 10
+    if isinstance(e, If):
+        return 11
+    if isinstance(e, Let):
+        return 12
+    if isinstance(e, Seq):
+        return 13
+    if isinstance(e, MacroDef):
+        return 14
+    return None
+
+
+class _TableDispatch(Visitor):
+    @handles(Var, Lam, TyAbs, App, TyAppE, Case, Perform, Handle, Record, FieldAccess, Const, If, Let, Seq, MacroDef)
+    def node(self, e, ctx):
+        return 0
+
+
+def bench_dispatch(calls: int = 200_000, repeat: int = 5) -> List[dict]:
+    """Time routing each node type to its handler, per call."""
+    table = _TableDispatch()
+    results = []
+    for name, node in dispatch_samples():
+        nodes = [node] * calls
+        chain = _best_of(lambda: [_chain_dispatch(e, None) for e in nodes], repeat)
+        visit = _best_of(lambda: [table.visit(e, None) for e in nodes], repeat)
+        results.append(
+            {
+                "node": name,
+                "chain_ns": chain / calls * 1e9,
+                "table_ns": visit / calls * 1e9,
+            }
+        )
+    return results
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m auric.bench", description=__doc__.splitlines()[0])
+    defaults = ProgramConfig()
+    ap.add_argument("--defs", type=int, default=defaults.defs, help="const definitions")
+    ap.add_argument("--depth", type=int, default=defaults.depth, help="nesting depth per body")
+    ap.add_argument("--width", type=int, default=defaults.width, help="pattern-block clauses")
+    ap.add_argument("--record-size", type=int, default=defaults.record_size, help="record literal fields")
+    ap.add_argument("--macro-density", type=float, default=defaults.macro_density, help="fraction invoking a macro")
+    ap.add_argument("--seed", type=int, default=defaults.seed)
+    ap.add_argument("--repeat", type=int, default=3, help="runs per stage; the best is reported")
+    ap.add_argument("--nesting", action="store_true", help="run the nesting-depth benchmark instead")
+    ap.add_argument("--dispatch", action="store_true", help="run the per-node dispatch benchmark instead")
+    ap.add_argument("--json", metavar="FILE", help="also write results as JSON ('-' for stdout)")
+    args = ap.parse_args(argv)
+
+    # Each nesting level costs a few Python frames
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10000))
+
+    cfg = ProgramConfig(args.defs, args.depth, args.width, args.record_size, args.macro_density, args.seed)
+    if args.dispatch:
+        results = bench_dispatch(repeat=args.repeat)
+        print(f"{'node':<14}{'chain ns':>10}{'table ns':>10}")
+        for r in results:
+            print(f"{r['node']:<14}{r['chain_ns']:>10.1f}{r['table_ns']:>10.1f}")
+    elif args.nesting:
+        results = bench_nesting([32, 64, 128, 256, 512], args.repeat)
+        print(f"{'input':<10}{'depth':>8}{'tokens':>10}{'ms':>10}{'us/token':>10}")
+        for r in results:
+            print(
+                f"{r['input']:<10}{r['depth']:>8}{r['tokens']:>10}{r['seconds'] * 1e3:>10.2f}{r['us_per_token']:>10.2f}"
+            )
+    else:
+        results = bench_front_end(cfg, args.repeat)
+        print(f"{'stage':<22}{'tokens':>10}{'ms':>10}{'tokens/s':>12}{'defs/s':>10}")
+        for r in results:
+            print(
+                f"{r['stage']:<22}{r['tokens']:>10}{r['seconds'] * 1e3:>10.2f}"
+                f"{r['tokens_per_sec']:>12.0f}{r['defs_per_sec']:>10.0f}"
+            )
+
+    if args.json:
+        report = {
+            "benchmark": "dispatch" if args.dispatch else "nesting" if args.nesting else "front_end",
+            "config": asdict(cfg),
+            "python": platform.python_version(),
+            "results": results,
+        }
+        text = json.dumps(report, indent=2)
+        if args.json == "-":
+            print(text)
+        else:
+            with open(args.json, "w") as f:
+                f.write(text + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -20,6 +20,7 @@ from auric.runtime import (
     builtin_constructors,
     synth_with_region,
 )
+from auric.visitor import Visitor, handles
 
 
 def is_tail_recursive_call(e: Exp, func_name: str) -> bool:
@@ -38,26 +39,40 @@ def analyze_var_usage(e: Exp) -> Dict[str, int]:
 
     Returns dict mapping variable names to usage count.
     """
-    usage: DefaultDict[str, int] = defaultdict(int)
+    counter = _VarUsage()
+    counter.visit(e)
+    return dict(counter.usage)
 
-    def count_vars(expr: Exp) -> None:
-        if isinstance(expr, Var):
-            usage[expr.name] += 1
-        elif isinstance(expr, App):
-            count_vars(expr.fn)
-            for arg in expr.args:
-                count_vars(arg)
-        elif isinstance(expr, TyAbs):
-            count_vars(expr.body)
-        elif isinstance(expr, TyAppE):
-            count_vars(expr.fn)
-        elif isinstance(expr, Case):
-            count_vars(expr.scr)
-            for tag, (binds, body) in expr.alts.items():
-                count_vars(body)
 
-    count_vars(e)
-    return dict(usage)
+class _VarUsage(Visitor):
+    """analyze_var_usage: counts variable occurrences outside lambdas."""
+
+    def __init__(self):
+        self.usage: DefaultDict[str, int] = defaultdict(int)
+
+    @handles(Var)
+    def var(self, expr: Var, ctx: None) -> None:
+        self.usage[expr.name] += 1
+
+    @handles(App)
+    def app(self, expr: App, ctx: None) -> None:
+        self.visit(expr.fn)
+        for arg in expr.args:
+            self.visit(arg)
+
+    @handles(TyAbs)
+    def ty_abs(self, expr: TyAbs, ctx: None) -> None:
+        self.visit(expr.body)
+
+    @handles(TyAppE)
+    def ty_app(self, expr: TyAppE, ctx: None) -> None:
+        self.visit(expr.fn)
+
+    @handles(Case)
+    def case(self, expr: Case, ctx: None) -> None:
+        self.visit(expr.scr)
+        for tag, (binds, body) in expr.alts.items():
+            self.visit(body)
 
 
 def collect_type_instantiations(e: Exp) -> Dict[str, Set[str]]:
@@ -67,32 +82,42 @@ def collect_type_instantiations(e: Exp) -> Dict[str, Set[str]]:
     E.g., if identity(Nat, x) and identity(Bool, y) are called, returns
     {'identity': {'Nat', 'Bool'}}
     """
-    instantiations: DefaultDict[str, Set[str]] = defaultdict(set)
-
-    def collect(expr: Exp) -> None:
-        if isinstance(expr, App):
-            fn = expr.fn
-            # Check if function is a type-applied function
-            if isinstance(fn, TyAppE) and isinstance(fn.fn, Var):
-                func_name = fn.fn.name
-                type_name = _type_to_str(fn.arg_ty)
-                instantiations[func_name].add(type_name)
-            collect(expr.fn)
-            for arg in expr.args:
-                collect(arg)
-        elif isinstance(expr, TyAbs):
-            collect(expr.body)
-        elif isinstance(expr, TyAppE):
-            collect(expr.fn)
-        elif isinstance(expr, Case):
-            collect(expr.scr)
-            for tag, (binds, body) in expr.alts.items():
-                collect(body)
-        elif isinstance(expr, Lam):
-            collect(expr.body)
+    collector = _TypeInstantiations()
+    collector.visit(e)
+    return dict(collector.instantiations)
 
-    collect(e)
-    return dict(instantiations)
+
+class _TypeInstantiations(Visitor):
+    """collect_type_instantiations: records the types applied to each function."""
+
+    def __init__(self):
+        self.instantiations: DefaultDict[str, Set[str]] = defaultdict(set)
+
+    @handles(App)
+    def app(self, expr: App, ctx: None) -> None:
+        fn = expr.fn
+        # Check if function is a type-applied function
+        if isinstance(fn, TyAppE) and isinstance(fn.fn, Var):
+            func_name = fn.fn.name
+            type_name = _type_to_str(fn.arg_ty)
+            self.instantiations[func_name].add(type_name)
+        self.visit(expr.fn)
+        for arg in expr.args:
+            self.visit(arg)
+
+    @handles(TyAbs, Lam)
+    def body(self, expr: Exp, ctx: None) -> None:
+        self.visit(expr.body)
+
+    @handles(TyAppE)
+    def ty_app(self, expr: TyAppE, ctx: None) -> None:
+        self.visit(expr.fn)
+
+    @handles(Case)
+    def case(self, expr: Case, ctx: None) -> None:
+        self.visit(expr.scr)
+        for tag, (binds, body) in expr.alts.items():
+            self.visit(body)
 
 
 def _type_to_str(ty: Type) -> str:
@@ -145,83 +170,62 @@ def compute_regions(e: Exp, g: Dict[str, Type], all_defs: Dict[str, Exp] = None)
     if all_defs is None:
         all_defs = {}
 
-    regions: Dict[int, Region] = {}
+    walker = _RegionWalker(all_defs)
+    walker.visit(e, g)
+    return walker.regions
 
-    def visit(expr: Exp) -> Region:
-        """Visit expression, compute its region, return region."""
-        try:
-            _, region = synth_with_region(g, expr, all_defs)
-            regions[id(expr)] = region
-            return region
-        except Exception:
-            # If region inference fails, default to local
-            regions[id(expr)] = Region("local")
-            return Region("local")
 
-    def walk(expr: Exp) -> None:
-        """Walk through all subexpressions."""
-        visit(expr)
+class _RegionWalker(Visitor):
+    """compute_regions: infers the region of every subexpression.
 
-        if isinstance(expr, Var):
-            pass
-        elif isinstance(expr, Lam):
-            # Add parameters to context for body analysis
-            new_g = g.copy()
-            for param in expr.params:
-                new_g[param] = g.get(param, ShapeT(Base("Unknown")))
-            walk_with_env(expr.body, new_g)
-        elif isinstance(expr, TyAbs):
-            walk(expr.body)
-        elif isinstance(expr, TyAppE):
-            walk(expr.fn)
-        elif isinstance(expr, App):
-            walk(expr.fn)
-            for arg in expr.args:
-                walk(arg)
-        elif isinstance(expr, Case):
-            walk(expr.scr)
-            for tag, (binds, body) in expr.alts.items():
-                # Create new context with bound variables
-                new_g = g.copy()
-                for bind in binds:
-                    if bind != "_":
-                        new_g[bind] = ShapeT(Base("Unknown"))
-                walk_with_env(body, new_g)
+    The context is the type environment, extended under binders.
+    """
+
+    def __init__(self, all_defs: Dict[str, Exp]):
+        self.all_defs = all_defs
+        self.regions: Dict[int, Region] = {}
 
-    def walk_with_env(expr: Exp, env: Dict[str, Type]) -> None:
-        """Walk with updated environment."""
+    def visit(self, expr: Exp, env: Dict[str, Type]) -> None:
         try:
-            _, region = synth_with_region(env, expr, all_defs)
-            regions[id(expr)] = region
+            _, region = synth_with_region(env, expr, self.all_defs)
+            self.regions[id(expr)] = region
         except Exception:
-            regions[id(expr)] = Region("local")
-
-        if isinstance(expr, Var):
-            pass
-        elif isinstance(expr, Lam):
+            # If region inference fails, default to local
+            self.regions[id(expr)] = Region("local")
+        self._table[type(expr)](self, expr, env)
+
+    @handles(Lam)
+    def lam(self, expr: Lam, env: Dict[str, Type]) -> None:
+        # Add parameters to context for body analysis
+        new_g = env.copy()
+        for param in expr.params:
+            new_g[param] = env.get(param, ShapeT(Base("Unknown")))
+        self.visit(expr.body, new_g)
+
+    @handles(TyAbs)
+    def ty_abs(self, expr: TyAbs, env: Dict[str, Type]) -> None:
+        self.visit(expr.body, env)
+
+    @handles(TyAppE)
+    def ty_app(self, expr: TyAppE, env: Dict[str, Type]) -> None:
+        self.visit(expr.fn, env)
+
+    @handles(App)
+    def app(self, expr: App, env: Dict[str, Type]) -> None:
+        self.visit(expr.fn, env)
+        for arg in expr.args:
+            self.visit(arg, env)
+
+    @handles(Case)
+    def case(self, expr: Case, env: Dict[str, Type]) -> None:
+        self.visit(expr.scr, env)
+        for tag, (binds, body) in expr.alts.items():
+            # Create new context with bound variables
             new_g = env.copy()
-            for param in expr.params:
-                new_g[param] = env.get(param, ShapeT(Base("Unknown")))
-            walk_with_env(expr.body, new_g)
-        elif isinstance(expr, TyAbs):
-            walk_with_env(expr.body, env)
-        elif isinstance(expr, TyAppE):
-            walk_with_env(expr.fn, env)
-        elif isinstance(expr, App):
-            walk_with_env(expr.fn, env)
-            for arg in expr.args:
-                walk_with_env(arg, env)
-        elif isinstance(expr, Case):
-            walk_with_env(expr.scr, env)
-            for tag, (binds, body) in expr.alts.items():
-                new_g = env.copy()
-                for bind in binds:
-                    if bind != "_":
-                        new_g[bind] = ShapeT(Base("Unknown"))
-                walk_with_env(body, new_g)
-
-    walk(e)
-    return regions
+            for bind in binds:
+                if bind != "_":
+                    new_g[bind] = ShapeT(Base("Unknown"))
+            self.visit(body, new_g)
 
 
 @dataclass
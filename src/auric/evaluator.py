@@ -4,7 +4,7 @@ from __future__ import annotations
 
 import random as py_random
 import time
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 from auric.ast import (
     App,
@@ -33,23 +33,34 @@ from auric.ast import (
     Type,
     Var,
 )
-from auric.memory import Heap, RefValue
+from auric.memory import Heap, Nat, RefValue, nat_succ, nat_value
 from auric.parser import parse
 from auric.type_checker import synth
+from auric.visitor import Visitor, handles
 
 Env = Dict[str, Any]
 
 
 def eval_exp(e: Exp, env: Dict[str, RefValue]) -> RefValue:
     """Evaluate expression with reference counting."""
-    if isinstance(e, Var):
+    return _evaluator.visit(e, env)
+
+
+class _Evaluator(Visitor):
+    """eval_exp, one handler per expression type."""
+
+    @handles(Var)
+    def var(self, e: Var, env: Dict[str, RefValue]) -> RefValue:
         return Heap.clone(env[e.name])
 
-    if isinstance(e, Lam):
+    @handles(Lam)
+    def lam(self, e: Lam, env: Dict[str, RefValue]) -> RefValue:
+        visit = self.visit
+
         # Create nested closures for multi-arg lambda (supports partial application)
         def make_closure(params: List[str], body: Exp, captured_env: Env):
             if not params:
-                return eval_exp(body, captured_env)
+                return visit(body, captured_env)
             param = params[0]
             remaining = params[1:]
             def closure(arg: RefValue) -> RefValue:
@@ -57,37 +68,44 @@ def eval_exp(e: Exp, env: Dict[str, RefValue]) -> RefValue:
                 if remaining:
                     return Heap.alloc(make_closure(remaining, body, new_env))
                 else:
-                    return eval_exp(body, new_env)
+                    return visit(body, new_env)
             return closure
 
         return Heap.alloc(make_closure(e.params, e.body, env))
 
-    if isinstance(e, TyAbs):
+    @handles(TyAbs)
+    def ty_abs(self, e: TyAbs, env: Dict[str, RefValue]) -> RefValue:
 
         def ty_closure(_ty):
-            return eval_exp(e.body, env)
+            return self.visit(e.body, env)
 
         return Heap.alloc(ty_closure)
 
-    if isinstance(e, App):
+    @handles(App)
+    def app(self, e: App, env: Dict[str, RefValue]) -> RefValue:
         # Apply multiple arguments in sequence
-        fn = eval_exp(e.fn, env)
+        fn = self.visit(e.fn, env)
         for arg_expr in e.args:
-            arg = eval_exp(arg_expr, env)
+            arg = self.visit(arg_expr, env)
             result = fn.data(arg)
             Heap.drop(fn)
             fn = result
         return fn
 
-    if isinstance(e, TyAppE):
-        fn = eval_exp(e.fn, env)
+    @handles(TyAppE)
+    def ty_app(self, e: TyAppE, env: Dict[str, RefValue]) -> RefValue:
+        fn = self.visit(e.fn, env)
         result = fn.data(e.arg_ty)
         Heap.drop(fn)
         return result
 
-    if isinstance(e, Case):
-        scr = eval_exp(e.scr, env)
-        tag, *flds = scr.data
+    @handles(Case)
+    def case(self, e: Case, env: Dict[str, RefValue]) -> RefValue:
+        scr = self.visit(e.scr, env)
+        data = scr.data
+        if isinstance(data, Nat):
+            data = data.unpack()
+        tag, *flds = data
         names, body = e.alts[tag]
 
         new_env = env.copy()
@@ -95,14 +113,15 @@ def eval_exp(e: Exp, env: Dict[str, RefValue]) -> RefValue:
             if n != "_":
                 new_env[n] = Heap.clone(v)
 
-        result = eval_exp(body, new_env)
+        result = self.visit(body, new_env)
         Heap.drop(scr)
 
         return result
 
-    if isinstance(e, Perform):
+    @handles(Perform)
+    def perform(self, e: Perform, env: Dict[str, RefValue]) -> RefValue:
         # Perform an effect - builtin effects are resolved via environment
-        arg = eval_exp(e.args, env)
+        arg = self.visit(e.args, env)
 
         # Lookup the effect in environment
         if e.effect_name in env:
@@ -113,22 +132,25 @@ def eval_exp(e: Exp, env: Dict[str, RefValue]) -> RefValue:
 
         raise NameError(f"Effect '{e.effect_name}' not handled")
 
-    if isinstance(e, Handle):
+    @handles(Handle)
+    def handle(self, e: Handle, env: Dict[str, RefValue]) -> RefValue:
         # Handle effects in an expression
-        result = eval_exp(e.body, env)
+        result = self.visit(e.body, env)
         return result
 
-    if isinstance(e, Record):
+    @handles(Record)
+    def record(self, e: Record, env: Dict[str, RefValue]) -> RefValue:
         # Evaluate record literal: .{ x = 1, y = 2 }
         # Store as a dictionary
         field_values = {}
         for field_name, field_expr in e.fields.items():
-            field_values[field_name] = eval_exp(field_expr, env)
+            field_values[field_name] = self.visit(field_expr, env)
         return Heap.alloc(("record", field_values))
 
-    if isinstance(e, FieldAccess):
+    @handles(FieldAccess)
+    def field_access(self, e: FieldAccess, env: Dict[str, RefValue]) -> RefValue:
         # Evaluate field access: rec.x
-        record = eval_exp(e.record, env)
+        record = self.visit(e.record, env)
         if not isinstance(record.data, tuple) or record.data[0] != "record":
             raise TypeError(f"Cannot access field of non-record value: {record.data}")
         field_values = record.data[1]
@@ -139,7 +161,8 @@ def eval_exp(e: Exp, env: Dict[str, RefValue]) -> RefValue:
         return result
 
     # Constant literals (int, float, char, bool)
-    if isinstance(e, Const):
+    @handles(Const)
+    def const(self, e: Const, env: Dict[str, RefValue]) -> RefValue:
         # Extract type suffix from ShapeT(Base(suffix))
         if isinstance(e.ty, ShapeT) and isinstance(e.ty.shape, Base):
             type_suffix = e.ty.shape.name
@@ -154,13 +177,16 @@ def eval_exp(e: Exp, env: Dict[str, RefValue]) -> RefValue:
                 # Float literals
                 return Heap.alloc(("float", e.value, type_suffix))
             elif isinstance(e.value, int):
+                if type_suffix == "@Nat":
+                    # Natural number literal (normalized @succ chain)
+                    return Heap.alloc(Nat(e.value))
                 # Integer literals
                 return Heap.alloc(("int", e.value, type_suffix))
         raise ValueError(f"Invalid Const node: {e}")
 
-    # If expression
-    if isinstance(e, If):
-        cond = eval_exp(e.cond, env)
+    @handles(If)
+    def if_(self, e: If, env: Dict[str, RefValue]) -> RefValue:
+        cond = self.visit(e.cond, env)
         # Evaluate condition - should be @true or @false
         # Check if it's a constructor tuple (tag, fields...)
         if isinstance(cond.data, tuple) and len(cond.data) > 0:
@@ -172,42 +198,48 @@ def eval_exp(e: Exp, env: Dict[str, RefValue]) -> RefValue:
             is_true = False
 
         if is_true:
-            result = eval_exp(e.then_branch, env)
+            result = self.visit(e.then_branch, env)
         else:
-            result = eval_exp(e.else_branch, env)
+            result = self.visit(e.else_branch, env)
         Heap.drop(cond)
         return result
 
     # Let binding: all bindings are recursive by default
-    if isinstance(e, Let):
+    @handles(Let)
+    def let(self, e: Let, env: Dict[str, RefValue]) -> RefValue:
         # Evaluate in an environment where the name is bound to a placeholder
         # This allows self-reference (recursion)
         placeholder = Heap.alloc(("rec_placeholder", e.name))
         new_env = {**env, e.name: placeholder}
-        val = eval_exp(e.value, new_env)
+        val = self.visit(e.value, new_env)
 
         # Replace the placeholder with the actual value
         Heap.drop(placeholder)
         new_env[e.name] = val
 
         # Evaluate body
-        result = eval_exp(e.body, new_env)
+        result = self.visit(e.body, new_env)
         return result
 
-    # Sequence expression
-    if isinstance(e, Seq):
+    @handles(Seq)
+    def seq(self, e: Seq, env: Dict[str, RefValue]) -> RefValue:
         result = None
         for expr in e.exprs:
             if result is not None:
                 Heap.drop(result)
-            result = eval_exp(expr, env)
+            result = self.visit(expr, env)
         return result if result is not None else Heap.alloc(("unit",))
 
     # Macro definitions are not evaluated (handled at expansion time)
-    if isinstance(e, MacroDef):
+    @handles(MacroDef)
+    def macro_def(self, e: MacroDef, env: Dict[str, RefValue]) -> RefValue:
         return Heap.alloc(("macro", e.name))
 
-    raise TypeError(f"cannot evaluate {type(e).__name__}")
+    def generic_visit(self, e: Exp, env: Dict[str, RefValue]) -> RefValue:
+        raise TypeError(f"cannot evaluate {type(e).__name__}")
+
+
+_evaluator = _Evaluator()
 
 
 def builtin_constructors() -> Dict[str, Type]:
@@ -262,13 +294,8 @@ def builtin_values() -> Dict[str, RefValue]:
             ms_data = ms_val
 
         # Extract integer from Nat representation
-        if isinstance(ms_data, tuple):
-            ms_num = 0
-            current = ms_data
-            while isinstance(current, tuple) and current[0] == "@succ":
-                ms_num += 1
-                current = current[1] if len(current) > 1 else None
-        else:
+        ms_num = nat_value(ms_data)
+        if ms_num is None:
             ms_num = int(ms_data)
 
         time.sleep(ms_num / 1000.0)
@@ -282,22 +309,13 @@ def builtin_values() -> Dict[str, RefValue]:
             max_num_data = max_val
 
         # Extract integer from Nat representation
-        if isinstance(max_num_data, tuple):
-            max_num = 0
-            current = max_num_data
-            while isinstance(current, tuple) and current[0] == "@succ":
-                max_num += 1
-                current = current[1] if len(current) > 1 else None
-        else:
+        max_num = nat_value(max_num_data)
+        if max_num is None:
             max_num = int(max_num_data)
 
         # Generate random number
         result = py_random.randint(0, max(0, max_num - 1))
-        # Convert back to Nat
-        nat_result = ("@zero",)
-        for _ in range(result):
-            nat_result = ("@succ", nat_result)
-        return Heap.alloc(nat_result)
+        return Heap.alloc(Nat(result))
 
     def seq_effect(a_val):
         """Sequence effect - evaluate a, then return b"""
@@ -357,8 +375,8 @@ def builtin_values() -> Dict[str, RefValue]:
         return Heap.alloc(with_init)
 
     return {
-        "@zero": Heap.alloc(("@zero",)),
-        "@succ": Heap.alloc(lambda n: Heap.alloc(("@succ", n))),
+        "@zero": Heap.alloc(Nat(0)),
+        "@succ": Heap.alloc(nat_succ),
         "@true": Heap.alloc(("@true",)),
         "@false": Heap.alloc(("@false",)),
         # Vec is record-based - use .{ } syntax
@@ -0,0 +1,123 @@
+"""Expansion driver: macro expansion, const propagation and staging to a fixpoint.
+
+After parsing, definitions go through user macro expansion (`macro_expander`),
+expression macro expansion (`macros`) and automatic staging (`staging`).
+Staging can turn a const into a record literal, and inlining that record can
+let deferred macros such as `@for` expand further, which can in turn enable
+more staging.
+
+Rather than re-running every stage over every definition a fixed number of
+times, `expand_program` expands and stages everything once, then keeps a
+worklist: only definitions that reference a newly known record are
+re-expanded, and only re-expanded definitions (and later ones referring to a
+definition whose result changed) are staged again. It stops when a pass
+changes nothing.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Dict, Set
+
+from auric.ast import Exp, MacroDef, Record, ast_size, names_in
+from auric.evaluator import builtin_values
+from auric.macro_expander import expand_expr as expand_user_macros
+from auric.macros import expand_macros as expand_expr_macros
+from auric.memory import RefValue
+from auric.staging import stage_definition
+
+
+@dataclass
+class ExpansionStats:
+    """What the driver did."""
+
+    passes: int = 0  # expansion passes, the first covering every definition
+    nodes_visited: int = 0  # AST nodes walked by expansion passes
+    expanded: int = 0  # definitions expanded, counting re-expansions
+    staged: int = 0  # definitions staged, counting re-staging
+    normalized: int = 0  # definitions normalized by staging in the result
+
+
+def expand_program(defs: Dict[str, Exp], macros: Dict[str, MacroDef]) -> tuple[Dict[str, Exp], ExpansionStats]:
+    """Expand macros and stage `defs` until nothing changes.
+
+    Args:
+        defs: Definitions without macro definitions, in source order
+        macros: User-defined macros
+
+    Returns:
+        (final definitions, statistics)
+    """
+    stats = ExpansionStats()
+    order = list(defs)
+    position = {name: i for i, name in enumerate(order)}
+    builtins = builtin_values()
+    current: Dict[str, Exp] = {}
+    values: Dict[str, RefValue] = {}
+    normalized: Set[str] = set()
+
+    def expand(expr: Exp, const_defs: Dict[str, Exp]) -> Exp:
+        stats.expanded += 1
+        if macros:
+            stats.nodes_visited += ast_size(expr)
+            expr = expand_user_macros(expr, macros, const_defs)
+        stats.nodes_visited += ast_size(expr)
+        return expand_expr_macros(expr, const_defs)
+
+    def stage(dirty: Set[str]) -> Set[str]:
+        """Stage the dirty definitions in order; returns those whose AST changed."""
+        changed = set()
+        env = dict(builtins)
+        for name in order:
+            if name in dirty:
+                stats.staged += 1
+                before = current[name]
+                current[name], value, was_normalized = stage_definition(before, env)
+                if was_normalized:
+                    normalized.add(name)
+                else:
+                    normalized.discard(name)
+                if value is not None:
+                    values[name] = value
+                else:
+                    values.pop(name, None)
+                if current[name] is not before:
+                    changed.add(name)
+                    # Later definitions referring to this one may now stage differently
+                    dirty.update(
+                        later for later in order[position[name] + 1:]
+                        if name in names_in(current[later])
+                    )
+            if name in values:
+                env[name] = values[name]
+        return changed
+
+    # First pass: expand and stage every definition
+    stats.passes = 1
+    for name in order:
+        current[name] = expand(defs[name], {})
+    stage(set(order))
+
+    # Re-expand where a record became known, until a fixpoint
+    known: Dict[str, Exp] = {}
+    while True:
+        records = {name: e for name, e in current.items() if isinstance(e, Record)}
+        new_records = {name for name, e in records.items() if known.get(name) is not e}
+        known = records
+        worklist = [name for name in order if names_in(current[name]) & new_records]
+        if not worklist:
+            break
+
+        stats.passes += 1
+        changed = set()
+        for name in worklist:
+            expanded = expand(current[name], known)
+            if expanded is not current[name]:
+                current[name] = expanded
+                changed.add(name)
+        if not changed:
+            break
+        stage(changed)
+
+    stats.normalized = len(normalized)
+    return current, stats
@@ -1,7 +1,9 @@
 """Lexer/Tokenizer for Auric source code."""
 
 import re
-from typing import List
+import sys
+from array import array
+from typing import Iterable, Iterator, List, Optional
 
 # Token patterns
 # Types: I_Am_A_Type - each word starts with uppercase, separated by underscores
@@ -13,41 +15,196 @@ VAR_ID = re.compile(r"[a-z][a-z0-9]*(?:_[a-z0-9]+)*\Z")
 INT_LIT = re.compile(r"-?(?:0[xX][0-9a-fA-F]+|0[oO][0-7]+|0[bB][01]+|\d+)(?:u8|u16|u32|u64|i8|i16|i32|i64)?\Z")
 FLOAT_LIT = re.compile(r"-?\d+\.\d+(?:[eE][+-]?\d+)?(?:f32|f64)?\Z")
 
+# Token kinds, assigned once by `lex` so the parser never re-runs the regexes
+BUILTIN = 1  # @zero, @succ, @Print
+SYMBOL = 2  # ( ) { } [ ] -> => := .. : = . , ; ∀ Λ ∪ ∩ \
+CHAR = 3  # 'a', '\n'
+FLOAT = 4  # 3.14, 2.5e10f32
+INT = 5  # 42, 0xFFu8, -1
+TYPE = 6  # identifiers matching TYPE_ID
+VAR = 7  # identifiers matching VAR_ID
+IDENT = 8  # any other identifier (_, _0, mixedCase)
+OTHER = 9  # any other single character
+
+KIND_NAMES = {
+    BUILTIN: "builtin",
+    SYMBOL: "symbol",
+    CHAR: "char",
+    FLOAT: "float",
+    INT: "int",
+    TYPE: "type",
+    VAR: "var",
+    IDENT: "ident",
+    OTHER: "other",
+}
+
 # Symbol pattern - add := and => and ..
 _sym = r"[∪∩\\(){}]|:=|=>|->|\.\.|:|=|\[|\]|Λ|\.|,|∀|;"
+# Whitespace and // line comments are skipped before each token
 _tok = re.compile(
-    rf"""\s*(
-    @[_A-Za-z][_0-9A-Za-z]* |  # Builtin identifiers (@ prefix)
-    {_sym} |
-    '(?:[^'\\]|\\.)'   |  # Character literals
-    -?\d+\.\d+(?:[eE][+-]?\d+)?(?:f32|f64)?  |  # Float literals with suffix
-    -?(?:0[xX][0-9a-fA-F]+|0[oO][0-7]+|0[bB][01]+|\d+)(?:u8|u16|u32|u64|i8|i16|i32|i64)?  |  # Int literals with suffix
-    [_A-Za-z][_0-9A-Za-z]* |  # Regular identifiers
-    \n | .
+    rf"""(?:\s+|//[^\n]*+)*+(?:
+    (?P<builtin>@[_A-Za-z][_0-9A-Za-z]*) |  # Builtin identifiers (@ prefix)
+    (?P<symbol>{_sym}) |
+    (?P<char>'(?:[^'\\]|\\.)')   |  # Character literals
+    (?P<float>-?\d+\.\d+(?:[eE][+-]?\d+)?(?:f32|f64)?)  |  # Float literals with suffix
+    (?P<int>-?(?:0[xX][0-9a-fA-F]+|0[oO][0-7]+|0[bB][01]+|\d+)(?:u8|u16|u32|u64|i8|i16|i32|i64)?)  |  # Int literals
+    (?P<ident>[_A-Za-z][_0-9A-Za-z]*) |  # Regular identifiers
+    (?P<other>\S) |
+    \Z  # Trailing whitespace and comments
 )""",
     re.VERBOSE,
 )
 
+_GROUP_KINDS = {
+    "builtin": BUILTIN,
+    "symbol": SYMBOL,
+    "char": CHAR,
+    "float": FLOAT,
+    "int": INT,
+    "other": OTHER,
+}
+
+# Token text -> kind, shared across runs since identifiers repeat heavily
+_kind_cache: dict[str, int] = {}
+
+
+def _ident_kind(text: str) -> int:
+    kind = _kind_cache.get(text)
+    if kind is None:
+        if TYPE_ID.match(text):
+            kind = TYPE
+        elif VAR_ID.match(text):
+            kind = VAR
+        else:
+            kind = IDENT
+        _kind_cache[text] = kind
+    return kind
+
+
+def classify(text: str) -> int:
+    """Return the token kind of a single token text."""
+    kind = _kind_cache.get(text)
+    if kind is not None:
+        return kind
+    m = _tok.fullmatch(text)
+    if m is None or m.lastgroup is None:
+        kind = OTHER
+    elif m.lastgroup == "ident":
+        return _ident_kind(text)
+    else:
+        kind = _GROUP_KINDS[m.lastgroup]
+    _kind_cache[text] = kind
+    return kind
+
+
+class Tokens:
+    """Compact token stream produced by `lex`.
+
+    Parallel arrays hold, for each token, its kind, its [start, end) offsets in
+    the source and its interned text. Indexing and iteration yield the token
+    texts, so a `Tokens` can be used wherever a list of token strings was.
+    Tokens that did not come from source text (e.g. macro output) have
+    offsets of -1.
+    """
+
+    __slots__ = ("src", "kinds", "starts", "ends", "texts")
+
+    def __init__(
+        self,
+        texts: List[str],
+        kinds: bytearray,
+        starts: array,
+        ends: array,
+        src: Optional[str] = None,
+    ):
+        self.src = src
+        self.texts = texts
+        self.kinds = kinds
+        self.starts = starts
+        self.ends = ends
 
-def lex(src: str) -> List[str]:
-    """Tokenize Auric source code into a list of tokens."""
-    return [m.group(1) for m in _tok.finditer(src) if m.group(1).strip() != ""]
+    @classmethod
+    def from_texts(cls, texts: Iterable[str]) -> "Tokens":
+        """Build a token stream from bare token strings, classifying each once."""
+        texts = [sys.intern(t) for t in texts]
+        n = len(texts)
+        kinds = bytearray(classify(t) for t in texts)
+        return cls(texts, kinds, array("l", [-1]) * n, array("l", [-1]) * n)
+
+    def kind(self, i: int) -> int:
+        return self.kinds[i]
+
+    def span(self, i: int) -> tuple[int, int]:
+        return self.starts[i], self.ends[i]
+
+    def __len__(self) -> int:
+        return len(self.texts)
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.texts)
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return Tokens(self.texts[i], self.kinds[i], self.starts[i], self.ends[i], self.src)
+        return self.texts[i]
+
+    def __eq__(self, other) -> bool:
+        if isinstance(other, Tokens):
+            return self.texts == other.texts and self.kinds == other.kinds
+        if isinstance(other, (list, tuple)):
+            return self.texts == list(other)
+        return NotImplemented
+
+    def __repr__(self) -> str:
+        return f"Tokens({self.texts!r})"
+
+
+def lex(src: str) -> Tokens:
+    """Tokenize Auric source code into a compact token stream."""
+    texts: List[str] = []
+    kinds = bytearray()
+    starts = array("l")
+    ends = array("l")
+    intern = sys.intern
+    for m in _tok.finditer(src):
+        group = m.lastgroup
+        if group is None:
+            continue
+        text = intern(m.group(group))
+        texts.append(text)
+        kinds.append(_ident_kind(text) if group == "ident" else _GROUP_KINDS[group])
+        starts.append(m.start(group))
+        ends.append(m.end(group))
+    return Tokens(texts, kinds, starts, ends, src)
 
 
 class Buf:
-    """Token buffer for parsing."""
+    """Token buffer for parsing.
 
-    def __init__(self, ts: List[str]):
-        self.ts = ts
-        self.i = 0
+    A buffer may be a view over tokens[start:end] of a larger stream; tokens
+    outside the view are never copied and read as end of input.
+    """
+
+    def __init__(self, ts, start: int = 0, end: Optional[int] = None):
+        if not isinstance(ts, Tokens):
+            ts = Tokens.from_texts(ts)
+        self.tokens = ts
+        self.ts = ts.texts
+        self.ks = ts.kinds
+        self.i = start
+        self.end = len(ts.texts) if end is None else end
 
     def peek(self):
         """Look at next token without consuming it."""
-        return self.ts[self.i] if self.i < len(self.ts) else None
+        return self.ts[self.i] if self.i < self.end else None
+
+    def peek_kind(self) -> int:
+        """Kind of the next token, or 0 at end of input."""
+        return self.ks[self.i] if self.i < self.end else 0
 
     def pop(self):
         """Consume and return next token."""
-        if self.i >= len(self.ts):
+        if self.i >= self.end:
             raise SyntaxError("unexpected <eof>")
         t = self.ts[self.i]
         self.i += 1
@@ -13,11 +13,16 @@ Macros support compile-time evaluation (comptime):
 - param() evaluates AST at compile-time
 """
 
-from typing import Dict, List, Any
+from dataclasses import dataclass
+from types import MappingProxyType
+from typing import Any, Callable, Dict, List, Mapping, Sequence
+from auric import macro_profile
+from auric.visitor import Rewriter, handles
+from auric.memory import Heap, Nat, RefValue, nat_succ, nat_value
 from auric.ast import (
-    Exp, App, Var, Lam, TyAbs, TyAppE, Case, Perform, Handle,
+    Exp, App, Var, Lam, Case,
     Record, Spread, FieldAccess, MacroInvocation, Const, Base, ShapeT,
-    If, Seq, MacroDef, Let
+    If, Seq, MacroDef, Let, ast_size, mentions, nat_literal, nat_literal_value, unchanged
 )
 
 # Compile-time builtin functions
@@ -37,13 +42,13 @@ COMPTIME_BUILTINS = {
     "@is_record",          # @is_record(expr) - check if expr is Record (@true/@false)
     "@record_fields",      # @record_fields(record) - get list of field expressions (cons/nil)
     # AST Destructuring (Lisp-style)
-    "@app-fn",             # @app-fn(app) - extract function from App node
-    "@app-arg",            # @app-arg(app) - extract argument from App node
-    "@lam-param",          # @lam-param(lam) - extract parameter name from Lam node
-    "@lam-body",           # @lam-body(lam) - extract body from Lam node
-    "@var-name",           # @var-name(var) - extract name from Var node
-    "@case-scrutinee",     # @case-scrutinee(case) - extract scrutinee from Case node
-    "@case-alts",          # @case-alts(case) - extract alternatives from Case node
+    "@app_fn",             # @app_fn(app) - the application without its last argument
+    "@app_arg",            # @app_arg(app) - the last argument of an App node
+    "@lam_param",          # @lam_param(lam) - first parameter name of a Lam node (as Var)
+    "@lam_body",           # @lam_body(lam) - body of a Lam node after its first parameter
+    "@var_name",           # @var_name(var) - extract name from Var node
+    "@case_scrutinee",     # @case_scrutinee(case) - extract scrutinee from Case node
+    "@case_alts",          # @case_alts(case) - alternatives as a pattern/branch cons list
     # Data Manipulation
     "@concat",             # @concat(str1, str2) - concatenate two variable names
     "@to_string",          # @to_string(nat) - convert nat to string (as Var)
@@ -91,96 +96,91 @@ def expand_expr(e: Exp, macros: Dict[str, MacroDef], const_defs: Dict[str, Exp]
         macros: User-defined macros
         const_defs: Optional dictionary of const name -> Record for inlining
     """
-    if const_defs is None:
-        const_defs = {}
+    return _MacroExpander(macros, const_defs if const_defs is not None else {}).visit(e)
+
+
+class _MacroExpander(Rewriter):
+    """expand_expr: expands user macro calls and rewrites everything else in place."""
+
+    def __init__(self, macros: Dict[str, MacroDef], const_defs: Dict[str, Exp]):
+        self.macros = macros
+        self.const_defs = const_defs
+        self.names = frozenset(macros).union(const_defs)
+
+    def visit(self, e: Exp, ctx: None = None) -> Exp:
+        # Nothing below a node naming no macro or const can change
+        if not mentions(e, self.names):
+            return e
+        return self._table[type(e)](self, e, ctx)
 
     # Inline const record references for compile-time unrolling
-    if isinstance(e, Var) and e.name in const_defs:
-        const_val = const_defs[e.name]
+    @handles(Var)
+    def var(self, e: Var, ctx: None) -> Exp:
+        const_val = self.const_defs.get(e.name)
         # Only inline if it's a Record (for compile-time unrolling)
         if isinstance(const_val, Record):
             return const_val
+        return e
 
-    # Check if this is a macro invocation
-    if isinstance(e, App):
+    @handles(App)
+    def app(self, e: App, ctx: None) -> Exp:
         # Collect the function and all arguments
         fn, args = collect_app_chain(e)
 
         # Check if fn is a macro
-        if isinstance(fn, Var) and fn.name in macros:
-            # This is a macro call!
-            macro = macros[fn.name]
-
-            # Expand the macro
-            result = expand_macro_invocation(macro, args, macros)
-
-            # Recursively expand result (in case it contains more macros)
-            return expand_expr(result, macros, const_defs)
-
-    # Recursively expand subexpressions
-    if isinstance(e, Lam):
-        return Lam(e.params, expand_expr(e.body, macros, const_defs))
-
-    if isinstance(e, App):
-        return App(expand_expr(e.fn, macros, const_defs), [expand_expr(arg, macros, const_defs) for arg in e.args])
-
-    if isinstance(e, TyAbs):
-        return TyAbs(e.tv, expand_expr(e.body, macros, const_defs))
-
-    if isinstance(e, TyAppE):
-        return TyAppE(expand_expr(e.fn, macros, const_defs), e.arg_ty)
+        if not (isinstance(fn, Var) and fn.name in self.macros):
+            return self.rewrite_app(e, ctx)
 
-    if isinstance(e, Case):
-        return Case(
-            expand_expr(e.scr, macros, const_defs),
-            {tag: (binds, expand_expr(rhs, macros, const_defs)) for tag, (binds, rhs) in e.alts.items()}
-        )
-
-    if isinstance(e, Perform):
-        return Perform(e.effect_name, expand_expr(e.args, macros, const_defs))
-
-    if isinstance(e, Handle):
-        return Handle(
-            expand_expr(e.body, macros, const_defs),
-            {eff: (binds, expand_expr(handler, macros, const_defs))
-             for eff, (binds, handler) in e.handlers.items()}
-        )
+        # This is a macro call!
+        macro = self.macros[fn.name]
 
-    if isinstance(e, Record):
-        return Record({name: expand_expr(val, macros, const_defs) for name, val in e.fields.items()})
+        # Expand the macro
+        result = _invoke(macro, args, self.macros)
 
-    if isinstance(e, FieldAccess):
-        return FieldAccess(expand_expr(e.record, macros, const_defs), e.field)
-
-    if isinstance(e, If):
-        return If(
-            expand_expr(e.cond, macros, const_defs),
-            expand_expr(e.then_branch, macros, const_defs),
-            expand_expr(e.else_branch, macros, const_defs)
-        )
-
-    if isinstance(e, Seq):
-        return Seq([expand_expr(expr, macros, const_defs) for expr in e.exprs])
+        # Recursively expand result (in case it contains more macros)
+        return _expand_result(macro.name, e, result, self.macros, self.const_defs)
 
     # Handle MacroInvocation nodes (from special syntax like 'for' loops)
-    if isinstance(e, MacroInvocation):
-        if e.macro_name in macros:
-            # Expand arguments first
-            expanded_args = [expand_expr(arg, macros, const_defs) for arg in e.args]
-            # Expand the macro
-            result = expand_macro_invocation(macros[e.macro_name], expanded_args, macros)
-            # Avoid infinite recursion if macro returns itself unchanged
-            if isinstance(result, MacroInvocation) and result.macro_name == e.macro_name:
-                # Check if args are structurally the same (can't use == due to AST structure)
-                # For now, just return it as-is - const propagation will inline Records later
-                return result
-            # Recursively expand result
-            return expand_expr(result, macros, const_defs)
-        # If not in user-defined macros, keep as-is (might be Python-registered)
-        return e
-
-    # Base cases: Var, literals
-    return e
+    @handles(MacroInvocation)
+    def macro_invocation(self, e: MacroInvocation, ctx: None) -> Exp:
+        if e.macro_name not in self.macros:
+            # If not in user-defined macros, keep as-is (might be Python-registered)
+            return e
+        # Expand arguments first
+        expanded_args = [self.visit(arg) for arg in e.args]
+        # Expand the macro
+        result = _invoke(self.macros[e.macro_name], expanded_args, self.macros)
+        # Avoid infinite recursion if macro returns itself unchanged
+        if isinstance(result, MacroInvocation) and result.macro_name == e.macro_name:
+            # Check if args are structurally the same (can't use == due to AST structure)
+            # For now, just return it as-is - const propagation will inline Records later
+            return result
+        # Recursively expand result
+        return _expand_result(e.macro_name, e, result, self.macros, self.const_defs)
+
+
+def _invoke(macro: MacroDef, args: List[Exp], macros: Dict[str, MacroDef]) -> Exp:
+    """expand_macro_invocation, timed as an attempt when profiling."""
+    profiler = macro_profile.current
+    if profiler is None:
+        return expand_macro_invocation(macro, args, macros)
+    start = macro_profile.clock()
+    result = expand_macro_invocation(macro, args, macros)
+    profiler.attempt("comptime", macro.name, macro_profile.clock() - start)
+    return result
+
+
+def _expand_result(name: str, invocation: Exp, result: Exp, macros: Dict[str, MacroDef],
+                   const_defs: Dict[str, Exp]) -> Exp:
+    """Expand the macros in an invocation's result, profiling the expansion if enabled."""
+    profiler = macro_profile.current
+    if profiler is None:
+        return expand_expr(result, macros, const_defs)
+    start = macro_profile.clock()
+    expanded = expand_expr(result, macros, const_defs)
+    profiler.expansion("comptime", name, macro_profile.clock() - start,
+                       macro_profile.ast_size(invocation), macro_profile.ast_size(expanded))
+    return expanded
 
 
 def collect_app_chain(e: App) -> tuple[Exp, List[Exp]]:
@@ -200,9 +200,49 @@ def collect_app_chain(e: App) -> tuple[Exp, List[Exp]]:
     return current, all_args
 
 
-MAX_COMPTIME_DEPTH = 1000  # Maximum recursion depth for totality
+@dataclass
+class ComptimeBudget:
+    """Limits on the compile-time evaluation of one macro invocation.
 
-def eval_comptime(e: Exp, ast_env: Dict[str, Exp], macros: Dict[str, MacroDef], depth: int = 0) -> Exp:
+    Macros invoked while it expands, from its body or from its output, draw
+    on the same budget, so a recursive macro cannot run forever and one that
+    doubles its output at each step is stopped before the output is walked.
+    """
+
+    fuel: int = 1_000_000  # evaluation steps
+    max_output: int = 1_000_000  # AST nodes in the result of any macro
+
+
+comptime_budget = ComptimeBudget()
+
+
+class ComptimeBudgetExceeded(RuntimeError):
+    """A macro ran out of fuel or produced too large an AST."""
+
+
+class _Fuel:
+    """What is left of the budget of the invocation being expanded."""
+
+    __slots__ = ("budget", "left")
+
+    def __init__(self, budget: ComptimeBudget):
+        self.budget = budget
+        self.left = budget.fuel
+
+
+# Budget of the outermost invocation being expanded, if any
+_fuel: _Fuel | None = None
+
+
+def _out_of_fuel(name: str | None) -> ComptimeBudgetExceeded:
+    where = f"macro {name}" if name else "compile-time expression"
+    return ComptimeBudgetExceeded(
+        f"Compile-time evaluation of {where} exceeded its fuel budget ({_fuel.budget.fuel} steps). "
+        f"Ensure recursive macros are total (terminate on all inputs)."
+    )
+
+
+def eval_comptime(e: Exp, ast_env: Dict[str, Exp], macros: Dict[str, MacroDef]) -> Exp:
     """Evaluate macro body at compile-time (comptime mode).
 
     In comptime mode:
@@ -211,533 +251,671 @@ def eval_comptime(e: Exp, ast_env: Dict[str, Exp], macros: Dict[str, MacroDef],
     - If expressions evaluate their conditions
     - Everything else is AST construction
 
-    Args:
-        depth: Current recursion depth for totality checking
-
     Returns: AST to be spliced into the program
 
     Raises:
-        RuntimeError: If recursion depth exceeds MAX_COMPTIME_DEPTH (non-total function)
+        ComptimeBudgetExceeded: If evaluation runs out of fuel (non-total function)
     """
+    code = _compile(e, frozenset(ast_env), frozenset(macros))[0]
+    return _with_fuel(lambda: _execute(code, ast_env, macros, None))
 
-    # Totality enforcement: check recursion depth
-    if depth > MAX_COMPTIME_DEPTH:
-        raise RuntimeError(
-            f"Compile-time evaluation exceeded maximum depth ({MAX_COMPTIME_DEPTH}). "
-            f"Ensure recursive functions are total (terminate on all inputs)."
-        )
 
-    # If expression: evaluate condition at compile-time
+def _with_fuel(run: Callable[[], Exp]) -> Exp:
+    """run(), drawing on the current invocation's budget or starting a new one."""
+    global _fuel
+    if _fuel is not None:
+        return run()
+    _fuel = _Fuel(comptime_budget)
+    try:
+        return run()
+    finally:
+        _fuel = None
+
+
+# Compiled comptime code: a tuple of instructions, each a tuple whose first
+# item is one of the opcodes below. Running code leaves the value eval_comptime
+# would return on the value stack.
+Code = tuple
+
+(_CONST, _PARAM, _FORCE, _APP, _SEQ, _RECORD, _SPREAD, _LAM, _SCOPE, _BUILTIN, _MACRO,
+ _RETURN, _IF, _KEEP_IF, _CASE, _KEEP_CASE, _LET, _STORE) = range(18)
+
+_KEEP_IF_CODE: Code = ((_KEEP_IF,),)
+
+# MacroDef -> (macro names it was compiled against, compiled body)
+_compiled_macros: Dict[MacroDef, tuple[frozenset, Code]] = {}
+
+
+def compile_macro(macro: MacroDef, macros: Dict[str, MacroDef]) -> Code:
+    """The body of `macro` compiled for its parameters, cached per macro.
+
+    Which names are parameters, builtins or macro calls is decided once here
+    rather than on every invocation, so expanding a call site only builds
+    its output.
+    """
+    entry = _compiled_macros.get(macro)
+    if entry is None or entry[0] != macros.keys():
+        names = frozenset(macros)
+        entry = _compiled_macros[macro] = (names, _compile(macro.body, frozenset(macro.params), names)[0])
+    return entry[1]
+
+
+def _compile(e: Exp, scope: frozenset, names: frozenset) -> tuple[Code, bool]:
+    """Compile `e` as eval_comptime evaluates it.
+
+    `scope` holds the names bound in ast_env wherever `e` is evaluated and
+    `names` the macros. Returns (code, constant); constant code always
+    yields `e` itself, since rebuilding unchanged nodes gives the interned
+    original.
+    """
     if isinstance(e, If):
-        # Check if condition is a param() call
-        cond_result = eval_comptime(e.cond, ast_env, macros, depth + 1)
-
-        # If it's a simple AST, try to evaluate it
-        needs_eval = needs_evaluation(cond_result, ast_env)
-        if needs_eval:
-            # Evaluate the condition to get a boolean
-            bool_val = evaluate_to_bool(cond_result, ast_env)
-            if bool_val:
-                return eval_comptime(e.then_branch, ast_env, macros, depth + 1)
-            else:
-                return eval_comptime(e.else_branch, ast_env, macros, depth + 1)
-        else:
-            # Condition is not compile-time known, keep the if
-            return If(
-                cond_result,
-                eval_comptime(e.then_branch, ast_env, macros, depth + 1),
-                eval_comptime(e.else_branch, ast_env, macros, depth + 1)
-            )
-
-    # Variable: if it's a macro parameter, return the AST
+        cond, _ = _compile(e.cond, scope, names)
+        then, _ = _compile(e.then_branch, scope, names)
+        orelse, _ = _compile(e.else_branch, scope, names)
+        return cond + ((_IF, then, orelse),), False
+
     if isinstance(e, Var):
-        if e.name in ast_env:
-            # This is a macro parameter - return its AST
-            return ast_env[e.name]
-        # Check for compile-time builtins
-        if e.name in COMPTIME_BUILTINS:
-            # Return a special marker for the builtin
-            return e
-        # Regular variable - keep as is
-        return e
+        if e.name in scope:
+            return ((_PARAM, e.name),), False
+        return ((_CONST, e),), True
 
-    # Application: check for param() pattern, builtin calls, or macro calls
     if isinstance(e, App):
-        # Check if this is param() where param is a macro parameter
-        if isinstance(e.fn, Var) and e.fn.name in ast_env:
-            # This is a call on a macro parameter!
-            # Check if the argument is empty (unit) - this means ()
+        if isinstance(e.fn, Var) and e.fn.name in scope:
             if len(e.args) == 1 and isinstance(e.args[0], Var) and e.args[0].name == "()":
-                # This is param() - evaluate the AST!
-                ast_to_eval = ast_env[e.fn.name]
-                return evaluate_ast_to_ast(ast_to_eval)
+                # param() - evaluate the parameter's AST
+                return ((_FORCE, e.fn.name),), False
 
-        # Check if this is a compile-time builtin call
         fn, args = collect_app_chain(e)
-        if isinstance(fn, Var) and fn.name in COMPTIME_BUILTINS:
-            # Call the builtin at compile-time!
-            expanded_args = [eval_comptime(arg, ast_env, macros, depth + 1) for arg in args]
-            return call_comptime_builtin(fn.name, expanded_args, ast_env, macros)
-
-        # Check if this is a macro call
-        if isinstance(fn, Var) and fn.name in macros:
-            # This is a macro call within a macro body!
-            # Expand it by recursively processing the arguments and invoking the macro
-            expanded_args = [eval_comptime(arg, ast_env, macros, depth + 1) for arg in args]
-            return expand_macro_invocation(macros[fn.name], expanded_args, macros)
-
-        # Regular application - recurse
-        return App(
-            eval_comptime(e.fn, ast_env, macros, depth + 1),
-            [eval_comptime(arg, ast_env, macros, depth + 1) for arg in e.args]
-        )
+        if isinstance(fn, Var) and (fn.name in COMPTIME_BUILTINS or fn.name in names):
+            code = tuple(op for arg in args for op in _compile(arg, scope, names)[0])
+            op = _BUILTIN if fn.name in COMPTIME_BUILTINS else _MACRO
+            return code + ((op, fn.name, len(args)),), False
+
+        fn_code, fn_const = _compile(e.fn, scope, names)
+        compiled = [_compile(arg, scope, names) for arg in e.args]
+        if fn_const and all(const for _, const in compiled):
+            return ((_CONST, e),), True
+        return fn_code + tuple(op for code, _ in compiled for op in code) + ((_APP, e, len(e.args)),), False
 
-    # Sequence: recurse on each expression
     if isinstance(e, Seq):
-        return Seq([eval_comptime(expr, ast_env, macros, depth + 1) for expr in e.exprs])
+        compiled = [_compile(expr, scope, names) for expr in e.exprs]
+        if all(const for _, const in compiled):
+            return ((_CONST, e),), True
+        return tuple(op for code, _ in compiled for op in code) + ((_SEQ, e, len(e.exprs)),), False
 
-    # Lambda: recurse on body (shadow parameters if needed)
     if isinstance(e, Lam):
-        new_env = {k: v for k, v in ast_env.items() if k not in e.params}
-        return Lam(e.params, eval_comptime(e.body, new_env, macros, depth + 1))
+        shadowed = scope.intersection(e.params)
+        body, const = _compile(e.body, scope - shadowed, names)
+        if const:
+            return ((_CONST, e),), True
+        # Only copy the environment when a parameter shadows a binding
+        if shadowed:
+            return ((_SCOPE, shadowed, body), (_LAM, e)), False
+        return body + ((_LAM, e),), False
 
-    # Case: try to evaluate pattern match at compile-time
     if isinstance(e, Case):
-        # Evaluate the scrutinee
-        scr_result = eval_comptime(e.scr, ast_env, macros, depth + 1)
-
-        # Try to match at compile-time if scrutinee is simple enough
-        matched_branch = try_match_pattern(scr_result, e.alts, ast_env, macros)
-        if matched_branch is not None:
-            # We matched! Return the evaluated branch
-            return matched_branch
-
-        # Can't match at compile-time, keep the Case
-        new_alts = {}
-        for tag, (binds, rhs) in e.alts.items():
-            # Shadow bound variables
-            new_env = {k: v for k, v in ast_env.items() if k not in binds}
-            new_alts[tag] = (binds, eval_comptime(rhs, new_env, macros, depth + 1))
-        return Case(scr_result, new_alts)
-
-    # Record: recurse on fields and handle spread operator
+        scr, _ = _compile(e.scr, scope, names)
+        # Each alternative is evaluated with its binders added when the
+        # scrutinee matches, and with them shadowed when it does not
+        alts = {
+            tag: (binds, _compile(rhs, scope | set(binds), names)[0],
+                  scope.intersection(binds), _compile(rhs, scope - set(binds), names)[0])
+            for tag, (binds, rhs) in e.alts.items()
+        }
+        return scr + ((_CASE, alts, ((_KEEP_CASE, e),)),), False
+
     if isinstance(e, Record):
-        # Check if any field is a Spread
-        has_spread = any(key.startswith("__spread_") and isinstance(val, Spread) for key, val in e.fields.items())
-
-        if has_spread:
-            # Process record with spread - merge fields
-            merged_fields = {}
-            indexed_count = 0  # Track how many indexed fields we've added
-
-            for key, val in e.fields.items():
-                if key.startswith("__spread_") and isinstance(val, Spread):
-                    # Evaluate spread expression
-                    spread_result = eval_comptime(val.record, ast_env, macros, depth + 1)
-
-                    if not isinstance(spread_result, Record):
-                        raise TypeError(f"Spread operator requires record, got {type(spread_result).__name__}")
-
-                    # Merge fields from spread_result
-                    for spread_key, spread_val in spread_result.fields.items():
-                        if spread_key.startswith("_") and spread_key[1:].isdigit():
-                            # Indexed field - reindex it
-                            merged_fields[f"_{indexed_count}"] = spread_val
-                            indexed_count += 1
-                        else:
-                            # Named field - merge directly (later fields override)
-                            merged_fields[spread_key] = spread_val
+        compiled = []
+        spec = []
+        for key, val in e.fields.items():
+            spread = isinstance(val, Spread) and key.startswith("__spread_")
+            compiled.append(_compile(val.record if spread else val, scope, names))
+            spec.append((key, spread, key.startswith("_") and key[1:].isdigit()))
+        code = tuple(op for code, _ in compiled for op in code)
+        if not any(spread for _, spread, _ in spec):
+            if all(const for _, const in compiled):
+                return ((_CONST, e),), True
+            return code + ((_RECORD, e, len(spec)),), False
+        return code + ((_SPREAD, tuple(spec)),), False
+
+    if isinstance(e, Let):
+        inner = scope | {e.name}
+        value, _ = _compile(e.value, inner, names)
+        body, _ = _compile(e.body, inner, names)
+        # The body runs after the value is stored under the name
+        return ((_LET, e.name, e.value, value, ((_STORE, e.name),) + body),), False
+
+    # Other forms: keep as-is (literals, etc.)
+    return ((_CONST, e),), True
+
+
+def _take(values: list, n: int) -> list:
+    """Pop the top n values, in push order."""
+    if not n:
+        return []
+    taken = values[-n:]
+    del values[-n:]
+    return taken
+
+
+def _execute(code: Code, env: Dict[str, Exp], macros: Dict[str, MacroDef], name: str | None) -> Exp:
+    """Run compiled code to its result with an explicit stack.
+
+    `name` is the macro whose body `code` is. Blocks entered for branches,
+    scopes and macro calls push a frame instead of a Python call, so nesting
+    and recursion are limited only by the fuel budget.
+    """
+    fuel = _fuel
+    left = fuel.left
+    values: List[Exp] = []
+    frames: List[tuple] = []
+    pc = 0
+    end = len(code)
+    try:
+        while True:
+            if pc == end:
+                if not frames:
+                    break
+                code, pc, env = frames.pop()
+                end = len(code)
+                continue
+            op = code[pc]
+            pc += 1
+            left -= 1
+            if left < 0:
+                raise _out_of_fuel(name)
+            kind = op[0]
+
+            if kind is _CONST:
+                values.append(op[1])
+            elif kind is _PARAM:
+                values.append(env[op[1]])
+            elif kind is _APP:
+                e = op[1]
+                args = _take(values, op[2])
+                fn = values.pop()
+                values.append(e if fn is e.fn and unchanged(args, e.args) else App(fn, args))
+            elif kind is _RECORD:
+                e = op[1]
+                fields = _take(values, op[2])
+                values.append(e if unchanged(fields, e.fields.values()) else Record(dict(zip(e.fields, fields))))
+            elif kind is _SEQ:
+                e = op[1]
+                exprs = _take(values, op[2])
+                values.append(e if unchanged(exprs, e.exprs) else Seq(exprs))
+            elif kind is _BUILTIN:
+                args = _take(values, op[2])
+                values.append(call_comptime_builtin(op[1], args, env, macros))
+            elif kind is _MACRO:
+                args = _take(values, op[2])
+                macro = macros[op[1]]
+                if len(args) != len(macro.params):
+                    raise TypeError(f"Macro {macro.name} expects {len(macro.params)} arguments, got {len(args)}")
+                if pc != end:
+                    frames.append((code, pc, env))
+                frames.append((((_RETURN, macro.name, left, name),), 0, None))
+                code, pc, env, name = compile_macro(macro, macros), 0, dict(zip(macro.params, args)), macro.name
+                end = len(code)
+            elif kind is _RETURN:
+                fuel.left = left
+                values[-1] = _finish(op[1], values[-1], macros, op[2] - left)
+                left = fuel.left
+                name = op[3]
+            elif kind is _IF:
+                cond = values.pop()
+                if pc != end:
+                    frames.append((code, pc, env))
+                if needs_evaluation(cond, env):
+                    code = op[1] if evaluate_to_bool(cond, env) else op[2]
+                else:
+                    # Condition is not compile-time known: keep the if
+                    values.append(cond)
+                    frames.append((_KEEP_IF_CODE, 0, env))
+                    frames.append((op[2], 0, env))
+                    code = op[1]
+                pc = 0
+                end = len(code)
+            elif kind is _KEEP_IF:
+                orelse = values.pop()
+                then = values.pop()
+                values.append(If(values.pop(), then, orelse))
+            elif kind is _CASE:
+                scr = values.pop()
+                tag, bound_values = extract_constructor(scr)
+                alts = op[1]
+                alt = alts.get(tag)
+                if pc != end:
+                    frames.append((code, pc, env))
+                if alt is not None and len(alt[0]) == len(bound_values):
+                    env = {**env, **dict(zip(alt[0], bound_values))}
+                    code = alt[1]
+                else:
+                    # Can't match at compile-time: keep the case
+                    values.append(scr)
+                    frames.append((op[2], 0, env))
+                    for binds, _, shadowed, rhs in reversed(alts.values()):
+                        frames.append((rhs, 0, {k: v for k, v in env.items() if k not in shadowed} if shadowed else env))
+                    code, _, env = frames.pop()
+                pc = 0
+                end = len(code)
+            elif kind is _KEEP_CASE:
+                e = op[1]
+                rhss = _take(values, len(e.alts))
+                scr = values.pop()
+                if scr is e.scr and unchanged(rhss, (rhs for _, rhs in e.alts.values())):
+                    values.append(e)
                 else:
-                    # Regular field
-                    evaluated_val = eval_comptime(val, ast_env, macros, depth + 1)
-                    if key.startswith("_") and key[1:].isdigit():
-                        # Indexed field - reindex it
-                        merged_fields[f"_{indexed_count}"] = evaluated_val
+                    values.append(Case(scr, {tag: (binds, rhs) for (tag, (binds, _)), rhs in zip(e.alts.items(), rhss)}))
+            elif kind is _LAM:
+                e = op[1]
+                body = values.pop()
+                values.append(e if body is e.body else Lam(e.params, body))
+            elif kind is _SCOPE:
+                if pc != end:
+                    frames.append((code, pc, env))
+                shadowed = op[1]
+                env = {k: v for k, v in env.items() if k not in shadowed}
+                code, pc = op[2], 0
+                end = len(code)
+            elif kind is _LET:
+                # Recursive: the value sees its own unevaluated definition
+                if pc != end:
+                    frames.append((code, pc, env))
+                env = {**env, op[1]: op[2]}
+                frames.append((op[4], 0, env))
+                code, pc = op[3], 0
+                end = len(code)
+            elif kind is _STORE:
+                env[op[1]] = values.pop()
+            elif kind is _FORCE:
+                values.append(evaluate_ast_to_ast(env[op[1]]))
+            elif kind is _SPREAD:
+                spec = op[1]
+                # Merge fields, reindexing positional fields
+                merged_fields = {}
+                indexed_count = 0
+                for (key, spread, indexed), value in zip(spec, _take(values, len(spec))):
+                    if spread:
+                        if not isinstance(value, Record):
+                            raise TypeError(f"Spread operator requires record, got {type(value).__name__}")
+                        for spread_key, spread_val in value.fields.items():
+                            if spread_key.startswith("_") and spread_key[1:].isdigit():
+                                merged_fields[f"_{indexed_count}"] = spread_val
+                                indexed_count += 1
+                            else:
+                                merged_fields[spread_key] = spread_val
+                    elif indexed:
+                        merged_fields[f"_{indexed_count}"] = value
                         indexed_count += 1
                     else:
-                        # Named field
-                        merged_fields[key] = evaluated_val
-
-            return Record(merged_fields)
-        else:
-            # No spread - just recurse on fields
-            return Record({name: eval_comptime(val, ast_env, macros, depth + 1) for name, val in e.fields.items()})
+                        merged_fields[key] = value
+                values.append(Record(merged_fields))
+    finally:
+        fuel.left = left
+    return values.pop()
+
+
+def _finish(name: str, result: Exp, macros: Dict[str, MacroDef], steps: int) -> Exp:
+    """The expansion of an invocation of macro `name` whose body evaluated to `result`."""
+    size = ast_size(result)
+    if size > _fuel.budget.max_output:
+        raise ComptimeBudgetExceeded(
+            f"Macro {name} produced {size} AST nodes, more than the output budget ({_fuel.budget.max_output})"
+        )
+    profiler = macro_profile.current
+    if profiler is not None:
+        profiler.evaluation("comptime", name, steps, size)
 
-    # Let binding: all bindings are recursive by default
-    if isinstance(e, Let):
-        # For recursive definitions, add the name to environment before evaluating value
-        # This allows self-reference (the value can use the name)
-        # We add the unevaluated value as a placeholder (works for lambda definitions)
-        new_env = {**ast_env, e.name: e.value}
-        val_result = eval_comptime(e.value, new_env, macros, depth + 1)
-        # Update environment with evaluated value
-        new_env[e.name] = val_result
-        # Evaluate body
-        return eval_comptime(e.body, new_env, macros, depth + 1)
+    # If the result is a MacroInvocation, return it as-is (it will be expanded in the next pass)
+    # This handles cases like @for macro that defers expansion via @macro_invocation
+    if isinstance(result, MacroInvocation):
+        return result
 
-    # Other forms: keep as-is (literals, etc.)
-    return e
+    # Expand any macros in the result
+    return expand_expr(result, macros)
 
 
 def call_comptime_builtin(name: str, args: List[Exp],
                           ast_env: Dict[str, Exp], macros: Dict[str, MacroDef]) -> Exp:
     """Call a compile-time builtin function."""
+    impl = _comptime_builtins.get(name)
+    if impl is None:
+        raise ValueError(f"Unknown compile-time builtin: {name}")
+    return impl(args)
 
-    if name == "repeat_expr":
-        # repeat_expr(n, body) - generate n copies of body
-        if len(args) != 2:
-            raise TypeError(f"repeat_expr expects 2 arguments, got {len(args)}")
 
-        n_ast, body_ast = args
+# Builtin name -> implementation over its (evaluated) argument ASTs
+_comptime_builtins: Dict[str, Callable[[List[Exp]], Exp]] = {}
 
-        # Evaluate n to get the count
-        from auric.evaluator import eval_exp, Heap
-        env = make_comptime_env()
-        result = eval_exp(n_ast, env)
 
-        # Convert to integer
-        count = value_to_int(result.data)
-        Heap.drop(result)
+def _builtin(name: str, arity: int | None = None) -> Callable[[Callable[..., Exp]], Callable[..., Exp]]:
+    """Register the implementation of a builtin taking `arity` arguments (any number if None)."""
 
-        if count < 0:
-            raise ValueError(f"repeat_expr count must be non-negative, got {count}")
+    def register(fn: Callable[..., Exp]) -> Callable[..., Exp]:
+        def call(args: List[Exp]) -> Exp:
+            if arity is not None and len(args) != arity:
+                plural = "argument" if arity == 1 else "arguments"
+                raise TypeError(f"{name} expects {arity} {plural}, got {len(args)}")
+            return fn(*args)
 
-        # Generate count copies of body
-        if count == 0:
-            # Empty sequence - return zero as a placeholder
-            return Var("@zero")
-        elif count == 1:
-            return body_ast
-        else:
-            # Build a Seq with count copies
-            return Seq([body_ast for _ in range(count)])
-
-    elif name == "seq_cons":
-        # seq_cons(expr, rest) - prepend expr to a sequence
-        if len(args) != 2:
-            raise TypeError(f"seq_cons expects 2 arguments, got {len(args)}")
-
-        expr_ast, rest_ast = args
-
-        # If rest is a Seq, prepend to it
-        if isinstance(rest_ast, Seq):
-            return Seq([expr_ast] + rest_ast.exprs)
-        elif isinstance(rest_ast, Var) and rest_ast.name == "()":
-            # Empty sequence - just return expr
-            return expr_ast
-        else:
-            # Make a 2-element sequence
-            return Seq([expr_ast, rest_ast])
-
-    # ============================================================
-    # AST Construction Primitives
-    # ============================================================
-
-    elif name == "@var":
-        # @var(name_var) - create Var node using the name from name_var
-        if len(args) != 1:
-            raise TypeError(f"@var expects 1 argument, got {len(args)}")
-        name_var = args[0]
-        if isinstance(name_var, Var):
-            # Create new Var with this name
-            return Var(name_var.name)
-        else:
-            raise TypeError(f"@var expects Var argument, got {type(name_var).__name__}")
-
-    elif name == "@app":
-        # @app(fn, arg) - create App node
-        if len(args) != 2:
-            raise TypeError(f"@app expects 2 arguments, got {len(args)}")
-        fn_expr, arg_expr = args
-        return App(fn_expr, arg_expr)
-
-    elif name == "@lam":
-        # @lam(param_name_var, body) - create Lam node
-        if len(args) != 2:
-            raise TypeError(f"@lam expects 2 arguments, got {len(args)}")
-        param_var, body_expr = args
-        if isinstance(param_var, Var):
-            return Lam(param_var.name, body_expr)
-        else:
-            raise TypeError(f"@lam expects Var as first argument, got {type(param_var).__name__}")
-
-    elif name == "@field_access":
-        # @field_access(record, field_name_var) - create FieldAccess node
-        if len(args) != 2:
-            raise TypeError(f"@field_access expects 2 arguments, got {len(args)}")
-        record_expr, field_var = args
-        if isinstance(field_var, Var):
-            return FieldAccess(record_expr, field_var.name)
-        else:
-            raise TypeError(f"@field_access expects Var as second argument, got {type(field_var).__name__}")
-
-    elif name == "@seq":
-        # @seq(list) - create Seq node from list of expressions
-        if len(args) != 1:
-            raise TypeError(f"@seq expects 1 argument, got {len(args)}")
-        list_expr = args[0]
-        # Convert cons/nil list to Python list
-        exprs = list_to_python(list_expr)
-        if len(exprs) == 0:
-            return Var("@zero")  # Empty sequence
-        elif len(exprs) == 1:
-            return exprs[0]
-        else:
-            return Seq(exprs)
-
-    elif name == "@macro_invocation":
-        # @macro_invocation(name_var, args_list) - create MacroInvocation node
-        if len(args) != 2:
-            raise TypeError(f"@macro_invocation expects 2 arguments, got {len(args)}")
-        name_var, args_list = args
-        if not isinstance(name_var, Var):
-            raise TypeError(f"@macro_invocation expects Var as first argument, got {type(name_var).__name__}")
-        # Convert cons/nil list to Python list
-        macro_args = list_to_python(args_list)
-        return MacroInvocation(name_var.name, macro_args)
-
-    elif name == "@case":
-        # @case(scrutinee, pat1, expr1, pat2, expr2, ...) - create Case node
-        # Takes scrutinee followed by alternating pattern names (as Vars) and branch expressions
-        # Bindings are assumed to be empty for all patterns
-        if len(args) < 3 or len(args) % 2 != 1:
-            raise TypeError(f"@case expects odd number of arguments (scrutinee + pairs of pattern/expr), got {len(args)}")
-        scrutinee = args[0]
-        from auric.ast import Case
-        alts = {}
-        # Process pairs of (pattern, expr)
-        for i in range(1, len(args), 2):
-            pattern_var = args[i]
-            expr = args[i + 1]
-            if not isinstance(pattern_var, Var):
-                raise TypeError(f"@case pattern must be a Var, got {type(pattern_var).__name__}")
-            alts[pattern_var.name] = ([], expr)
-        return Case(scrutinee, alts)
-
-    # ============================================================
-    # AST Inspection Primitives
-    # ============================================================
-
-    elif name == "@type":
-        # @type(expr) - return the AST node type as a Var
-        if len(args) != 1:
-            raise TypeError(f"@type expects 1 argument, got {len(args)}")
-        expr = args[0]
-        # Return the class name as a Var
-        type_name = type(expr).__name__
-        return Var(type_name)
-
-    elif name == "@is_record":
-        # @is_record(expr) - check if expr is Record
-        if len(args) != 1:
-            raise TypeError(f"@is_record expects 1 argument, got {len(args)}")
-        expr = args[0]
-        if isinstance(expr, Record):
-            return Var("@true")
-        else:
-            return Var("@false")
+        _comptime_builtins[name] = call
+        return fn
 
-    elif name == "@record_fields":
-        # @record_fields(record) - get list of field values (just values, not pairs) as cons/nil
-        if len(args) != 1:
-            raise TypeError(f"@record_fields expects 1 argument, got {len(args)}")
-        record_expr = args[0]
+    return register
 
-        # Return empty list if not a Record (allows graceful handling in macros)
-        if not isinstance(record_expr, Record):
-            return Var("nil")
 
-        # Extract indexed fields (_0, _1, _2, ...) and sort by index
-        indexed_fields = []
-        for field_name, field_expr in record_expr.fields.items():
-            if field_name.startswith("_") and field_name[1:].isdigit():
-                idx = int(field_name[1:])
-                indexed_fields.append((idx, field_expr))
+@_builtin("repeat_expr", 2)
+def _repeat_expr(n_ast: Exp, body_ast: Exp) -> Exp:
+    # repeat_expr(n, body) - generate n copies of body
+    # Evaluate n to get the count
+    count = comptime_memo.evaluate("int", n_ast, value_to_int)
 
-        indexed_fields.sort(key=lambda x: x[0])
+    if count < 0:
+        raise ValueError(f"repeat_expr count must be non-negative, got {count}")
 
-        # Build cons/nil list of field values
-        result = Var("nil")
-        for _, field_expr in reversed(indexed_fields):
-            # cons(field_expr, result)
-            result = App(App(Var("cons"), field_expr), result)
+    # Generate count copies of body
+    if count == 0:
+        # Empty sequence - return zero as a placeholder
+        return Var("@zero")
+    elif count == 1:
+        return body_ast
+    else:
+        # Build a Seq with count copies
+        return Seq([body_ast] * count)
+
+
+@_builtin("seq_cons", 2)
+def _seq_cons(expr_ast: Exp, rest_ast: Exp) -> Exp:
+    # seq_cons(expr, rest) - prepend expr to a sequence
+    # If rest is a Seq, prepend to it
+    if isinstance(rest_ast, Seq):
+        return Seq([expr_ast] + rest_ast.exprs)
+    elif isinstance(rest_ast, Var) and rest_ast.name == "()":
+        # Empty sequence - just return expr
+        return expr_ast
+    else:
+        # Make a 2-element sequence
+        return Seq([expr_ast, rest_ast])
 
-        return result
 
-    # ============================================================
-    # Data Manipulation Primitives
-    # ============================================================
-
-    elif name == "@concat":
-        # @concat(var1, var2) - concatenate two variable names
-        if len(args) != 2:
-            raise TypeError(f"@concat expects 2 arguments, got {len(args)}")
-        var1, var2 = args
-        if isinstance(var1, Var) and isinstance(var2, Var):
-            # Concatenate the names
-            return Var(var1.name + var2.name)
-        else:
-            raise TypeError(f"@concat expects Var arguments, got {type(var1).__name__} and {type(var2).__name__}")
-
-    elif name == "@to_string":
-        # @to_string(nat) - convert nat to string representation (as Var)
-        if len(args) != 1:
-            raise TypeError(f"@to_string expects 1 argument, got {len(args)}")
-        nat_expr = args[0]
-
-        # Evaluate the nat to get its value
-        from auric.evaluator import eval_exp, Heap
-        env = make_comptime_env()
-        result = eval_exp(nat_expr, env)
-        count = value_to_int(result.data)
-        Heap.drop(result)
-
-        # Return as Var with the number as a string
-        return Var(str(count))
-
-    elif name == "@fold_right":
-        # @fold_right(list, init, fn) - right fold over list
-        if len(args) != 3:
-            raise TypeError(f"@fold_right expects 3 arguments, got {len(args)}")
-        list_expr, init_expr, fn_expr = args
-
-        # Convert cons/nil list to Python list
-        elements = list_to_python(list_expr)
-
-        # Fold from right to left
-        acc = init_expr
-        for elem in reversed(elements):
-            # Apply fn to elem and acc: fn(elem)(acc)
-            acc = App(App(fn_expr, elem), acc)
-
-        return acc
-
-    elif name == "@map":
-        # @map(list, fn) - map function over list
-        if len(args) != 2:
-            raise TypeError(f"@map expects 2 arguments, got {len(args)}")
-        list_expr, fn_expr = args
-
-        # Convert cons/nil list to Python list
-        elements = list_to_python(list_expr)
-
-        # Map fn over each element
-        mapped = []
-        for elem in elements:
-            # Apply fn to elem: fn(elem)
-            mapped.append(App(fn_expr, elem))
-
-        # Convert back to cons/nil list
-        result = Var("nil")
-        for elem in reversed(mapped):
-            result = App(App(Var("cons"), elem), result)
+# ============================================================
+# AST Construction Primitives
+# ============================================================
 
-        return result
 
-    elif name == "@list":
-        # @list(elem1, elem2, ...) - create cons/nil list from elements
-        # Build cons/nil list from arguments
-        result = Var("nil")
-        for elem in reversed(args):
-            result = App(App(Var("cons"), elem), result)
-        return result
+@_builtin("@var", 1)
+def _var(name_var: Exp) -> Exp:
+    # @var(name_var) - create Var node using the name from name_var
+    if isinstance(name_var, Var):
+        # Create new Var with this name
+        return Var(name_var.name)
+    raise TypeError(f"@var expects Var argument, got {type(name_var).__name__}")
+
 
+@_builtin("@app", 2)
+def _app(fn_expr: Exp, arg_expr: Exp) -> Exp:
+    # @app(fn, arg) - create App node
+    return App(fn_expr, [arg_expr])
+
+
+@_builtin("@lam", 2)
+def _lam(param_var: Exp, body_expr: Exp) -> Exp:
+    # @lam(param_name_var, body) - create Lam node
+    if isinstance(param_var, Var):
+        return Lam([param_var.name], body_expr)
+    raise TypeError(f"@lam expects Var as first argument, got {type(param_var).__name__}")
+
+
+@_builtin("@field_access", 2)
+def _field_access(record_expr: Exp, field_var: Exp) -> Exp:
+    # @field_access(record, field_name_var) - create FieldAccess node
+    if isinstance(field_var, Var):
+        return FieldAccess(record_expr, field_var.name)
+    raise TypeError(f"@field_access expects Var as second argument, got {type(field_var).__name__}")
+
+
+@_builtin("@seq", 1)
+def _seq(list_expr: Exp) -> Exp:
+    # @seq(list) - create Seq node from list of expressions
+    exprs = list_to_python(list_expr)
+    if len(exprs) == 0:
+        return Var("@zero")  # Empty sequence
+    elif len(exprs) == 1:
+        return exprs[0]
     else:
-        raise ValueError(f"Unknown compile-time builtin: {name}")
+        return Seq(exprs)
 
 
-def list_to_python(list_expr: Exp) -> List[Exp]:
-    """Convert a cons/nil list AST to a Python list of expressions."""
-    elements = []
-    current = list_expr
+@_builtin("@macro_invocation", 2)
+def _macro_invocation(name_var: Exp, args_list: Exp) -> Exp:
+    # @macro_invocation(name_var, args_list) - create MacroInvocation node
+    if not isinstance(name_var, Var):
+        raise TypeError(f"@macro_invocation expects Var as first argument, got {type(name_var).__name__}")
+    return MacroInvocation(name_var.name, list_to_python(args_list))
 
-    while True:
-        if isinstance(current, Var) and current.name == "nil":
-            # End of list
-            break
-        elif isinstance(current, App):
-            # Check if this is cons(elem, rest) in multi-arg form
-            if isinstance(current.fn, Var) and current.fn.name == "cons":
-                # Extract element and rest from multi-arg cons
-                if len(current.args) == 2:
-                    elem = current.args[0]
-                    rest = current.args[1]
-                    elements.append(elem)
-                    current = rest
-                    continue
-
-            # Not a cons list - bail out
-            raise TypeError(f"Expected cons/nil list, got {type(current).__name__}")
-        else:
-            raise TypeError(f"Expected cons/nil list, got {type(current).__name__}")
 
-    return elements
+@_builtin("@case")
+def _case(*args: Exp) -> Exp:
+    # @case(scrutinee, pat1, expr1, pat2, expr2, ...) - create Case node
+    # Takes scrutinee followed by alternating pattern names (as Vars) and branch expressions
+    # Bindings are assumed to be empty for all patterns
+    if len(args) < 3 or len(args) % 2 != 1:
+        raise TypeError(f"@case expects odd number of arguments (scrutinee + pairs of pattern/expr), got {len(args)}")
+    scrutinee = args[0]
+    alts = {}
+    # Process pairs of (pattern, expr)
+    for i in range(1, len(args), 2):
+        pattern_var = args[i]
+        expr = args[i + 1]
+        if not isinstance(pattern_var, Var):
+            raise TypeError(f"@case pattern must be a Var, got {type(pattern_var).__name__}")
+        alts[pattern_var.name] = ([], expr)
+    return Case(scrutinee, alts)
 
 
-def value_to_int(val: Any) -> int:
-    """Convert a runtime value to an integer."""
-    # Handle Peano numerals
-    if val == "@zero" or (isinstance(val, tuple) and val[0] == "@zero"):
-        return 0
-    if val == "zero" or (isinstance(val, tuple) and val[0] == "zero"):
-        return 0
-    if isinstance(val, tuple) and len(val) >= 2:
-        tag = val[0]
-        if tag == "@succ" or tag == "succ":
-            # Recursive succ
-            return 1 + value_to_int(val[1])
-        if tag == "int":
-            # Integer literal
-            return val[1]
+# ============================================================
+# AST Inspection Primitives
+# ============================================================
 
-    # Handle direct integers
-    if isinstance(val, int):
-        return val
 
-    raise TypeError(f"Cannot convert value to int: {val}")
+@_builtin("@type", 1)
+def _type(expr: Exp) -> Exp:
+    # @type(expr) - return the AST node type (class name) as a Var
+    return Var(type(expr).__name__)
 
 
-def try_match_pattern(scr: Exp, alts: Dict[str, tuple[List[str], Exp]],
-                      ast_env: Dict[str, Exp], macros: Dict[str, MacroDef]) -> Exp | None:
-    """Try to match scrutinee against patterns at compile-time.
+@_builtin("@is_record", 1)
+def _is_record(expr: Exp) -> Exp:
+    # @is_record(expr) - check if expr is Record
+    return Var("@true") if isinstance(expr, Record) else Var("@false")
+
+
+@_builtin("@record_fields", 1)
+def _record_fields(record_expr: Exp) -> Exp:
+    # @record_fields(record) - get list of field values (just values, not pairs) as cons/nil
+    # Return empty list if not a Record (allows graceful handling in macros)
+    if not isinstance(record_expr, Record):
+        return Var("nil")
+
+    # Extract indexed fields (_0, _1, _2, ...) and sort by index
+    indexed_fields = []
+    for field_name, field_expr in record_expr.fields.items():
+        if field_name.startswith("_") and field_name[1:].isdigit():
+            indexed_fields.append((int(field_name[1:]), field_expr))
+    indexed_fields.sort(key=lambda x: x[0])
+
+    return python_to_list([field_expr for _, field_expr in indexed_fields])
+
+
+# ============================================================
+# AST Destructuring Primitives
+# ============================================================
+# A multi-argument application or lambda is taken apart one argument or
+# parameter at a time: f(a, b) is @app(f(a), b) and (x, y) => b is
+# @lam(x, (y) => b), so @app_fn/@app_arg and @lam_param/@lam_body invert
+# @app and @lam.
+
+
+def _expect(name: str, node_type: type, expr: Exp) -> None:
+    if not isinstance(expr, node_type):
+        raise TypeError(f"{name} expects {node_type.__name__}, got {type(expr).__name__}")
+
+
+@_builtin("@app_fn", 1)
+def _app_fn(app: Exp) -> Exp:
+    # @app_fn(f(a, b)) - the application without its last argument: f(a)
+    _expect("@app_fn", App, app)
+    return app.fn if len(app.args) == 1 else App(app.fn, app.args[:-1])
+
+
+@_builtin("@app_arg", 1)
+def _app_arg(app: Exp) -> Exp:
+    # @app_arg(f(a, b)) - the last argument: b
+    _expect("@app_arg", App, app)
+    return app.args[-1]
+
+
+@_builtin("@lam_param", 1)
+def _lam_param(lam: Exp) -> Exp:
+    # @lam_param((x, y) => b) - the first parameter as a Var: x
+    _expect("@lam_param", Lam, lam)
+    return Var(lam.params[0])
+
+
+@_builtin("@lam_body", 1)
+def _lam_body(lam: Exp) -> Exp:
+    # @lam_body((x, y) => b) - the body after the first parameter: (y) => b
+    _expect("@lam_body", Lam, lam)
+    return lam.body if len(lam.params) == 1 else Lam(lam.params[1:], lam.body)
 
-    Returns the evaluated branch if we can match, None otherwise.
-    """
 
-    # Extract the constructor tag from scrutinee
-    tag = None
-    bound_values = []
+@_builtin("@var_name", 1)
+def _var_name(var: Exp) -> Exp:
+    # @var_name(x) - the name of a Var, as a Var (names are Vars, as for @concat)
+    _expect("@var_name", Var, var)
+    return var
 
-    if isinstance(scr, Var):
-        # Simple constructor: zero, true, false
-        tag = scr.name
-        bound_values = []
-    elif isinstance(scr, App):
-        # Constructor application: succ(n), Cons(h, t)
-        # Extract tag and arguments
-        tag, bound_values = extract_constructor(scr)
 
-    if tag is None:
-        # Can't match at compile-time
-        return None
+@_builtin("@case_scrutinee", 1)
+def _case_scrutinee(case: Exp) -> Exp:
+    # @case_scrutinee(case) - the scrutinee of a Case node
+    _expect("@case_scrutinee", Case, case)
+    return case.scr
 
-    # Look for matching alternative
-    if tag not in alts:
-        return None
 
-    binds, rhs = alts[tag]
+@_builtin("@case_alts", 1)
+def _case_alts(case: Exp) -> Exp:
+    # @case_alts(case) - the alternatives as a cons/nil list of pattern Vars
+    # and branches, alternating as in the arguments of @case
+    _expect("@case_alts", Case, case)
+    items = []
+    for tag, (_, rhs) in case.alts.items():
+        items.append(Var(tag))
+        items.append(rhs)
+    return python_to_list(items)
 
-    # Check that we have the right number of bound values
-    if len(binds) != len(bound_values):
-        return None
 
-    # Create new environment with pattern bindings
-    new_env = {**ast_env}
-    for bind_name, bind_value in zip(binds, bound_values):
-        new_env[bind_name] = bind_value
+# ============================================================
+# Data Manipulation Primitives
+# ============================================================
 
-    # Evaluate the right-hand side with the new bindings
-    return eval_comptime(rhs, new_env, macros, depth + 1)
+
+@_builtin("@concat", 2)
+def _concat(var1: Exp, var2: Exp) -> Exp:
+    # @concat(var1, var2) - concatenate two variable names
+    if isinstance(var1, Var) and isinstance(var2, Var):
+        return Var(var1.name + var2.name)
+    raise TypeError(f"@concat expects Var arguments, got {type(var1).__name__} and {type(var2).__name__}")
+
+
+@_builtin("@to_string", 1)
+def _to_string(nat_expr: Exp) -> Exp:
+    # @to_string(nat) - convert nat to string representation (as Var)
+    count = comptime_memo.evaluate("int", nat_expr, value_to_int)
+    return Var(str(count))
+
+
+@_builtin("@fold_right", 3)
+def _fold_right(list_expr: Exp, init_expr: Exp, fn_expr: Exp) -> Exp:
+    # @fold_right(list, init, fn) - right fold over list: fn(x1, fn(x2, ... init))
+    acc = init_expr
+    for elem in reversed(list_to_python(list_expr)):
+        acc = App(fn_expr, [elem, acc])
+    return acc
+
+
+@_builtin("@map", 2)
+def _map(list_expr: Exp, fn_expr: Exp) -> Exp:
+    # @map(list, fn) - map function over list
+    return python_to_list([App(fn_expr, [elem]) for elem in list_to_python(list_expr)])
+
+
+@_builtin("@list")
+def _list(*elems: Exp) -> Exp:
+    # @list(elem1, elem2, ...) - create cons/nil list from elements
+    return python_to_list(elems)
+
+
+def list_to_python(list_expr: Exp) -> List[Exp]:
+    """Convert a cons/nil list AST to a Python list of expressions.
+
+    Accepts cons applied to both arguments at once, cons(x, rest), or one
+    at a time, cons(x)(rest).
+    """
+    elements = []
+    current = list_expr
+
+    while not (isinstance(current, Var) and current.name == "nil"):
+        if isinstance(current, App):
+            fn, args = collect_app_chain(current)
+            if isinstance(fn, Var) and fn.name == "cons" and len(args) == 2:
+                elements.append(args[0])
+                current = args[1]
+                continue
+        # Not a cons list - bail out
+        raise TypeError(f"Expected cons/nil list, got {type(current).__name__}")
+
+    return elements
+
+
+def python_to_list(elements: Sequence[Exp]) -> Exp:
+    """Build the cons/nil list AST of `elements`, the inverse of list_to_python."""
+    result = Var("nil")
+    cons = Var("cons")
+    for elem in reversed(elements):
+        result = App(cons, [elem, result])
+    return result
+
+
+def value_to_int(val: Any) -> int:
+    """Convert a runtime value to an integer."""
+    # Handle Peano numerals, compact or as @succ chains
+    n = nat_value(val)
+    if n is not None:
+        return n
+
+    count = 0
+    current = val
+    while True:
+        if isinstance(current, RefValue):
+            current = current.data
+        if current == "zero" or (isinstance(current, tuple) and current and current[0] == "zero"):
+            return count
+        if isinstance(current, tuple) and len(current) >= 2:
+            tag = current[0]
+            if tag == "succ":
+                count += 1
+                current = current[1]
+                continue
+            if tag == "int":
+                # Integer literal
+                return count + current[1]
+
+        # Handle direct integers
+        if isinstance(current, int):
+            return count + current
+
+        raise TypeError(f"Cannot convert value to int: {val}")
 
 
 def extract_constructor(e: Exp) -> tuple[str | None, List[Exp]]:
@@ -747,6 +925,7 @@ def extract_constructor(e: Exp) -> tuple[str | None, List[Exp]]:
         zero -> ("zero", [])
         succ(zero) -> ("succ", [zero])
         succ(succ(x)) -> ("succ", [succ(x)])
+        3 : @Nat -> ("@succ", [2 : @Nat])
     """
     if isinstance(e, Var):
         return (e.name, [])
@@ -758,6 +937,11 @@ def extract_constructor(e: Exp) -> tuple[str | None, List[Exp]]:
             # With multi-arg, all arguments are in the args list
             return (e.fn.name, e.args)
 
+    n = nat_literal_value(e)
+    if n is not None:
+        # Natural number literal: one @succ layer over its predecessor
+        return ("@zero", []) if n == 0 else ("@succ", [nat_literal(n - 1)])
+
     return (None, [])
 
 
@@ -774,62 +958,33 @@ def needs_evaluation(e: Exp, ast_env: Dict[str, Exp]) -> bool:
     return False
 
 
-def evaluate_to_bool(e: Exp, ast_env: Dict[str, Exp]) -> bool:
-    """Evaluate an AST expression to a boolean value at compile-time."""
-    from auric.evaluator import eval_exp, Heap
-
-    # Create environment with basic constructors
-    env = make_comptime_env()
+def _data_to_bool(data: Any) -> bool:
+    """Whether a runtime value is a true boolean constructor."""
+    if isinstance(data, tuple) and len(data) > 0:
+        tag = data[0]
+        return tag == "@true" or tag == "true"
+    elif isinstance(data, str):
+        return data == "@true" or data == "true"
+    raise TypeError(f"Expected boolean at compile-time, got {data}")
 
-    # Evaluate the AST
-    result = eval_exp(e, env)
 
-    # Check if it's a boolean constructor
-    if isinstance(result.data, tuple) and len(result.data) > 0:
-        tag = result.data[0]
-        Heap.drop(result)
-        return tag == "@true" or tag == "true"
-    elif isinstance(result.data, str):
-        is_true = result.data == "@true" or result.data == "true"
-        Heap.drop(result)
-        return is_true
-    else:
-        Heap.drop(result)
-        raise TypeError(f"Expected boolean at compile-time, got {result.data}")
+def evaluate_to_bool(e: Exp, ast_env: Dict[str, Exp]) -> bool:
+    """Evaluate an AST expression to a boolean value at compile-time."""
+    return comptime_memo.evaluate("bool", e, _data_to_bool)
 
 
 def evaluate_ast_to_ast(ast: Exp) -> Exp:
     """Evaluate an AST expression at compile-time and convert result back to AST."""
-    from auric.evaluator import eval_exp, Heap
-
-    # Create environment with basic constructors
-    env = make_comptime_env()
+    return comptime_memo.evaluate("ast", ast, value_to_ast)
 
-    # Evaluate the AST
-    result = eval_exp(ast, env)
-
-    # Convert the result back to AST
-    ast_result = value_to_ast(result.data)
-
-    # Clean up
-    Heap.drop(result)
-
-    return ast_result
-
-
-def make_comptime_env():
-    """Create a compile-time environment with basic constructors."""
-    from auric.evaluator import Heap
 
+def _comptime_prelude() -> Dict[str, RefValue]:
+    """Basic constructors available to compile-time evaluation."""
     env = {}
 
-    # @zero constructor
-    env["@zero"] = Heap.alloc(("@zero",))
-
-    # @succ constructor
-    def succ_fn(n):
-        return Heap.alloc(("@succ", n))
-    env["@succ"] = Heap.alloc(succ_fn)
+    # @zero/@succ constructors build compact naturals
+    env["@zero"] = Heap.alloc(Nat(0))
+    env["@succ"] = Heap.alloc(nat_succ)
 
     # @true/@false constructors
     env["@true"] = Heap.alloc(("@true",))
@@ -850,8 +1005,71 @@ def make_comptime_env():
     return env
 
 
+# Shared by every compile-time evaluation. eval_exp never writes to its
+# environment, so one read-only prelude serves all of them.
+COMPTIME_PRELUDE: Mapping[str, RefValue] = MappingProxyType(_comptime_prelude())
+
+
+def make_comptime_env() -> Mapping[str, RefValue]:
+    """The compile-time environment with basic constructors (shared, read-only)."""
+    return COMPTIME_PRELUDE
+
+
+class ComptimeMemo:
+    """Results of compile-time evaluation, keyed by the evaluated AST.
+
+    AST nodes are hash-consed, so structurally equal expressions are the
+    same key, and evaluation in the prelude is pure: a condition or count
+    repeated across macro invocations is evaluated once per build.
+    """
+
+    def __init__(self):
+        self.results: Dict[tuple[str, Exp], Any] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def evaluate(self, kind: str, e: Exp, convert: Callable[[Any], Any]) -> Any:
+        """convert(value of e), where `kind` names the conversion."""
+        key = (kind, e)
+        try:
+            value = self.results[key]
+        except KeyError:
+            pass
+        else:
+            self.hits += 1
+            return value
+
+        from auric.evaluator import eval_exp
+
+        self.misses += 1
+        result = eval_exp(e, COMPTIME_PRELUDE)
+        try:
+            value = convert(result.data)
+        finally:
+            Heap.drop(result)
+        self.results[key] = value
+        return value
+
+    def clear(self) -> None:
+        self.results.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.results)}
+
+
+comptime_memo = ComptimeMemo()
+
+
 def value_to_ast(val: Any) -> Exp:
     """Convert a runtime value back to AST representation."""
+    if isinstance(val, RefValue):
+        val = val.data
+
+    # Natural numbers become a single literal
+    if isinstance(val, Nat):
+        return nat_literal(val.n)
 
     # Tuple with tag (constructor application)
     if isinstance(val, tuple) and len(val) > 0:
@@ -867,9 +1085,12 @@ def value_to_ast(val: Any) -> Exp:
         if tag == "@zero" or tag == "zero":
             return Var("@zero")
         if tag == "@succ" or tag == "succ":
-            # @succ(n)
+            n = nat_value(val)
+            if n is not None:
+                return nat_literal(n)
+            # @succ(n) of something other than a natural number
             inner = value_to_ast(val[1]) if len(val) > 1 else Var("@zero")
-            return App(Var("@succ"), inner)
+            return App(Var("@succ"), [inner])
 
         # Integer literal
         if tag == "int":
@@ -919,15 +1140,11 @@ def expand_macro_invocation(macro: MacroDef, args: List[Exp], macros: Dict[str,
 
     # Evaluate the macro body at compile-time (comptime mode)
     # This allows the macro to execute code, evaluate conditions, etc.
-    result = eval_comptime(macro.body, ast_env, macros, 0)
-
-    # If the result is a MacroInvocation, return it as-is (it will be expanded in the next pass)
-    # This handles cases like @for macro that defers expansion via @macro_invocation
-    if isinstance(result, MacroInvocation):
-        return result
-
-    # Expand any macros in the result
-    return expand_expr(result, macros)
+    def run() -> Exp:
+        start = _fuel.left
+        result = _execute(compile_macro(macro, macros), ast_env, macros, macro.name)
+        return _finish(macro.name, result, macros, start - _fuel.left)
+    return _with_fuel(run)
 
 
 def substitute(e: Exp, subst: Dict[str, Exp]) -> Exp:
@@ -937,65 +1154,37 @@ def substitute(e: Exp, subst: Dict[str, Exp]) -> Exp:
     - References to macro parameters are replaced with their argument ASTs
     - Everything else is left as-is (it constructs AST)
     """
+    return _substituter.visit(e, subst)
 
-    if isinstance(e, Var):
-        if e.name in subst:
-            # This is a macro parameter - substitute it
-            return subst[e.name]
-        return e
 
-    if isinstance(e, Lam):
-        # Don't substitute bound variables (shadow any params in subst)
-        params_in_subst = [p for p in e.params if p in subst]
-        if params_in_subst:
-            # Shadow the substitutions for bound parameters
-            new_subst = {k: v for k, v in subst.items() if k not in e.params}
-            return Lam(e.params, substitute(e.body, new_subst))
-        return Lam(e.params, substitute(e.body, subst))
+class _Substituter(Rewriter):
+    """substitute: replaces free variables, respecting binders."""
 
-    if isinstance(e, App):
-        return App(substitute(e.fn, subst), [substitute(arg, subst) for arg in e.args])
-
-    if isinstance(e, TyAbs):
-        return TyAbs(e.tv, substitute(e.body, subst))
-
-    if isinstance(e, TyAppE):
-        return TyAppE(substitute(e.fn, subst), e.arg_ty)
-
-    if isinstance(e, Case):
-        # Handle bound variables in patterns
-        new_alts = {}
-        for tag, (binds, rhs) in e.alts.items():
-            # Remove bound variables from substitution (they shadow macro params)
-            new_subst = {k: v for k, v in subst.items() if k not in binds}
-            new_alts[tag] = (binds, substitute(rhs, new_subst))
-        return Case(substitute(e.scr, subst), new_alts)
-
-    if isinstance(e, Perform):
-        return Perform(e.effect_name, substitute(e.args, subst))
-
-    if isinstance(e, Handle):
-        return Handle(
-            substitute(e.body, subst),
-            {eff: (binds, substitute(handler, subst))
-             for eff, (binds, handler) in e.handlers.items()}
-        )
-
-    if isinstance(e, Record):
-        return Record({name: substitute(val, subst) for name, val in e.fields.items()})
-
-    if isinstance(e, FieldAccess):
-        return FieldAccess(substitute(e.record, subst), e.field)
+    @handles(Var)
+    def var(self, e: Var, subst: Dict[str, Exp]) -> Exp:
+        # A macro parameter is replaced by its argument
+        return subst.get(e.name, e)
 
-    if isinstance(e, If):
-        return If(
-            substitute(e.cond, subst),
-            substitute(e.then_branch, subst),
-            substitute(e.else_branch, subst)
-        )
+    @handles(Lam)
+    def lam(self, e: Lam, subst: Dict[str, Exp]) -> Exp:
+        # Don't substitute bound variables (shadow any params in subst)
+        if any(p in subst for p in e.params):
+            subst = {k: v for k, v in subst.items() if k not in e.params}
+        return self.rewrite_lam(e, subst)
+
+    @handles(Case)
+    def case(self, e: Case, subst: Dict[str, Exp]) -> Exp:
+        # Remove bound variables from substitution (they shadow macro params)
+        rhss = [self.visit(rhs, {k: v for k, v in subst.items() if k not in binds})
+                for binds, rhs in e.alts.values()]
+        return self.rebuild_case(e, self.visit(e.scr, subst), rhss)
+
+    @handles(Let)
+    def let(self, e: Let, subst: Dict[str, Exp]) -> Exp:
+        # The name is bound in both the (recursive) value and the body
+        if e.name in subst:
+            subst = {k: v for k, v in subst.items() if k != e.name}
+        return self.rewrite_let(e, subst)
 
-    if isinstance(e, Seq):
-        return Seq([substitute(expr, subst) for expr in e.exprs])
 
-    # Base cases: literals, etc.
-    return e
+_substituter = _Substituter()
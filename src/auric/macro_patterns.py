@@ -10,7 +10,7 @@ Patterns can contain:
 
 from dataclasses import dataclass
 from typing import Dict, List, Optional, Tuple
-from auric.token_tree import TokenTree, TTToken, TTGroup, TTSequence
+from auric.token_tree import TokenTree, TTToken, TTGroup, TTSequence, TTSlice
 
 
 @dataclass
@@ -141,173 +141,195 @@ def parse_pattern(tt: TokenTree) -> List[PatternElement]:
         return [tt]
 
 
-def match_pattern(pattern: List[PatternElement],
-                  tt: TokenTree) -> Optional[Dict[str, TokenTree]]:
-    """Try to match a pattern against a token tree.
-
-    Args:
-        pattern: List of pattern elements (from parse_pattern)
-        tt: Token tree to match against
+# Operation codes of a compiled pattern
+_LITERAL, _VAR, _BLOCK, _SPREAD, _REPEAT, _OTHER = range(6)
 
-    Returns:
-        Dict mapping variable names to captured token trees, or None if no match
-    """
-    # Convert token tree to flat list for matching
-    if isinstance(tt, TTSequence):
-        tokens = tt.items
-    else:
-        tokens = [tt]
 
-    captures: Dict[str, TokenTree] = {}
-    token_idx = 0
-    pattern_idx = 0
+class PatternMatcher:
+    """A pattern compiled once into a flat list of operations.
 
-    while pattern_idx < len(pattern) and token_idx < len(tokens):
-        pat_elem = pattern[pattern_idx]
+    `match` checks a whole range of token tree items, exactly like matching a
+    sequence of those items. `match_prefix` finds, in one forward pass, the
+    shortest range starting at a position that `match` would accept.
+    """
 
-        if isinstance(pat_elem, TTToken):
-            # Literal token - must match exactly
-            tok = tokens[token_idx]
-            if isinstance(tok, TTToken) and tok.value == pat_elem.value:
-                token_idx += 1
-                pattern_idx += 1
+    __slots__ = ("ops", "leading")
+
+    def __init__(self, pattern: List[PatternElement]):
+        ops = []
+        for idx, elem in enumerate(pattern):
+            nxt = pattern[idx + 1] if idx + 1 < len(pattern) else None
+            # What ends a spread or repetition: the next literal, or the next $block
+            stop_literal = nxt.value if isinstance(nxt, TTToken) else None
+            stop_block = isinstance(nxt, PatternVar) and nxt.kind == 'block'
+            last = nxt is None
+            if isinstance(elem, TTToken):
+                ops.append((_LITERAL, elem.value, None, None, False, last))
+            elif isinstance(elem, PatternVar):
+                ops.append((_BLOCK if elem.kind == 'block' else _VAR, None, elem.name, None, False, last))
+            elif isinstance(elem, PatternSpread):
+                # A spread followed by anything else captures one token
+                complex_next = not last and stop_literal is None and not stop_block
+                ops.append((_SPREAD, complex_next, elem.name, stop_literal, stop_block, last))
+            elif isinstance(elem, PatternRepeat):
+                ops.append((_REPEAT, elem, elem.name, stop_literal, stop_block, last))
             else:
-                return None  # No match
+                ops.append((_OTHER, elem, None, None, False, last))
+        self.ops = ops
+        # Literal every match must start with, for indexing rules
+        self.leading = pattern[0].value if pattern and isinstance(pattern[0], TTToken) else None
+
+    def match(self, items: List[TokenTree], start: int = 0,
+              end: Optional[int] = None) -> Optional[Dict[str, TokenTree]]:
+        """Captures if the pattern matches exactly items[start:end], else None."""
+        limit = len(items) if end is None else end
+        if self._run(items, start, limit, False, None) is None:
+            return None
+        captures: Dict[str, TokenTree] = {}
+        self._run(items, start, limit, False, captures)
+        return captures
 
-        elif isinstance(pat_elem, PatternVar):
-            # Capture a single token/group
-            if pat_elem.kind == 'block':
+    def match_end(self, items: List[TokenTree], start: int) -> Optional[int]:
+        """Smallest end where match(items, start, end) succeeds, without capturing."""
+        return self._run(items, start, len(items), True, None)
+
+    def match_prefix(self, items: List[TokenTree],
+                     start: int) -> Optional[Tuple[int, Dict[str, TokenTree]]]:
+        """(end, captures) for the smallest end where match(items, start, end) succeeds."""
+        end = self._run(items, start, len(items), True, None)
+        if end is None:
+            return None
+        captures: Dict[str, TokenTree] = {}
+        self._run(items, start, len(items), True, captures)
+        return end, captures
+
+    def _run(self, items, t, limit, shortest, captures):
+        """End of the match, or None. Captures are recorded only when a dict is
+        given, as TTSlice views into `items`; a failed attempt allocates nothing."""
+        ops = self.ops
+        n_ops = len(ops)
+        p = 0
+        t_last = t
+        while p < n_ops and t < limit:
+            op, arg, name, stop_literal, stop_block, last = ops[p]
+            tok = items[t]
+            t_last = t
+
+            if op == _LITERAL:
+                # Literal token - must match exactly
+                if not (isinstance(tok, TTToken) and tok.value == arg):
+                    return None
+                t += 1
+                p += 1
+
+            elif op == _BLOCK:
                 # Must be a {...} group
-                tok = tokens[token_idx]
-                if isinstance(tok, TTGroup) and tok.delim == '{':
-                    captures[pat_elem.name] = tok
-                    token_idx += 1
-                    pattern_idx += 1
-                else:
-                    return None  # No match
-            else:
-                # Capture identifier or expression
-                # For now, just capture one token
-                # TODO: Better expr matching
-                captures[pat_elem.name] = tokens[token_idx]
-                token_idx += 1
-                pattern_idx += 1
-
-        elif isinstance(pat_elem, PatternSpread):
-            # Spread pattern - first match literal '..' then capture remaining tokens
-            # First, match the literal '..' token
-            tok = tokens[token_idx]
-            if not (isinstance(tok, TTToken) and tok.value == '..'):
-                return None
-            token_idx += 1  # Consume the '..'
-
-            pattern_idx += 1
-
-            if pattern_idx >= len(pattern):
-                # No more pattern elements - capture rest
-                captures[pat_elem.name] = TTSequence(tokens[token_idx:])
-                token_idx = len(tokens)
-            else:
-                # Find where the next pattern element matches
-                next_pat = pattern[pattern_idx]
-                # Simple approach: capture tokens until we see the next literal
-                if isinstance(next_pat, TTToken):
-                    # Capture until we see this literal token
-                    captured = []
-                    while token_idx < len(tokens):
-                        tok = tokens[token_idx]
-                        if isinstance(tok, TTToken) and tok.value == next_pat.value:
-                            break
-                        captured.append(tok)
-                        token_idx += 1
-                    captures[pat_elem.name] = TTSequence(captured)
-                elif isinstance(next_pat, PatternVar) and next_pat.kind == 'block':
-                    # Capture until we see a {...} group
-                    captured = []
-                    while token_idx < len(tokens):
-                        tok = tokens[token_idx]
-                        if isinstance(tok, TTGroup) and tok.delim == '{':
-                            break
-                        captured.append(tok)
-                        token_idx += 1
-                    captures[pat_elem.name] = TTSequence(captured)
+                if not (isinstance(tok, TTGroup) and tok.delim == '{'):
+                    return None
+                if captures is not None:
+                    captures[name] = tok
+                t += 1
+                p += 1
+
+            elif op == _VAR:
+                # Capture a single token/group
+                if captures is not None:
+                    captures[name] = tok
+                t += 1
+                p += 1
+
+            elif op == _SPREAD:
+                # Match the literal '..', then capture tokens
+                if not (isinstance(tok, TTToken) and tok.value == '..'):
+                    return None
+                t += 1
+                p += 1
+                if last:
+                    # Capture the rest; the shortest match captures nothing
+                    end = t if shortest else limit
+                    if captures is not None:
+                        captures[name] = TTSlice(items, t, end)
+                    t = end
+                elif arg:
+                    if t >= limit:
+                        return None
+                    if captures is not None:
+                        captures[name] = items[t]
+                    t += 1
                 else:
-                    # More complex - for now, just capture one token
-                    captures[pat_elem.name] = tokens[token_idx]
-                    token_idx += 1
-
-        elif isinstance(pat_elem, PatternRepeat):
-            # Repetition pattern - match 0 or more, 1 or more, or 0-1
-            pattern_idx += 1  # Move to next pattern element first
-            matched_items = []
-
-            # Determine what comes next to know when to stop
-            next_pat = pattern[pattern_idx] if pattern_idx < len(pattern) else None
-
-            # Keep matching while we can
-            while token_idx < len(tokens):
-                # Check if we've hit the next pattern element
-                if next_pat:
-                    # Try to match the next pattern
-                    if isinstance(next_pat, TTToken):
-                        tok = tokens[token_idx]
-                        if isinstance(tok, TTToken) and tok.value == next_pat.value:
-                            # Next pattern matches, stop repeating
+                    # Capture until the next literal or {...} group
+                    s = t
+                    while t < limit:
+                        tok = items[t]
+                        if stop_literal is not None:
+                            if isinstance(tok, TTToken) and tok.value == stop_literal:
+                                break
+                        elif isinstance(tok, TTGroup) and tok.delim == '{':
                             break
-                    elif isinstance(next_pat, PatternVar) and next_pat.kind == 'block':
-                        tok = tokens[token_idx]
-                        if isinstance(tok, TTGroup) and tok.delim == '{':
-                            # Next pattern (block) matches, stop repeating
+                        t += 1
+                    if captures is not None:
+                        captures[name] = TTSlice(items, s, t)
+
+            elif op == _REPEAT:
+                # Repetition pattern - match 0 or more, 1 or more, or 0-1
+                p += 1
+                s = t
+                while t < limit:
+                    tok = items[t]
+                    # Stop where the next pattern element matches
+                    if stop_literal is not None and isinstance(tok, TTToken) and tok.value == stop_literal:
+                        break
+                    if stop_block and isinstance(tok, TTGroup) and tok.delim == '{':
+                        break
+                    if arg.kind == 'block':
+                        if not (isinstance(tok, TTGroup) and tok.delim == '{'):
                             break
+                    elif not isinstance(tok, TTToken):
+                        break
+                    t += 1
+                    # '?' takes at most one; the shortest trailing repetition takes one
+                    if arg.quantifier == '?' or (shortest and last):
+                        break
+
+                if arg.quantifier == '+' and t == s:
+                    return None
+                if captures is not None:
+                    # The repeated items are contiguous; one item is captured by itself
+                    captures[name] = items[s] if t - s == 1 else TTSlice(items, s, t)
 
-                # Try to match one item
-                tok = tokens[token_idx]
-                if pat_elem.kind == 'block':
-                    # Match blocks
-                    if isinstance(tok, TTGroup) and tok.delim == '{':
-                        matched_items.append(tok)
-                        token_idx += 1
-                    else:
-                        break  # Can't match more
-                else:
-                    # Match regular tokens
-                    if isinstance(tok, TTToken):
-                        matched_items.append(tok)
-                        token_idx += 1
-                    else:
-                        break  # Can't match more
-
-                # For '?' quantifier, stop after one match
-                if pat_elem.quantifier == '?' and len(matched_items) >= 1:
-                    break
-
-            # Check quantifier constraints
-            if pat_elem.quantifier == '+' and len(matched_items) < 1:
-                return None  # Need at least one match
-            elif pat_elem.quantifier == '?' and len(matched_items) > 1:
-                return None  # Can have at most one match
-
-            # Store captures as a sequence
-            if len(matched_items) == 0:
-                captures[pat_elem.name] = TTSequence([])
-            elif len(matched_items) == 1:
-                captures[pat_elem.name] = matched_items[0]
             else:
-                captures[pat_elem.name] = TTSequence(matched_items)
+                # Other token tree types
+                if tok != arg:
+                    return None
+                t += 1
+                p += 1
 
-        else:
-            # Other token tree types
-            if token_idx < len(tokens) and tokens[token_idx] == pat_elem:
-                token_idx += 1
-                pattern_idx += 1
-            else:
-                return None
+        if p < n_ops:
+            return None
+        if shortest:
+            # Every element must have started before the end
+            return t if t > t_last else None
+        return t if t == limit else None
 
-    # Check if we consumed all tokens and pattern
-    if pattern_idx == len(pattern) and token_idx == len(tokens):
-        return captures
-    else:
-        return None  # Didn't match completely
+
+def compile_pattern(pattern: List[PatternElement]) -> PatternMatcher:
+    """Compile a pattern (from parse_pattern) for repeated matching."""
+    return PatternMatcher(pattern)
+
+
+def match_pattern(pattern: List[PatternElement],
+                  tt: TokenTree) -> Optional[Dict[str, TokenTree]]:
+    """Try to match a pattern against a token tree.
+
+    Args:
+        pattern: List of pattern elements (from parse_pattern)
+        tt: Token tree to match against
+
+    Returns:
+        Dict mapping variable names to captured token trees, or None if no match
+    """
+    tokens = tt.items if isinstance(tt, TTSequence) else [tt]
+    return PatternMatcher(pattern).match(tokens)
 
 
 def substitute_captures(template: List[PatternElement],
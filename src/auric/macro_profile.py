@@ -0,0 +1,153 @@
+"""Opt-in profiling of macro expansion.
+
+Three macro systems run during compilation:
+
+- tt: token tree macros (`macro name => { pattern -> expansion; }`)
+- comptime: user `MacroDef`s evaluated at compile time
+- python: expanders registered with `register_macro`/`register_type_macro`
+  (`@when`, `@pipe`, `index`, `Vec`, ...)
+
+While a profiler is active each system records, per macro, how often it was
+tried, how often it expanded, the time spent and how much the program grew
+(tokens for tt macros, AST nodes for the others). Comptime macros also
+record the evaluation steps they used and their largest result, the two
+quantities limited by `macro_expander.comptime_budget`:
+
+    with profile_macros() as profiler:
+        run_pipeline()
+    for row in profiler.report():
+        print(row["system"], row["name"], row["seconds"])
+
+Times are inclusive: an expansion's time covers the expansion of the macros
+its output invokes. With no active profiler each hook costs one attribute lookup.
+"""
+
+from __future__ import annotations
+
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from auric.ast import ast_size
+from auric.token_tree import TTGroup, TTSequence, TTToken
+
+# The active profiler, if any; hooks check this before doing any work
+current: Optional["MacroProfiler"] = None
+
+clock = time.perf_counter
+
+
+@dataclass
+class MacroStats:
+    """Counters for one macro."""
+
+    system: str
+    name: str
+    attempts: int = 0  # times the macro was tried
+    expansions: int = 0  # times it produced output
+    cached: int = 0  # expansions answered from a cache
+    seconds: float = 0.0  # inclusive time in matching and expanding
+    steps: int = 0  # comptime evaluation steps, including nested macros
+    size_in: int = 0  # total size of the expanded invocations
+    size_out: int = 0  # total size of their expansions
+    max_output: int = 0  # largest comptime body result
+
+    @property
+    def growth(self) -> int:
+        return self.size_out - self.size_in
+
+
+class MacroProfiler:
+    """Per-macro statistics collected while active."""
+
+    def __init__(self):
+        self.stats: Dict[Tuple[str, str], MacroStats] = {}
+
+    def _entry(self, system: str, name: str) -> MacroStats:
+        entry = self.stats.get((system, name))
+        if entry is None:
+            entry = self.stats[(system, name)] = MacroStats(system, name)
+        return entry
+
+    def attempt(self, system: str, name: str, seconds: float) -> None:
+        """Record a match attempt, successful or not."""
+        entry = self._entry(system, name)
+        entry.attempts += 1
+        entry.seconds += seconds
+
+    def expansion(self, system: str, name: str, seconds: float,
+                  size_in: int, size_out: int, cached: bool = False) -> None:
+        """Record an expansion of an invocation of size_in into size_out."""
+        entry = self._entry(system, name)
+        entry.expansions += 1
+        entry.cached += cached
+        entry.seconds += seconds
+        entry.size_in += size_in
+        entry.size_out += size_out
+
+    def evaluation(self, system: str, name: str, steps: int, size_out: int) -> None:
+        """Record an evaluation of a macro body: the fuel it used and its result's size."""
+        entry = self._entry(system, name)
+        entry.steps += steps
+        entry.max_output = max(entry.max_output, size_out)
+
+    def report(self) -> List[dict]:
+        """Statistics per macro as dicts, most expensive first."""
+        rows = []
+        for entry in sorted(self.stats.values(), key=lambda e: e.seconds, reverse=True):
+            row = asdict(entry)
+            row["growth"] = entry.growth
+            rows.append(row)
+        return rows
+
+    def format_report(self) -> str:
+        """The report as a table."""
+        lines = [
+            f"{'system':<10}{'macro':<20}{'attempts':>10}{'expanded':>10}"
+            f"{'cached':>8}{'ms':>10}{'steps':>10}{'growth':>10}"
+        ]
+        for row in self.report():
+            lines.append(
+                f"{row['system']:<10}{row['name']:<20}{row['attempts']:>10}{row['expansions']:>10}"
+                f"{row['cached']:>8}{row['seconds'] * 1e3:>10.2f}{row['steps']:>10}{row['growth']:>+10}"
+            )
+        return "\n".join(lines)
+
+
+def enable(profiler: Optional[MacroProfiler] = None) -> MacroProfiler:
+    """Start recording into `profiler` (a new one by default) and return it."""
+    global current
+    current = profiler if profiler is not None else MacroProfiler()
+    return current
+
+
+def disable() -> None:
+    """Stop recording."""
+    global current
+    current = None
+
+
+@contextmanager
+def profile_macros(profiler: Optional[MacroProfiler] = None) -> Iterator[MacroProfiler]:
+    """Record macro statistics for the duration of the block."""
+    previous = current
+    active = enable(profiler)
+    try:
+        yield active
+    finally:
+        if previous is not None:
+            enable(previous)
+        else:
+            disable()
+
+
+def tt_size(tt: object) -> int:
+    """Number of tokens in a token tree, counting a group's delimiters."""
+    if isinstance(tt, TTToken):
+        return 1
+    if isinstance(tt, TTGroup):
+        return 2 + tt_size(tt.contents)
+    if isinstance(tt, TTSequence):
+        return sum(tt_size(item) for item in tt.items)
+    return 0
@@ -8,6 +8,7 @@ from __future__ import annotations
 
 from typing import Callable, Dict, List
 
+from auric import macro_profile
 from auric.ast import (
     App,
     Base,
@@ -16,22 +17,18 @@ from auric.ast import (
     DepApp,
     Exp,
     FieldAccess,
-    Handle,
-    If,
     Index,
     Lam,
-    Let,
     MacroInvocation,
-    Perform,
     Record,
     RecordT,
     Seq,
     ShapeT,
-    TyAbs,
-    TyAppE,
     Type,
     Var,
+    unchanged,
 )
+from auric.visitor import Rewriter, handles
 
 # Type for macro expanders: takes arguments, returns expanded expression
 MacroExpander = Callable[[List[Exp]], Exp]
@@ -64,6 +61,8 @@ def register_macro(name: str, expander: MacroExpander) -> None:
 def register_type_macro(name: str, expander: TypeMacroExpander) -> None:
     """Register a type-level macro expander."""
     _type_macros[name] = expander
+    # Cached expansions may have used the previous expander
+    type_expansions.clear()
 
 
 def expand_macros(e: Exp, const_defs: Dict[str, Exp] = None) -> Exp:
@@ -72,100 +71,82 @@ def expand_macros(e: Exp, const_defs: Dict[str, Exp] = None) -> Exp:
     This runs BEFORE type checking.
     const_defs: Optional dictionary of const name -> Record definitions for inlining
     """
-    if const_defs is None:
-        const_defs = {}
+    return _MacroExpander(const_defs if const_defs is not None else {}).visit(e)
+
+
+class _MacroExpander(Rewriter):
+    """expand_macros: expands invocations and rewrites everything else in place."""
+
+    def __init__(self, const_defs: Dict[str, Exp]):
+        self.const_defs = const_defs
 
     # Inline const record references for compile-time unrolling
-    if isinstance(e, Var) and e.name in const_defs:
-        const_val = const_defs[e.name]
+    @handles(Var)
+    def var(self, e: Var, ctx: None) -> Exp:
+        const_val = self.const_defs.get(e.name)
         # Only inline if it's a Record (for compile-time unrolling)
         if isinstance(const_val, Record):
             return const_val
+        return e
 
     # Expand macro invocations
-    if isinstance(e, MacroInvocation):
+    @handles(MacroInvocation)
+    def macro_invocation(self, e: MacroInvocation, ctx: None) -> Exp:
         if e.macro_name not in _macros:
             raise NameError(f"Unknown macro: {e.macro_name}")
 
         # Expand arguments first (inside-out expansion)
-        expanded_args = [expand_macros(arg, const_defs) for arg in e.args]
+        expanded_args = [self.visit(arg) for arg in e.args]
 
         # Apply macro expander
+        profiler = macro_profile.current
+        if profiler is not None:
+            start = macro_profile.clock()
         result = _macros[e.macro_name](expanded_args)
+        if profiler is not None:
+            profiler.attempt("python", e.macro_name, macro_profile.clock() - start)
 
         # Recursively expand result in case macro produces more macros
         # BUT: avoid infinite recursion if macro returns itself unchanged
         if isinstance(result, MacroInvocation) and result.macro_name == e.macro_name and result.args == expanded_args:
             # Macro couldn't expand - return as-is
             return result
-        return expand_macros(result, const_defs)
+        return _expand_result("python", e.macro_name, MacroInvocation(e.macro_name, expanded_args),
+                              result, self.const_defs)
+
+    @handles(App)
+    def app(self, e: App, ctx: None) -> Exp:
+        # Recognize App nodes as macro invocations if function is a registered macro
+        # This handles: @when(x, y) which parses as App(Var("@when"), [x, y])
+        if not (isinstance(e.fn, Var) and e.fn.name in _macros):
+            return self.rewrite_app(e, ctx)
 
-    # Recognize App nodes as macro invocations if function is a registered macro
-    # This handles: @when(x, y) which parses as App(Var("@when"), [x, y])
-    if isinstance(e, App) and isinstance(e.fn, Var) and e.fn.name in _macros:
         # Convert to macro invocation and expand
         macro_name = e.fn.name
-        expanded_args = [expand_macros(arg, const_defs) for arg in e.args]
+        expanded_args = [self.visit(arg) for arg in e.args]
 
         # Apply macro expander
+        profiler = macro_profile.current
+        if profiler is not None:
+            start = macro_profile.clock()
         result = _macros[macro_name](expanded_args)
+        if profiler is not None:
+            profiler.attempt("python", macro_name, macro_profile.clock() - start)
 
         # Recursively expand result
-        return expand_macros(result, const_defs)
-
-    # Recursively expand in subexpressions
-    if isinstance(e, Lam):
-        return Lam(e.params, expand_macros(e.body, const_defs))
-
-    if isinstance(e, App):
-        return App(expand_macros(e.fn, const_defs), [expand_macros(arg, const_defs) for arg in e.args])
-
-    if isinstance(e, TyAbs):
-        return TyAbs(e.tv, expand_macros(e.body, const_defs))
-
-    if isinstance(e, TyAppE):
-        return TyAppE(expand_macros(e.fn, const_defs), e.arg_ty)
-
-    if isinstance(e, Case):
-        return Case(
-            expand_macros(e.scr, const_defs),
-            {tag: (binds, expand_macros(rhs, const_defs)) for tag, (binds, rhs) in e.alts.items()},
-        )
-
-    if isinstance(e, Perform):
-        return Perform(e.effect_name, expand_macros(e.args, const_defs))
-
-    if isinstance(e, Handle):
-        return Handle(
-            expand_macros(e.body, const_defs),
-            {
-                eff: (binds, expand_macros(handler, const_defs))
-                for eff, (binds, handler) in e.handlers.items()
-            },
-        )
-
-    if isinstance(e, Record):
-        return Record({name: expand_macros(val, const_defs) for name, val in e.fields.items()})
-
-    if isinstance(e, FieldAccess):
-        return FieldAccess(expand_macros(e.record, const_defs), e.field)
-
-    if isinstance(e, If):
-        return If(
-            expand_macros(e.cond, const_defs),
-            expand_macros(e.then_branch, const_defs),
-            expand_macros(e.else_branch, const_defs)
-        )
-
-    if isinstance(e, Seq):
-        return Seq([expand_macros(expr, const_defs) for expr in e.exprs])
+        return _expand_result("python", macro_name, App(e.fn, expanded_args), result, self.const_defs)
 
-    # Expand Let bindings (all bindings are recursive by default)
-    if isinstance(e, Let):
-        return Let(e.name, expand_macros(e.value, const_defs), expand_macros(e.body, const_defs))
 
-    # Base case: Var and other literals
-    return e
+def _expand_result(system: str, name: str, invocation: Exp, result: Exp, const_defs: Dict[str, Exp]) -> Exp:
+    """Expand the macros in an expander's result, profiling the expansion if enabled."""
+    profiler = macro_profile.current
+    if profiler is None:
+        return expand_macros(result, const_defs)
+    start = macro_profile.clock()
+    expanded = expand_macros(result, const_defs)
+    profiler.expansion(system, name, macro_profile.clock() - start,
+                       macro_profile.ast_size(invocation), macro_profile.ast_size(expanded))
+    return expanded
 
 
 # ============================================================
@@ -271,11 +252,74 @@ def _expand_for(args: List[Exp]) -> Exp:
     return MacroInvocation("@for", args)
 
 
+class TypeExpansionCache:
+    """Fully expanded types, keyed by the type before expansion.
+
+    Types are hash-consed, so structurally equal types are the same key and
+    each distinct type (`Vec[i64, 1000]`, an arrow over it, ...) is expanded
+    once. An expanded type is also entered as its own expansion, so checking
+    the components of an already normalized type costs one lookup each.
+    Holds at most `max_entries` types, dropping the least recently used.
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.entries: Dict[Type, Type] = {}
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, t: Type) -> Type | None:
+        found = self.entries.pop(t, None)
+        if found is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries[t] = found  # most recently used last
+        return found
+
+    def put(self, t: Type, expanded: Type) -> None:
+        while len(self.entries) >= self.max_entries:
+            del self.entries[next(iter(self.entries))]
+            self.evictions += 1
+        self.entries[t] = expanded
+
+    def clear(self) -> None:
+        self.entries.clear()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def stats(self) -> Dict[str, float]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self.entries),
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+type_expansions = TypeExpansionCache()
+
+
 def expand_type_macros(t: Type) -> Type:
     """
     Recursively expand all type-level macros in a type.
     This runs BEFORE type checking.
+    Results are cached in `type_expansions`.
     """
+    expanded = type_expansions.get(t)
+    if expanded is None:
+        expanded = _expand_type_macros(t)
+        type_expansions.put(t, expanded)
+        if expanded is not t:
+            type_expansions.put(expanded, expanded)
+    return expanded
+
+
+def _expand_type_macros(t: Type) -> Type:
     from auric.ast import Arrow, Forall, ForallIdx, ShapeT, TyApp, TyVar, RefT
 
     # Expand type macro invocations (DepApp nodes)
@@ -285,10 +329,21 @@ def expand_type_macros(t: Type) -> Type:
             return t
 
         # Apply type macro expander
-        result = _type_macros[t.base](t.type_args, t.index_args)
+        profiler = macro_profile.current
+        if profiler is None:
+            result = _type_macros[t.base](t.type_args, t.index_args)
 
-        # Recursively expand result in case macro produces more macros
-        return expand_type_macros(result)
+            # Recursively expand result in case macro produces more macros
+            return expand_type_macros(result)
+
+        start = macro_profile.clock()
+        result = _type_macros[t.base](t.type_args, t.index_args)
+        profiler.attempt("python", t.base, macro_profile.clock() - start)
+        start = macro_profile.clock()
+        expanded = expand_type_macros(result)
+        profiler.expansion("python", t.base, macro_profile.clock() - start,
+                           macro_profile.ast_size(t), macro_profile.ast_size(expanded))
+        return expanded
 
     # Recursively expand in type substructures
     if isinstance(t, Arrow):
@@ -311,10 +366,10 @@ def expand_type_macros(t: Type) -> Type:
         )
 
     if isinstance(t, RecordT):
-        return RecordT({
-            name: expand_type_macros(field_ty)
-            for name, field_ty in t.fields.items()
-        })
+        field_tys = [expand_type_macros(field_ty) for field_ty in t.fields.values()]
+        if unchanged(field_tys, t.fields.values()):
+            return t
+        return RecordT(dict(zip(t.fields, field_tys)))
 
     # Base cases: TyVar, ShapeT, RefT
     return t
@@ -80,3 +80,60 @@ class Heap:
             "current_objects": cls.current_objects,
             "total_clones": cls.total_clones,
         }
+
+
+class Nat:
+    """A natural number value backed by a Python int.
+
+    Stands in for a chain of n `("@succ", ...)` tuples ending in `("@zero",)`:
+    `unpack` exposes one constructor layer at a time, so pattern matching on
+    @zero/@succ works unchanged while the value itself stays one object.
+    """
+
+    __slots__ = ("n",)
+
+    def __init__(self, n: int):
+        self.n = n
+
+    def unpack(self) -> tuple:
+        """The outermost constructor as (tag, *fields)."""
+        if self.n == 0:
+            return ("@zero",)
+        return ("@succ", Heap.alloc(Nat(self.n - 1)))
+
+    def __eq__(self, other):
+        return isinstance(other, Nat) and other.n == self.n
+
+    def __hash__(self):
+        return hash((Nat, self.n))
+
+    def __repr__(self):
+        return f"Nat({self.n})"
+
+
+def nat_succ(v: RefValue) -> RefValue:
+    """@succ applied to a value; natural numbers stay compact."""
+    data = v.data
+    if isinstance(data, Nat):
+        return Heap.alloc(Nat(data.n + 1))
+    if data == ("@zero",):
+        return Heap.alloc(Nat(1))
+    return Heap.alloc(("@succ", v))
+
+
+def nat_value(data: Any) -> Optional[int]:
+    """The integer a Nat or @zero/@succ chain denotes, or None."""
+    count = 0
+    while True:
+        if isinstance(data, RefValue):
+            data = data.data
+        if isinstance(data, Nat):
+            return count + data.n
+        if data == ("@zero",) or data == "@zero":
+            return count
+        if isinstance(data, tuple) and len(data) == 2 and data[0] == "@succ":
+            count += 1
+            data = data[1]
+            continue
+        return None
+
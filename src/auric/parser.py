@@ -2,6 +2,10 @@
 
 from __future__ import annotations
 
+import hashlib
+import os
+import pickle
+from pathlib import Path
 from typing import Dict, List, Optional
 
 from auric.ast import (
@@ -31,8 +35,9 @@ from auric.ast import (
     Union,
     Var,
     Shape,
+    unchanged,
 )
-from auric.lexer import Buf, lex, TYPE_ID, VAR_ID
+from auric.lexer import BUILTIN, CHAR, FLOAT, IDENT, INT, TYPE, VAR, Buf, Tokens, lex
 
 
 def parse_type(src: str) -> Type:
@@ -86,6 +91,7 @@ def shape_of(ty: Type) -> Optional[Shape]:
 
 
 def _shape_atom(b: Buf) -> Shape:
+    k = b.peek_kind()
     t = b.pop()
     if t == "⊤":
         return Top()
@@ -99,7 +105,7 @@ def _shape_atom(b: Buf) -> Shape:
         b.pop()
         return Diff(Base(t), b.pop())
     # Handle builtin types (@Nat, @Bool, etc.) and regular types
-    if t.startswith("@") or TYPE_ID.match(t):
+    if k == BUILTIN or k == TYPE:
         return Base(t)
     raise SyntaxError("bad shape token " + t)
 
@@ -137,6 +143,7 @@ def _parse_index(b: Buf) -> "Index":
     tok = b.peek()
     if tok is None:
         raise SyntaxError("Expected index")
+    k = b.peek_kind()
 
     if tok == "@zero":
         b.pop()
@@ -153,7 +160,7 @@ def _parse_index(b: Buf) -> "Index":
     elif tok == "_":
         b.pop()
         return IdxUnknown()
-    elif tok.isdigit():
+    elif k == INT and tok.isdigit():
         # Integer literal: convert to Peano numeral
         # 0 -> @zero, 1 -> @succ(@zero), 2 -> @succ(@succ(@zero)), etc.
         b.pop()
@@ -162,7 +169,7 @@ def _parse_index(b: Buf) -> "Index":
         for _ in range(n):
             result = IdxSucc(result)
         return result
-    elif VAR_ID.match(tok):
+    elif k == VAR:
         b.pop()
         return IdxVar(tok)
     else:
@@ -170,11 +177,12 @@ def _parse_index(b: Buf) -> "Index":
 
 
 def _ty_atom(b: Buf) -> Type:
+    k = b.peek_kind()
     t = b.pop()
     if t in {"∀", "Lambda"}:
-        tv = b.pop()
-        if not VAR_ID.match(tv):
+        if b.peek_kind() != VAR:
             raise SyntaxError("type var lower-case")
+        tv = b.pop()
         if b.pop() != ".":
             raise SyntaxError("need '.' after ∀")
         return Forall(tv, _ty(b))
@@ -192,32 +200,24 @@ def _ty_atom(b: Buf) -> Type:
         field_index = 0
 
         while b.peek() != "}":
-            # Check if this is labeled or unlabeled
-            # Peek ahead to see if there's a ":"
-            field_tokens = []
-            while b.peek() not in {",", "}", None}:
-                field_tokens.append(b.pop())
-
-            if not field_tokens:
+            if b.peek() in {",", None}:
                 raise SyntaxError("Empty field in record type")
 
-            # Check if it's labeled (contains ":")
-            if ":" in field_tokens:
-                colon_idx = field_tokens.index(":")
-                field_name = "".join(field_tokens[:colon_idx]).strip()
-                type_tokens = field_tokens[colon_idx + 1:]
-                field_type = _ty(Buf(type_tokens))
+            # Labeled (name: Type) or unlabeled
+            if b.i + 1 < b.end and b.ts[b.i + 1] == ":":
+                field_name = b.pop()
+                b.pop()  # consume ":"
+                fields[field_name] = _ty(b)
             else:
                 # Unlabeled - use _0, _1, _2, ...
-                field_name = f"_{field_index}"
-                field_type = _ty(Buf(field_tokens))
+                fields[f"_{field_index}"] = _ty(b)
                 field_index += 1
 
-            fields[field_name] = field_type
-
             # Check for comma
             if b.peek() == ",":
                 b.pop()
+            elif b.peek() != "}":
+                raise SyntaxError(f"Expected ',' or '}}' in record type, got {b.peek()}")
 
         b.pop()  # consume "}"
         return RecordT(fields)
@@ -230,7 +230,7 @@ def _ty_atom(b: Buf) -> Type:
         b.pop()
         return RefT(shp, " ".join(pred))
     # Handle builtin type constructors (@Nat, @Bool, etc.) and regular types
-    if t.startswith("@") or TYPE_ID.match(t):
+    if k == BUILTIN or k == TYPE:
         # Check for dependent type application: F[T, n] (e.g., Vec[Int, 3])
         # This is a generic construct that can be used for any dependent type
         if b.peek() == "[":
@@ -250,7 +250,7 @@ def _ty_atom(b: Buf) -> Type:
                     raise SyntaxError(f"Unexpected end of input in {t}[...] type")
 
                 # Try to parse as index first (for Nat-level values)
-                if tok in {"@zero", "@succ", "_"} or (VAR_ID.match(tok) if tok else False):
+                if tok in {"@zero", "@succ", "_"} or b.peek_kind() == VAR:
                     # Parse as index using helper
                     idx = _parse_index(b)
                     index_args.append(idx)
@@ -267,7 +267,7 @@ def _ty_atom(b: Buf) -> Type:
 
             return DepApp(t, type_args, index_args)
         return ShapeT(Base(t))
-    if VAR_ID.match(t):
+    if k == VAR:
         return TyVar(t)
     raise SyntaxError("bad type token " + t)
 
@@ -287,32 +287,14 @@ def _expr(b: Buf) -> Exp:
             # Parse comma-separated arguments until we hit ")"
             # All arguments in (...) are values, not types
             # Use [...] for type application instead
+            # Each argument is parsed in place and stops at its "," or ")"
             args = []
             while b.peek() != ")":
-                # Parse term argument expression
-                # Collect tokens for this argument (until comma or close paren)
-                arg_tokens = []
-                paren_depth = 0
-                while True:
-                    tok = b.peek()
-                    if tok is None:
-                        break
-                    if paren_depth == 0 and tok in {",", ")"}:
-                        break
-                    arg_tokens.append(b.pop())
-                    if tok == "(":
-                        paren_depth += 1
-                    elif tok == ")":
-                        paren_depth -= 1
-
-                # Parse the collected tokens as an expression
-                if arg_tokens:
-                    arg = _expr(Buf(arg_tokens))
-                    args.append(arg)
-
-                # Check for comma separator
+                args.append(_expr(b))
                 if b.peek() == ",":
                     b.pop()  # consume ","
+                elif b.peek() != ")":
+                    raise SyntaxError(f"Expected ',' or ')' in call arguments, got {b.peek()}")
 
             b.pop()  # consume ")"
             # Create single multi-arg App node
@@ -327,7 +309,7 @@ def _expr(b: Buf) -> Exp:
             if field_name is None:
                 raise SyntaxError("Expected field name after '.'")
             # Check if it's a field name (either VAR_ID or _N pattern)
-            if VAR_ID.match(field_name) or field_name.startswith("_"):
+            if b.peek_kind() == VAR or field_name.startswith("_"):
                 b.pop()
                 lhs = FieldAccess(lhs, field_name)
                 continue
@@ -345,7 +327,7 @@ def _expr(b: Buf) -> Exp:
                 raise SyntaxError("Empty index in []")
 
             # For now, only support single-token numeric indices
-            if not index_tok.isdigit():
+            if b.peek_kind() != INT or not index_tok.isdigit():
                 raise SyntaxError(f"Array indices must be numeric literals, got: {index_tok}")
 
             b.pop()  # consume index
@@ -366,28 +348,7 @@ def _expr(b: Buf) -> Exp:
             if b.peek() == "{":
                 # Pattern match: value => { pattern -> expr }
                 b.pop()  # consume "{"
-
-                # Collect all tokens inside the braces
-                brace_tokens = []
-                brace_depth = 1
-                while brace_depth > 0:
-                    tok = b.peek()
-                    if tok is None:
-                        raise SyntaxError("Unclosed '{' in pattern match")
-                    if tok == "{":
-                        brace_depth += 1
-                        brace_tokens.append(b.pop())
-                    elif tok == "}":
-                        brace_depth -= 1
-                        if brace_depth > 0:
-                            brace_tokens.append(b.pop())
-                        else:
-                            b.pop()  # consume final "}"
-                    else:
-                        brace_tokens.append(b.pop())
-
-                # Parse the pattern block
-                case_expr = _parse_pattern_block(brace_tokens, is_multiline=True)
+                case_expr = _parse_pattern_block(b)
 
                 # Replace the placeholder scrutinee with the actual value
                 # The _parse_pattern_block returns Case(Var("_scrutinee"), alts)
@@ -401,24 +362,17 @@ def _expr(b: Buf) -> Exp:
                 # Not a pattern match, this is the end of expression
                 raise SyntaxError("Pattern match requires braces: use 'value => { pattern -> expr }'")
 
-        if nxt and nxt not in {")", "]", "->", "=>", "of", "\n", ","} and nxt != "}":
+        if nxt and nxt not in {")", "]", "->", "=>", "of", "\n", ",", ";"} and nxt != "}":
             # Check if next token is a type constructor (for C-style type arguments in implicit application)
-            if TYPE_ID.match(nxt):
+            if b.peek_kind() == TYPE:
                 # Type argument - likely from space-separated application like f Nat x
-                type_token = b.pop()
-                type_tokens = [type_token]
+                ty = ShapeT(Base(b.pop()))
                 # Handle generic type arguments
                 while b.peek() == "(":
-                    paren_depth = 1
-                    type_tokens.append(b.pop())  # Add "("
-                    while paren_depth > 0:
-                        tok = b.pop()
-                        type_tokens.append(tok)
-                        if tok == "(":
-                            paren_depth += 1
-                        elif tok == ")":
-                            paren_depth -= 1
-                ty = parse_type(" ".join(type_tokens))
+                    b.pop()  # consume "("
+                    ty = TyApp(ty, _ty(b))
+                    if b.pop() != ")":
+                        raise SyntaxError("junk in type")
                 lhs = TyAppE(lhs, ty)
                 continue
             # Regular term argument (space-separated application: f x)
@@ -426,53 +380,15 @@ def _expr(b: Buf) -> Exp:
             continue
         if nxt == "[":
             b.pop()
-            tokens = []
-            depth = 1
-            while depth:
-                tok = b.pop()
-                if tok == "[":
-                    depth += 1
-                elif tok == "]":
-                    depth -= 1
-                if depth:
-                    tokens.append(tok)
-            lhs = TyAppE(lhs, parse_type(" ".join(tokens)))
+            ty = _ty(b)
+            if b.pop() != "]":
+                raise SyntaxError("junk in type")
+            lhs = TyAppE(lhs, ty)
             continue
         break
     return lhs
 
 
-def _parse_block(tokens: List[str]) -> tuple[Exp, bool]:
-    """Parse a block expression { ... } and detect its type."""
-    if not tokens or (len(tokens) == 1 and tokens[0] == ""):
-        raise SyntaxError("Empty block")
-
-    is_multiline = "\n" in " ".join(tokens)
-    tokens_no_newlines = [t for t in tokens if t != "\n"]
-
-    if not tokens_no_newlines:
-        raise SyntaxError("Empty block")
-
-    has_arrow = "->" in tokens_no_newlines
-    has_let_return = "let" in tokens_no_newlines or "return" in tokens_no_newlines
-
-    is_record = False
-    if not has_arrow and not has_let_return and tokens_no_newlines:
-        first = tokens_no_newlines[0]
-        if (VAR_ID.match(first) or first == "_") and len(tokens_no_newlines) > 1:
-            if tokens_no_newlines[1] in {":", "="}:
-                is_record = True
-
-    if has_arrow:
-        return _parse_pattern_block(tokens, is_multiline), is_multiline
-    elif has_let_return:
-        return _parse_let_return_block(tokens, is_multiline), is_multiline
-    elif is_record:
-        return _parse_record_block(tokens, is_multiline), is_multiline
-    else:
-        return _expr(Buf(tokens)), is_multiline
-
-
 def _parse_pattern(pattern_str: str) -> tuple[str, List[str]]:
     """Extract constructor name and bound variables from a pattern string.
 
@@ -505,64 +421,68 @@ def _fix_scrutinee(exp: Exp, old_var: str, new_var: str) -> Exp:
     if isinstance(exp, Lam):
         if new_var in exp.params:
             return exp
-        return Lam(exp.params, _fix_scrutinee(exp.body, old_var, new_var))
+        body = _fix_scrutinee(exp.body, old_var, new_var)
+        return exp if body is exp.body else Lam(exp.params, body)
     if isinstance(exp, App):
-        return App(_fix_scrutinee(exp.fn, old_var, new_var), [_fix_scrutinee(arg, old_var, new_var) for arg in exp.args])
+        fn = _fix_scrutinee(exp.fn, old_var, new_var)
+        args = [_fix_scrutinee(arg, old_var, new_var) for arg in exp.args]
+        return exp if fn is exp.fn and unchanged(args, exp.args) else App(fn, args)
     if isinstance(exp, TyAbs):
-        return TyAbs(exp.tv, _fix_scrutinee(exp.body, old_var, new_var))
+        body = _fix_scrutinee(exp.body, old_var, new_var)
+        return exp if body is exp.body else TyAbs(exp.tv, body)
     if isinstance(exp, TyAppE):
-        return TyAppE(_fix_scrutinee(exp.fn, old_var, new_var), exp.arg_ty)
+        fn = _fix_scrutinee(exp.fn, old_var, new_var)
+        return exp if fn is exp.fn else TyAppE(fn, exp.arg_ty)
     if isinstance(exp, Case):
-        return Case(
-            _fix_scrutinee(exp.scr, old_var, new_var),
-            {tag: (binds, _fix_scrutinee(body, old_var, new_var)) for tag, (binds, body) in exp.alts.items()},
-        )
+        scr = _fix_scrutinee(exp.scr, old_var, new_var)
+        bodies = [_fix_scrutinee(body, old_var, new_var) for _, body in exp.alts.values()]
+        if scr is exp.scr and unchanged(bodies, (body for _, body in exp.alts.values())):
+            return exp
+        return Case(scr, {tag: (binds, body) for (tag, (binds, _)), body in zip(exp.alts.items(), bodies)})
     return exp
 
 
-def _parse_pattern_block(tokens: List[str], is_multiline: bool) -> Exp:
-    """Parse pattern matching block: { pattern -> expr; pattern -> expr }"""
-    tokens = [t for t in tokens if t != "\n"]
-
-    if not tokens:
-        raise SyntaxError("Empty pattern block")
-
-    alts = {}
-    i = 0
-
-    while i < len(tokens):
-        if tokens[i] == "}":
-            break
-
-        pattern_tokens = []
-        while i < len(tokens) and tokens[i] != "->":
-            pattern_tokens.append(tokens[i])
-            i += 1
+# Token kinds that may appear in a pattern, besides parentheses and commas
+_PATTERN_KINDS = frozenset({BUILTIN, TYPE, VAR, IDENT, INT, CHAR})
 
-        if i >= len(tokens):
-            raise SyntaxError("Expected '->' in pattern match")
 
-        i += 1
+def _starts_pattern_clause(b: Buf) -> bool:
+    """Whether the tokens at the cursor read `pattern ->`, without consuming."""
+    ts, ks = b.ts, b.ks
+    for j in range(b.i, b.end):
+        t = ts[j]
+        if t == "->":
+            return j > b.i
+        if t not in {"(", ")", ","} and ks[j] not in _PATTERN_KINDS:
+            return False
+    return False
 
-        expr_tokens = []
-        while i < len(tokens) and tokens[i] not in {";", "}"}:
-            expr_tokens.append(tokens[i])
-            i += 1
 
-        pattern_str = " ".join(pattern_tokens).strip()
-        ctor, binds = _parse_pattern(pattern_str)
-        expr = _expr(Buf(expr_tokens)) if expr_tokens else Var("()")
+def _parse_pattern_block(b: Buf) -> Exp:
+    """Parse pattern matching block: { pattern -> expr; pattern -> expr; }
 
+    The opening '{' has already been consumed; clauses are parsed in place up
+    to and including the closing '}'.
+    """
+    alts = {}
+    while b.peek() != "}":
+        pattern_tokens = []
+        while b.peek() != "->":
+            if b.peek() in {None, ";", "}"}:
+                raise SyntaxError("Expected '->' in pattern match")
+            pattern_tokens.append(b.pop())
+        b.pop()  # consume "->"
+
+        ctor, binds = _parse_pattern(" ".join(pattern_tokens))
+        expr = Var("()") if b.peek() in {";", "}"} else _expr(b)
         alts[ctor] = (binds, expr)
 
-        has_trailing_sep = i < len(tokens) and tokens[i] == ";"
-        is_last_clause = i + 1 >= len(tokens) or tokens[i + 1] == "}"
-
-        if is_multiline and is_last_clause and not has_trailing_sep:
+        if b.peek() == "}":
             raise SyntaxError("Multiline pattern block requires trailing ';' after last clause")
-
-        if i < len(tokens) and tokens[i] == ";":
-            i += 1
+        if b.peek() != ";":
+            raise SyntaxError(f"Expected ';' after pattern clause, got {b.peek()}")
+        b.pop()  # consume ";"
+    b.pop()  # consume "}"
 
     if not alts:
         raise SyntaxError("Empty pattern block")
@@ -570,85 +490,39 @@ def _parse_pattern_block(tokens: List[str], is_multiline: bool) -> Exp:
     return Case(Var("_scrutinee"), alts)
 
 
-def _parse_let_return_block(tokens: List[str], is_multiline: bool) -> Exp:
-    """Parse let/return block: { let x = expr; let y = expr; return expr }"""
-    tokens = [t for t in tokens if t != "\n"]
-
-    bindings = []
-    result_expr = None
-    i = 0
-
-    while i < len(tokens):
-        if tokens[i] == "}":
-            break
-
-        if tokens[i] == "let":
-            i += 1
-            if i >= len(tokens):
-                raise SyntaxError("Expected binding name after 'let'")
-
-            name = tokens[i]
-            i += 1
-
-            if i >= len(tokens) or tokens[i] != "=":
-                raise SyntaxError(f"Expected '=' after binding name '{name}'")
-
-            i += 1
-
-            expr_tokens = []
-            while i < len(tokens) and tokens[i] not in {";", "}", "return"}:
-                expr_tokens.append(tokens[i])
-                i += 1
-
-            bound_expr = _expr(Buf(expr_tokens)) if expr_tokens else Var(name)
-            bindings.append((name, bound_expr))
-
-            if i < len(tokens) and tokens[i] == ";":
-                i += 1
-
-        elif tokens[i] == "return":
-            i += 1
-            expr_tokens = []
-            while i < len(tokens) and tokens[i] not in {";", "}"}:
-                expr_tokens.append(tokens[i])
-                i += 1
+def _lambda_params(b: Buf) -> Optional[List[str]]:
+    """Parameter names if the tokens at the cursor read `a, b, ...) =>`.
 
-            result_expr = _expr(Buf(expr_tokens)) if expr_tokens else Var("()")
-
-            if is_multiline and i < len(tokens) and tokens[i] != ";":
-                if tokens[i] == "}":
-                    raise SyntaxError("Multiline let/return block requires trailing ';' after last statement")
-
-            if i < len(tokens) and tokens[i] == ";":
-                i += 1
-        else:
-            i += 1
-
-    if result_expr is None:
-        result_expr = Var("()")
-
-    current_expr = result_expr
-    for name, value_expr in reversed(bindings):
-        current_expr = Lam([name], current_expr)
-
-    for name, value_expr in bindings:
-        current_expr = App(current_expr, [value_expr])
-
-    return current_expr
-
-
-def _parse_record_block(tokens: List[str], is_multiline: bool) -> Exp:
-    """Parse record literal: { x: T, y: T } or { x = val, y = val }"""
-    tokens = [t for t in tokens if t != "\n"]
-    # TODO: Implement full record support
-    return _expr(Buf(tokens))
+    Called just after a '(' has been consumed. Only lists of two or more bare
+    names qualify; `(x) => { ... }` stays a pattern match on x.
+    """
+    ts, ks = b.ts, b.ks
+    j = b.i
+    params = []
+    while j + 1 < b.end and ks[j] == VAR:
+        params.append(ts[j])
+        if ts[j + 1] == ")":
+            if len(params) > 1 and j + 2 < b.end and ts[j + 2] == "=>":
+                return params
+            return None
+        if ts[j + 1] != ",":
+            return None
+        j += 2
+    return None
 
 
 def _atom(b: Buf) -> Exp:
+    k = b.peek_kind()
     t = b.pop()
     if t == "(":
+        # Multi-parameter lambda: (a, b) => body
+        params = _lambda_params(b)
+        if params is not None:
+            b.i += 2 * len(params) + 1  # skip "a, b) =>"
+            return Lam(params, _expr(b))
         e = _expr(b)
-        b.pop()
+        if b.pop() != ")":
+            raise SyntaxError("Expected ')'")
         return e
 
     # Let binding: let name = value; body or let rec name = value; body
@@ -667,25 +541,7 @@ def _atom(b: Buf) -> Exp:
         b.pop()  # consume '='
 
         # Parse value expression (until ';')
-        value_tokens = []
-        brace_depth = 0
-        paren_depth = 0
-        while b.peek() is not None:
-            tok = b.peek()
-            # Stop at top-level ';'
-            if tok == ";" and brace_depth == 0 and paren_depth == 0:
-                break
-            # Track nesting
-            if tok == "{":
-                brace_depth += 1
-            elif tok == "}":
-                brace_depth -= 1
-            elif tok == "(":
-                paren_depth += 1
-            elif tok == ")":
-                paren_depth -= 1
-            value_tokens.append(b.pop())
-
+        value = _expr(b)
         if b.peek() != ";":
             raise SyntaxError("Expected ';' after let value")
         b.pop()  # consume ';'
@@ -693,68 +549,37 @@ def _atom(b: Buf) -> Exp:
         # Parse body (rest of expression)
         body = _atom(b)
 
-        # Parse value and body
-        value = _expr(Buf(value_tokens))
-
         # All let bindings are recursive by default
         return Let(name, value, body)
 
     # Brace block: could be sequence { expr; expr } or pattern match { pat -> expr }
     if t == "{":
-        # Peek ahead to see if this is a pattern match (contains ->) or sequence
-        # Collect all tokens until closing }
-        # Note: The '{' was already popped by _atom(), so we start from current position
-        brace_depth = 1
-        tokens_inside = []
+        # A leading `pattern ->` makes this a pattern match body, otherwise a sequence
+        if _starts_pattern_clause(b):
+            return _parse_pattern_block(b)
+
+        from auric.ast import Seq
 
-        while brace_depth > 0:
+        exprs = []
+        while True:
+            while b.peek() == ";":
+                b.pop()
             tok = b.peek()
             if tok is None:
                 raise SyntaxError("Unclosed '{'")
-            if tok == "{":
-                brace_depth += 1
-                tokens_inside.append(b.pop())
-            elif tok == "}":
-                brace_depth -= 1
-                if brace_depth == 0:
-                    b.pop()  # consume the closing '}'
-                    break
-                else:
-                    tokens_inside.append(b.pop())
-            else:
-                tokens_inside.append(b.pop())
-
-        # Check if this contains -> (pattern match) or not (sequence)
-        has_arrow = "->" in tokens_inside
-
-        if has_arrow:
-            # This is a pattern match body - delegate to existing pattern match parser
-            return _parse_pattern_block(tokens_inside, is_multiline=True)
+            if tok == "}":
+                b.pop()  # consume the closing '}'
+                break
+            exprs.append(_expr(b))
+            if b.peek() not in {";", "}", None}:
+                raise SyntaxError(f"Expected ';' or '}}' in block, got {b.peek()}")
+
+        if len(exprs) == 0:
+            return Var("()")
+        elif len(exprs) == 1:
+            return exprs[0]
         else:
-            # This is a sequence
-            from auric.ast import Seq
-
-            exprs = []
-            expr_tokens = []
-
-            for tok in tokens_inside:
-                if tok == ";":
-                    if expr_tokens:
-                        exprs.append(_expr(Buf(expr_tokens)))
-                        expr_tokens = []
-                else:
-                    expr_tokens.append(tok)
-
-            # Handle last expression (no trailing semicolon)
-            if expr_tokens:
-                exprs.append(_expr(Buf(expr_tokens)))
-
-            if len(exprs) == 0:
-                return Var("()")
-            elif len(exprs) == 1:
-                return exprs[0]
-            else:
-                return Seq(exprs)
+            return Seq(exprs)
 
     if t == ".":
         # Record literal: .{ x = 1, y = 2 } or .{ 1, 2 }
@@ -767,81 +592,36 @@ def _atom(b: Buf) -> Exp:
         spread_index = 0  # For tracking spread operators
 
         while b.peek() != "}":
-            # Check for spread operator: ..expr
-            if b.peek() == "..":
+            tok = b.peek()
+            if tok is None:
+                raise SyntaxError("Unexpected end in record literal")
+            if tok == "..":
                 # Spread operator: ..expr
                 from auric.ast import Spread
-                b.pop()  # consume ".."
 
-                # Collect tokens for spread expression until we hit "," or "}"
-                spread_tokens = []
-                brace_depth = 0
-                paren_depth = 0
-                while True:
-                    tok = b.peek()
-                    if tok is None:
-                        raise SyntaxError("Unexpected end in spread expression")
-                    if brace_depth == 0 and paren_depth == 0 and tok in {",", "}"}:
-                        break
-                    if tok == "{":
-                        brace_depth += 1
-                    elif tok == "}":
-                        brace_depth -= 1
-                    elif tok == "(":
-                        paren_depth += 1
-                    elif tok == ")":
-                        paren_depth -= 1
-                    spread_tokens.append(b.pop())
-
-                if not spread_tokens:
+                b.pop()  # consume ".."
+                if b.peek() in {",", "}"}:
                     raise SyntaxError("Expected expression after '..'")
-
-                spread_expr = _expr(Buf(spread_tokens))
                 # Store spread with special key
-                fields[f"__spread_{spread_index}"] = Spread(spread_expr)
+                fields[f"__spread_{spread_index}"] = Spread(_expr(b))
                 spread_index += 1
-
-                # Check for comma
-                if b.peek() == ",":
-                    b.pop()
-                continue
-
-            # Regular field parsing
-            # Collect tokens for this field until we hit "," or "}"
-            field_tokens = []
-            brace_depth = 0
-            while True:
-                tok = b.peek()
-                if tok is None:
-                    raise SyntaxError("Unexpected end in record literal")
-                if brace_depth == 0 and tok in {",", "}"}:
-                    break
-                if tok == "{":
-                    brace_depth += 1
-                elif tok == "}":
-                    brace_depth -= 1
-                field_tokens.append(b.pop())
-
-            if not field_tokens:
+            elif tok == ",":
                 raise SyntaxError("Empty field in record literal")
-
-            # Check if it's labeled (contains "=")
-            if "=" in field_tokens:
-                eq_idx = field_tokens.index("=")
-                field_name = "".join(field_tokens[:eq_idx]).strip()
-                value_tokens = field_tokens[eq_idx + 1:]
-                field_value = _expr(Buf(value_tokens))
+            elif b.i + 1 < b.end and b.ts[b.i + 1] == "=":
+                # Labeled field: name = value
+                field_name = b.pop()
+                b.pop()  # consume "="
+                fields[field_name] = _expr(b)
             else:
                 # Unlabeled - use _0, _1, _2, ...
-                field_name = f"_{field_index}"
-                field_value = _expr(Buf(field_tokens))
+                fields[f"_{field_index}"] = _expr(b)
                 field_index += 1
 
-            fields[field_name] = field_value
-
             # Check for comma
             if b.peek() == ",":
                 b.pop()
+            elif b.peek() != "}":
+                raise SyntaxError(f"Expected ',' or '}}' in record literal, got {b.peek()}")
 
         b.pop()  # consume "}"
         return Record(fields)
@@ -851,22 +631,15 @@ def _atom(b: Buf) -> Exp:
         return TyAbs(tv, _expr(b))
     if t == "handle":
         # handle expr { Effect(pattern) -> handler; ... }
-        # Collect tokens for body expression until we hit '{'
-        body_tokens = []
-        paren_depth = 0
-        while True:
-            tok = b.peek()
-            if tok is None:
-                raise SyntaxError("Expected '{' in handle expression")
-            if tok == "{" and paren_depth == 0:
-                break
-            if tok == "(":
-                paren_depth += 1
-            elif tok == ")":
-                paren_depth -= 1
-            body_tokens.append(b.pop())
-
-        body = _expr(Buf(body_tokens))
+        # The body ends at the first top-level '{'; parse it on a view up to there
+        brace = _find_top(b, {"{"})
+        if brace is None:
+            raise SyntaxError("Expected '{' in handle expression")
+        body_buf = Buf(b.tokens, b.i, brace)
+        body = _expr(body_buf)
+        if body_buf.peek() is not None:
+            raise SyntaxError(f"Unexpected '{body_buf.peek()}' in handle expression")
+        b.i = brace
         if b.peek() != "{":
             raise SyntaxError(f"Expected '{{' in handle expression, got {b.peek()}")
         b.pop()  # consume "{"
@@ -898,11 +671,7 @@ def _atom(b: Buf) -> Exp:
             b.pop()  # consume "->"
 
             # Parse handler body (until ; or })
-            rhs = []
-            while b.peek() not in {None, ";", "}"}:
-                rhs.append(b.pop())
-
-            handlers[effect_name] = (binds, _expr(Buf(rhs)))
+            handlers[effect_name] = (binds, _expr(b))
 
             if b.peek() == ";":
                 b.pop()  # consume ";"
@@ -912,7 +681,7 @@ def _atom(b: Buf) -> Exp:
         b.pop()  # consume "}"
         return Handle(body, handlers)
     # Character literal: 'a'
-    if t.startswith("'") and t.endswith("'") and len(t) >= 3:
+    if k == CHAR:
         from auric.ast import Const, ShapeT, Base
         # Handle escape sequences
         char_content = t[1:-1]
@@ -928,8 +697,7 @@ def _atom(b: Buf) -> Exp:
         return Const(char_content, ShapeT(Base("u8")))
 
     # Float literal: 3.14, 3.14f32, 2.5e10
-    from auric.lexer import FLOAT_LIT
-    if FLOAT_LIT.match(t):
+    if k == FLOAT:
         from auric.ast import Const, ShapeT, Base
         # Check for type suffix
         if t.endswith("f32"):
@@ -945,8 +713,7 @@ def _atom(b: Buf) -> Exp:
         return Const(value, ShapeT(Base(type_suffix)))
 
     # Integer literal: 42, 42u8, 0xFF, 0b1010
-    from auric.lexer import INT_LIT
-    if INT_LIT.match(t):
+    if k == INT:
         from auric.ast import Const, ShapeT, Base
         # Check for type suffix
         type_suffix = "i64"  # default
@@ -978,30 +745,388 @@ def _atom(b: Buf) -> Exp:
         return Const(False, ShapeT(Base("bool")))
 
     # Builtin identifiers: @zero, @succ, @Print, etc.
-    if t.startswith("@"):
-        return Var(t)
-    if VAR_ID.match(t):
-        return Var(t)
-    if TYPE_ID.match(t):
+    if k == BUILTIN or k == VAR or k == TYPE:
         return Var(t)
     raise SyntaxError(
         f"invalid term identifier '{t}': must be snake_case (e.g., 'my_var'), CamelCase type (e.g., 'Nat'), or builtin (@zero)"
     )
 
 
+
+def _default_cache_dir() -> Optional[Path]:
+    """$AURIC_CACHE_DIR/modules, or ~/.cache/auric/modules; an empty $AURIC_CACHE_DIR disables caching."""
+    root = os.environ.get("AURIC_CACHE_DIR")
+    if root is None:
+        return Path.home() / ".cache" / "auric" / "modules"
+    return Path(root) / "modules" if root else None
+
+
+# Directory of pickled (sigs, defs) for imported modules; None disables the disk cache
+MODULE_CACHE_DIR: Optional[Path] = _default_cache_dir()
+
+# (resolved path, content hash) -> (dependencies, (sigs, defs)), for this process
+_module_memo: Dict[tuple[str, str], tuple[list, tuple[Dict[str, Type], Dict[str, Exp]]]] = {}
+# One list per module being parsed, collecting the (path, hash) of every module it imports
+_import_deps: List[list] = []
+_front_end_digest: Optional[str] = None
+
+
+def _content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+
+def _front_end_hash() -> str:
+    """Hash of the lexer, parser and AST sources, so cached modules follow parser changes."""
+    global _front_end_digest
+    if _front_end_digest is None:
+        h = hashlib.sha256()
+        for name in ("lexer.py", "parser.py", "ast.py"):
+            h.update((Path(__file__).parent / name).read_bytes())
+        _front_end_digest = h.hexdigest()
+    return _front_end_digest
+
+
+def _deps_current(deps: list) -> bool:
+    """Whether every recorded (path, hash) dependency is unchanged on disk."""
+    for path, digest in deps:
+        try:
+            if _content_hash(Path(path).read_bytes()) != digest:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def _module_cache_file(key: tuple[str, str]) -> Path:
+    name = _content_hash("\0".join((_front_end_hash(), *key)).encode())
+    return MODULE_CACHE_DIR / f"{name}.pickle"
+
+
+def _read_module_cache(key: tuple[str, str]):
+    if MODULE_CACHE_DIR is None:
+        return None
+    try:
+        with open(_module_cache_file(key), "rb") as f:
+            entry = pickle.load(f)
+    except Exception:
+        # Missing, unreadable or stale-format cache files are simply re-parsed
+        return None
+    return entry if _deps_current(entry[0]) else None
+
+
+def _write_module_cache(key: tuple[str, str], entry) -> None:
+    if MODULE_CACHE_DIR is None:
+        return
+    path = _module_cache_file(key)
+    try:
+        MODULE_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            pickle.dump(entry, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+    except OSError:
+        pass
+
+
 def _load_module(module_path: str) -> tuple[Dict[str, Type], Dict[str, Exp]]:
     """Load a module from the standard library or filesystem.
 
     Module paths like 'std/nat' are converted to 'std/nat.au' files.
-    """
-    from pathlib import Path
 
+    Results are memoized for the process and cached in MODULE_CACHE_DIR, keyed
+    by resolved path and content hash. An entry also records the hashes of the
+    modules it imported and is only reused while they are all unchanged.
+    """
     au_file = module_path + ".au" if not module_path.endswith(".au") else module_path
     std_path = Path(__file__).parent.parent.parent / au_file
-    if std_path.exists():
-        src = std_path.read_text()
-        return parse(src)
-    raise SyntaxError(f"Module not found: {module_path}")
+    if not std_path.exists():
+        raise SyntaxError(f"Module not found: {module_path}")
+
+    data = std_path.read_bytes()
+    key = (str(std_path.resolve()), _content_hash(data))
+    entry = _module_memo.get(key)
+    if entry is None or not _deps_current(entry[0]):
+        entry = _read_module_cache(key)
+        if entry is None:
+            _import_deps.append([])
+            try:
+                result = parse(data.decode())
+            finally:
+                deps = _import_deps.pop()
+            entry = (deps, result)
+            _write_module_cache(key, entry)
+        _module_memo[key] = entry
+
+    deps, result = entry
+    if _import_deps:
+        # The importing module depends on this one and, transitively, on its imports
+        _import_deps[-1].append(key)
+        _import_deps[-1].extend(deps)
+    return result
+
+
+# Keywords that begin a top-level definition
+TOP_LEVEL_KEYWORDS = frozenset({"import", "type", "macro", "const"})
+
+_OPEN = frozenset({"(", "{", "["})
+_CLOSE = frozenset({")", "}", "]"})
+
+
+def _definition_starts(tokens: Tokens) -> List[int]:
+    """Indices of the tokens that begin each top-level item.
+
+    Outside every bracket, an item begins at an unindented line or at a
+    top-level keyword that starts its line. Tokens without source offsets
+    (e.g. macro output) are split at top-level keywords only. One linear scan
+    splits the whole file.
+    """
+    texts = tokens.texts
+    src = tokens.src
+    token_starts = tokens.starts
+    starts = []
+    depth = 0
+    for i, t in enumerate(texts):
+        if i == 0:
+            starts.append(i)
+        if t in _OPEN:
+            depth += 1
+            continue
+        if t in _CLOSE:
+            depth -= 1
+            continue
+        if depth > 0:
+            continue
+        pos = token_starts[i]
+        if i == 0:
+            continue
+        if src is None or pos < 0:
+            if t in TOP_LEVEL_KEYWORDS:
+                starts.append(i)
+        elif src[pos - 1] == "\n":
+            starts.append(i)
+        elif t in TOP_LEVEL_KEYWORDS and "\n" in src[tokens.ends[i - 1]:pos]:
+            starts.append(i)
+    return starts
+
+
+def _line_of(tokens: Tokens, i: int) -> str:
+    """Source text from token i to the end of its line, for error messages."""
+    if i >= len(tokens):
+        return ""
+    if tokens.src is None or tokens.starts[i] < 0:
+        # No source text (e.g. macro output): show the next few tokens
+        return " ".join(tokens.texts[i:i + 20])
+    start = tokens.starts[i]
+    end = tokens.src.find("\n", start)
+    return tokens.src[start:] if end < 0 else tokens.src[start:end]
+
+
+def _find_top(b: Buf, targets: set[str]) -> Optional[int]:
+    """Index of the first token in `targets` outside brackets, without consuming."""
+    depth = 0
+    ts = b.ts
+    for j in range(b.i, b.end):
+        t = ts[j]
+        if depth == 0 and t in targets:
+            return j
+        if t in _OPEN:
+            depth += 1
+        elif t in _CLOSE:
+            depth -= 1
+    return None
+
+
+def _split_params(b: Buf) -> List[str]:
+    """Consume a parenthesised parameter list and return the parameter names.
+
+    Parameters are `name` or `name: Type`; commas inside brackets do not split.
+    """
+    b.pop()  # consume "("
+    names = []
+    part: List[str] = []
+    depth = 0
+    while True:
+        t = b.pop()
+        if depth == 0 and t in {",", ")"}:
+            if part:
+                names.append("".join(part))
+            if t == ")":
+                return names
+            part = []
+            continue
+        if t in _OPEN:
+            depth += 1
+        elif t in _CLOSE:
+            depth -= 1
+        # Types are already in the signature; keep only the name before ':'
+        if depth == 0 and t == ":":
+            depth = -1
+        elif depth >= 0 and (depth > 0 or not part or part[-1] != ":"):
+            part.append(t)
+
+
+def _closes_before_arrow(b: Buf) -> bool:
+    """Whether the '(' at the cursor closes and is immediately followed by '=>'."""
+    depth = 0
+    ts = b.ts
+    for j in range(b.i, b.end):
+        t = ts[j]
+        if t in _OPEN:
+            depth += 1
+        elif t in _CLOSE:
+            depth -= 1
+            if depth == 0:
+                return j + 1 < b.end and ts[j + 1] == "=>"
+    return False
+
+
+def _parse_import(
+    b: Buf, sigs: Dict[str, Type], defs: Dict[str, Exp], imports: Optional[List[tuple]] = None
+) -> None:
+    """import module: *  |  import module: name1, name2  |  import module
+
+    When `imports` is given, the import is recorded there as (module_path,
+    names) instead of being loaded; names is None for a whole-module import.
+    """
+    b.pop()  # consume "import"
+    path_tokens = []
+    while b.peek() is not None and b.peek() != ":":
+        path_tokens.append(b.pop())
+    module_path = "".join(path_tokens)
+
+    names: Optional[List[str]] = None
+    if b.peek() == ":":
+        b.pop()  # consume ":"
+        if b.peek() == "*":
+            b.pop()
+        else:
+            names = [""]
+            while b.peek() is not None:
+                t = b.pop()
+                if t == ",":
+                    names.append("")
+                else:
+                    names[-1] += t
+
+    if imports is not None:
+        imports.append((module_path, names))
+        return
+    imported_sigs, imported_defs = _load_module(module_path)
+    _merge_import(names, imported_sigs, imported_defs, sigs, defs)
+
+
+def _merge_import(
+    names: Optional[List[str]],
+    imported_sigs: Dict[str, Type],
+    imported_defs: Dict[str, Exp],
+    sigs: Dict[str, Type],
+    defs: Dict[str, Exp],
+) -> None:
+    """Copy all imported names, or only `names`, into sigs and defs."""
+    if names is None:
+        sigs.update(imported_sigs)
+        defs.update(imported_defs)
+        return
+    for name in names:
+        if name in imported_sigs:
+            sigs[name] = imported_sigs[name]
+        if name in imported_defs:
+            defs[name] = imported_defs[name]
+
+
+def _parse_macro_def(b: Buf, defs: Dict[str, Exp]) -> None:
+    """macro name = (params) => body"""
+    from auric.ast import MacroDef
+
+    b.pop()  # consume "macro"
+    line = _line_of(b.tokens, b.i)
+    name = b.pop()
+    if b.pop() != "=" or b.peek() != "(":
+        raise SyntaxError(f"Macro definition requires (params) => body: {line}")
+    params = _split_params(b)
+    if b.peek() != "=>":
+        raise SyntaxError(f"Macro requires => after parameters: {line}")
+    b.pop()  # consume "=>"
+    defs[name] = MacroDef(name, params, _expr(b))
+
+
+def _parse_const(b: Buf, sigs: Dict[str, Type], defs: Dict[str, Exp]) -> None:
+    """const name [: Type] = expr  |  const name := expr  |  const name: Type = (params) => { body }"""
+    b.pop()  # consume "const"
+    line = _line_of(b.tokens, b.i)
+
+    eq = _find_top(b, {"=", ":="})
+    if eq is None or eq == b.i:
+        raise SyntaxError(f"const requires ':=' or '=': {line}")
+
+    name = b.pop()
+    declared: Optional[Type] = None
+    if b.peek() == ":":
+        b.pop()  # consume ":"
+        tb = Buf(b.tokens, b.i, eq)
+        declared = _ty(tb)
+        if tb.peek() is not None:
+            raise SyntaxError("junk in type")
+    elif b.i != eq:
+        raise SyntaxError(f"unexpected '{b.peek()}' in const definition: {line}")
+    b.i = eq + 1  # consume "=" / ":="
+
+    if b.peek() != "(" or not _closes_before_arrow(b):
+        # Simple constant: const name : Type = expr  OR  const name = expr
+        if declared is not None:
+            sigs[name] = declared
+        defs[name] = _expr(b)
+        return
+
+    # Function definition: const name: ParamTypes -> RetType = (params) => { body }
+    if declared is None:
+        raise SyntaxError(f"Function definition requires type signature: {line}")
+    fn_type = declared
+    sigs[name] = fn_type
+
+    param_names = _split_params(b)
+    b.pop()  # consume "=>"
+    if b.peek() != "{":
+        raise SyntaxError(f"Function body must be in braces {{ }}: {line}")
+    body = _expr(b)
+
+    # Determine which parameters are type parameters vs term parameters
+    # by looking at the function type
+    param_is_type = []
+    current_type = fn_type
+    while isinstance(current_type, (Arrow, Forall)):
+        if isinstance(current_type, Forall):
+            param_is_type.append(True)
+            current_type = current_type.body
+        else:
+            param_is_type.append(False)
+            current_type = current_type.ret
+
+    # Fix scrutinee in pattern matching blocks
+    # If the body contains a Case with _scrutinee, replace it with the first term parameter
+    for idx in range(len(param_names)):
+        if idx < len(param_is_type) and not param_is_type[idx]:
+            body = _fix_scrutinee(body, "_scrutinee", param_names[idx])
+            break
+
+    # Wrap body in lambdas/type abstractions
+    # Collect consecutive term parameters for multi-arg Lam
+    # Process in reverse to maintain correct nesting
+    idx = len(param_names) - 1
+    while idx >= 0:
+        if idx < len(param_is_type) and param_is_type[idx]:
+            # Type parameter - wrap with TyAbs
+            body = TyAbs(param_names[idx], body)
+            idx -= 1
+        else:
+            # Term parameter - collect all consecutive term params
+            term_params = []
+            while idx >= 0 and (idx >= len(param_is_type) or not param_is_type[idx]):
+                term_params.insert(0, param_names[idx])
+                idx -= 1
+            body = Lam(term_params, body)
+
+    defs[name] = body
 
 
 def parse(src: str) -> tuple[Dict[str, Type], Dict[str, Exp]]:
@@ -1010,336 +1135,116 @@ def parse(src: str) -> tuple[Dict[str, Type], Dict[str, Exp]]:
     Returns: (type_signatures, expressions)
 
     Supported forms:
+    - import module / import module: name1, name2 / import module: *
     - const name : Type = expr
-    - const name = (params: Type, ...) -> Type { body }
+    - const name := expr
+    - const name: Type -> Type = (params) => { body }
+    - macro name = (params) => body
     - type Name(params) = { constructors }
     """
+    return parse_tokens(lex(src))
+
+
+def parse_tokens(tokens: Tokens, imports: Optional[List[tuple]] = None) -> tuple[Dict[str, Type], Dict[str, Exp]]:
+    """Parse a token stream into signatures and definitions.
+
+    The stream is split into definitions in one scan, and each definition is
+    parsed in place over a view of the shared token arrays, so every token is
+    lexed exactly once. If `imports` is given, imports are recorded there
+    rather than loaded (see `_parse_import`).
+    """
     sigs: Dict[str, Type] = {}
     defs: Dict[str, Exp] = {}
 
-    lines = src.strip("\n").splitlines()
-    i = 0
-    while i < len(lines):
-        line = lines[i].strip()
+    starts = _definition_starts(tokens)
+    bounds = starts[1:] + [len(tokens)]
+    for start, end in zip(starts, bounds):
+        b = Buf(tokens, start, end)
+        keyword = b.peek()
+        if keyword == "import":
+            _parse_import(b, sigs, defs, imports)
+        elif keyword == "type":
+            # For now, skip type definitions (they don't produce defs/sigs)
+            b.i = end
+        elif keyword == "macro":
+            _parse_macro_def(b, defs)
+        elif keyword == "const":
+            _parse_const(b, sigs, defs)
+        else:
+            raise SyntaxError(f"unrecognised top-level line: {_line_of(tokens, start)}")
+
+        if b.peek() is not None:
+            raise SyntaxError(f"unrecognised top-level line: {_line_of(tokens, b.i)}")
 
-        # Skip empty lines and comments
-        if not line or line.startswith("//"):
-            i += 1
-            continue
+    return sigs, defs
 
-        # Import statements:
-        # - import module: *              (import all)
-        # - import module: name1, name2   (selective import)
-        # - import module                 (import all, legacy syntax)
-        if line.startswith("import "):
-            import_stmt = line[7:].strip()  # Remove "import "
-
-            # Check if selective import (contains ':')
-            if ":" in import_stmt:
-                # Selective import: module: name1, name2
-                module_path, import_list = import_stmt.split(":", 1)
-                module_path = module_path.strip()
-                import_list = import_list.strip()
-
-                # Load the module
-                imported_sigs, imported_defs = _load_module(module_path)
-
-                # Check for wildcard
-                if import_list == "*":
-                    # Import everything
-                    sigs.update(imported_sigs)
-                    defs.update(imported_defs)
-                else:
-                    # Import only specified names
-                    names = [name.strip() for name in import_list.split(",")]
-                    for name in names:
-                        if name in imported_sigs:
-                            sigs[name] = imported_sigs[name]
-                        if name in imported_defs:
-                            defs[name] = imported_defs[name]
-            else:
-                # Legacy import: import module (imports all)
-                module_path = import_stmt
-                imported_sigs, imported_defs = _load_module(module_path)
-                sigs.update(imported_sigs)
-                defs.update(imported_defs)
 
-            i += 1
-            continue
+def _parse_file_shallow(path: str) -> tuple[Dict[str, Type], Dict[str, Exp], List[tuple]]:
+    """Parse one file without loading its imports; runs in a parse_many worker."""
+    imports: List[tuple] = []
+    sigs, defs = parse_tokens(lex(Path(path).read_text()), imports)
+    return sigs, defs, imports
 
-        # Type definitions: type Name(params) = { ... }
-        if line.startswith("type "):
-            # For now, skip type definitions (they don't produce defs/sigs)
-            i += 1
-            continue
 
-        # Macro definitions: macro name = (params) => body
-        if line.startswith("macro "):
-            from auric.ast import MacroDef
-
-            line = line[6:]  # strip "macro "
-
-            # Extract name
-            eq_pos = line.index("=")
-            name = line[:eq_pos].strip()
-            rest = line[eq_pos + 1:].strip()
-
-            # rest should be: (params) => { body }
-            if not rest.startswith("("):
-                raise SyntaxError(f"Macro definition requires (params) => body: {line}")
-
-            # Find parameter list
-            paren_depth = 0
-            paren_end = 0
-            for j, ch in enumerate(rest):
-                if ch == "(":
-                    paren_depth += 1
-                elif ch == ")":
-                    paren_depth -= 1
-                    if paren_depth == 0:
-                        paren_end = j
-                        break
-
-            param_str = rest[1:paren_end]  # Inside parens
-            params = [p.strip() for p in param_str.split(",") if p.strip()]
-
-            # Find =>
-            after_params = rest[paren_end + 1:].strip()
-            if not after_params.startswith("=>"):
-                raise SyntaxError(f"Macro requires => after parameters: {line}")
-
-            body_start = rest.index("=>") + 2
-            body_str = rest[body_start:].strip()
-
-            # Collect multi-line body if needed
-            body_lines = [body_str]
-            i += 1
-            brace_depth = body_str.count("{") - body_str.count("}")
-
-            while i < len(lines) and brace_depth > 0:
-                line_content = lines[i]
-                body_lines.append(line_content.lstrip())
-                brace_depth += line_content.count("{") - line_content.count("}")
-                i += 1
-
-            full_body = "\n".join(body_lines)
-            body_expr = parse_expr(full_body)
-
-            defs[name] = MacroDef(name, params, body_expr)
-            continue
+def _resolve_module(module_path: str, base_dir: Path) -> Path:
+    """Resolved file for an import in a file under base_dir, or its std location."""
+    au_file = module_path + ".au" if not module_path.endswith(".au") else module_path
+    local = base_dir / au_file
+    if local.exists():
+        return local.resolve()
+    return (Path(__file__).parent.parent.parent / au_file).resolve()
 
-        # Constant/function definitions: const name ...
-        if line.startswith("const "):
-            line = line[6:]  # strip "const "
 
-            # Check for := or = for binding
-            has_inferred = ":=" in line
-            has_explicit = "=" in line
+def parse_many(paths: List[str], max_workers: Optional[int] = None) -> tuple[Dict[str, Type], Dict[str, Exp]]:
+    """Parse several source files in parallel and merge them in dependency order.
 
-            if not (has_inferred or has_explicit):
-                raise SyntaxError(f"const requires ':=' or '=': {line}")
+    Each file is parsed in a worker process with its imports recorded but not
+    loaded. An import that names another file in `paths` resolves to that
+    file's merged result; any other import, e.g. std modules, goes through
+    `_load_module` and its cache. Every file sees its imports before its own
+    definitions, and the combined (sigs, defs) lists dependencies first.
+    Raises SyntaxError on an import cycle between the given files.
+    """
+    files = [str(Path(p).resolve()) for p in paths]
+    workers = min(len(files), max_workers or os.cpu_count() or 1)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor
 
-            # Handle := (inferred type declaration)
-            if has_inferred:
-                eq_pos = line.index(":=")
-                name = line[:eq_pos].strip()
-                rest = line[eq_pos + 2:].strip()
-            else:
-                # Handle : Type = (explicit type declaration) or just = (value binding)
-                eq_pos = line.index("=")
-                name = line[:eq_pos].strip()
-                rest = line[eq_pos + 1:].strip()
-
-            # Check if this is a function with params: (...)  => ...
-            # New syntax: const name: Type -> Type = (params) => { body }
-            if rest.startswith("(") and "=>" in rest:
-                # Function definition: const name: ParamTypes -> RetType = (params) => { body }
-                # The type signature should be in the name part (before =)
-
-                # Parse the type signature from name (if it has : in it)
-                if " : " in name or ": " in name:
-                    # Split name and type
-                    colon_idx = name.index(":")
-                    func_name = name[:colon_idx].strip()
-                    type_str = name[colon_idx + 1:].strip()
-                    fn_type = parse_type(type_str)
-                    sigs[func_name] = fn_type
-                    name = func_name
-
-                    # Extract parameter and return types from the function type
-                    param_types_list = []
-                    current_type = fn_type
-                    while isinstance(current_type, (Arrow, Forall)):
-                        if isinstance(current_type, Arrow):
-                            param_types_list.append(current_type.param)
-                            current_type = current_type.ret
-                        elif isinstance(current_type, Forall):
-                            param_types_list.append(None)  # Type parameter
-                            current_type = current_type.body
-                else:
-                    raise SyntaxError(f"Function definition requires type signature: {line}")
-
-                # Find closing paren for parameters
-                paren_depth = 0
-                paren_end = 0
-                for j, ch in enumerate(rest):
-                    if ch == "(":
-                        paren_depth += 1
-                    elif ch == ")":
-                        paren_depth -= 1
-                        if paren_depth == 0:
-                            paren_end = j
-                            break
-
-                if paren_depth != 0:
-                    raise SyntaxError(f"Unmatched parentheses in function definition: {line}")
-
-                params_str = rest[1:paren_end]
-                after_params = rest[paren_end + 1:].strip()
-
-                if not after_params.startswith("=>"):
-                    raise SyntaxError(f"Expected '=>' after params: {line}")
-
-                after_arrow = after_params[2:].strip()
-
-                # Body must start with {
-                if not after_arrow.startswith("{"):
-                    raise SyntaxError(f"Function body must be in braces {{ }}: {line}")
-
-                body_str = after_arrow.strip()
-
-                # Collect multiline body
-                rhs_lines = [body_str]
-                i += 1
-                brace_depth = body_str.count("{") - body_str.count("}")
-                while i < len(lines) and brace_depth > 0:
-                    next_line = lines[i]
-                    rhs_lines.append(next_line)
-                    brace_depth += next_line.count("{") - next_line.count("}")
-                    i += 1
-
-                full_body = "\n".join(rhs_lines)
-
-                # Parse parameters from params_str
-                # Just get the parameter names (types are already in the type signature)
-                param_names = []
-                if params_str.strip():
-                    # Split parameters by comma, but respect bracket nesting
-                    param_parts = []
-                    current_part = []
-                    bracket_depth = 0
-                    paren_depth = 0
-                    for ch in params_str:
-                        if ch == ',' and bracket_depth == 0 and paren_depth == 0:
-                            param_parts.append(''.join(current_part))
-                            current_part = []
-                        else:
-                            if ch == '[':
-                                bracket_depth += 1
-                            elif ch == ']':
-                                bracket_depth -= 1
-                            elif ch == '(':
-                                paren_depth += 1
-                            elif ch == ')':
-                                paren_depth -= 1
-                            current_part.append(ch)
-                    if current_part:
-                        param_parts.append(''.join(current_part))
-
-                    for param_part in param_parts:
-                        param_part = param_part.strip()
-                        # Parameter can be just a name, or name: Type
-                        if ":" in param_part:
-                            p_name = param_part.split(":", 1)[0].strip()
-                        else:
-                            p_name = param_part
-                        param_names.append(p_name)
-
-                # Parse body - keep braces so block detection works
-                full_body = full_body.strip()
-
-                # Parse body as expression (keep braces for block detection)
-                body = parse_expr(full_body)
-
-                # Determine which parameters are type parameters vs term parameters
-                # by looking at the function type
-                param_is_type = []
-                current_type = fn_type
-                while isinstance(current_type, (Arrow, Forall)):
-                    if isinstance(current_type, Forall):
-                        param_is_type.append(True)
-                        current_type = current_type.body
-                    elif isinstance(current_type, Arrow):
-                        param_is_type.append(False)
-                        current_type = current_type.ret
-                    else:
-                        break
-
-                # Fix scrutinee in pattern matching blocks
-                # If the body contains a Case with _scrutinee, replace it with the first term parameter
-                if param_names:
-                    # Find the first term parameter (not a type parameter)
-                    for idx in range(len(param_names)):
-                        if idx < len(param_is_type) and not param_is_type[idx]:
-                            body = _fix_scrutinee(body, "_scrutinee", param_names[idx])
-                            break
-
-                # Wrap body in lambdas/type abstractions
-                # Collect consecutive term parameters for multi-arg Lam
-                # Process in reverse to maintain correct nesting
-                idx = len(param_names) - 1
-                while idx >= 0:
-                    if idx < len(param_is_type) and param_is_type[idx]:
-                        # Type parameter - wrap with TyAbs
-                        body = TyAbs(param_names[idx], body)
-                        idx -= 1
-                    else:
-                        # Term parameter - collect all consecutive term params
-                        term_params = []
-                        while idx >= 0 and (idx >= len(param_is_type) or not param_is_type[idx]):
-                            term_params.insert(0, param_names[idx])
-                            idx -= 1
-                        # Create single multi-arg Lam
-                        if term_params:
-                            body = Lam(term_params, body)
-
-                defs[name] = body
-            else:
-                # Simple constant: const name : Type = expr  OR const name = expr
-                if " : " in line[:eq_pos]:
-                    # Has explicit type
-                    name_part, type_part = line[:eq_pos].split(" : ", 1)
-                    name = name_part.strip()
-                    ty_src = type_part.strip()
-                    sigs[name] = parse_type(ty_src)
-
-                # Collect RHS value
-                rhs_lines = [rest]
-                i += 1
-
-                # Track brace depth to collect multi-line expressions
-                brace_depth = rest.count("{") - rest.count("}")
-                while i < len(lines):
-                    line_content = lines[i]
-                    # Stop if we hit an empty line and braces are balanced
-                    if not line_content.strip() and brace_depth == 0:
-                        break
-                    # Stop if line doesn't start with whitespace and braces are balanced
-                    if line_content and line_content[0] not in " \t" and brace_depth == 0:
-                        break
-
-                    rhs_lines.append(line_content.lstrip())
-                    brace_depth += line_content.count("{") - line_content.count("}")
-                    i += 1
-
-                    # Stop once braces are balanced
-                    if brace_depth == 0:
-                        break
-
-                body_src = "\n".join(rhs_lines)
-                defs[name] = parse_expr(body_src)
-            continue
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            parsed = dict(zip(files, pool.map(_parse_file_shallow, files)))
+    else:
+        parsed = {f: _parse_file_shallow(f) for f in files}
 
-        raise SyntaxError(f"unrecognised top-level line: {line}")
+    merged: Dict[str, tuple[Dict[str, Type], Dict[str, Exp]]] = {}
+    visiting: List[str] = []
+    sigs: Dict[str, Type] = {}
+    defs: Dict[str, Exp] = {}
 
+    def visit(f: str) -> tuple[Dict[str, Type], Dict[str, Exp]]:
+        if f in merged:
+            return merged[f]
+        if f in visiting:
+            cycle = visiting[visiting.index(f):] + [f]
+            raise SyntaxError("import cycle: " + " -> ".join(Path(c).name for c in cycle))
+        visiting.append(f)
+        own_sigs, own_defs, imports = parsed[f]
+        file_sigs: Dict[str, Type] = {}
+        file_defs: Dict[str, Exp] = {}
+        for module_path, names in imports:
+            target = str(_resolve_module(module_path, Path(f).parent))
+            if target in parsed:
+                imported = visit(target)
+            else:
+                imported = _load_module(target if Path(target).exists() else module_path)
+            _merge_import(names, *imported, file_sigs, file_defs)
+        file_sigs.update(own_sigs)
+        file_defs.update(own_defs)
+        visiting.pop()
+        merged[f] = (file_sigs, file_defs)
+        sigs.update(file_sigs)
+        defs.update(file_defs)
+        return merged[f]
+
+    for f in files:
+        visit(f)
     return sigs, defs
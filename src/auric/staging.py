@@ -4,10 +4,11 @@ This module implements "normalization by evaluation" - running code at compile-t
 and converting results back to AST for inlining.
 """
 
-from typing import Dict, Optional
-from auric.ast import Exp, Var, App, Record
+from typing import Dict, Optional, Tuple
+from auric.ast import Exp, Var, App, Record, nat_literal
 from auric.evaluator import eval_exp, builtin_values
-from auric.memory import Heap, RefValue
+from auric.memory import Heap, Nat, RefValue
+from auric.visitor import Visitor, handles
 
 
 def value_to_ast(value: RefValue) -> Optional[Exp]:
@@ -16,11 +17,20 @@ def value_to_ast(value: RefValue) -> Optional[Exp]:
     This enables inlining of compile-time evaluated values.
     Returns None if the value can't be represented as AST.
     """
-    # Get the data from the RefValue
-    data = value.data
+    return _value_converter.visit(value.data)
+
+
+class _ValueConverter(Visitor):
+    """value_to_ast: dispatches on the representation of a value's data."""
+
+    # Natural numbers become a single literal rather than a @succ chain
+    @handles(Nat)
+    def nat(self, data: Nat, ctx: None) -> Exp:
+        return nat_literal(data.n)
 
     # Handle tuples (constructor applications and records)
-    if isinstance(data, tuple):
+    @handles(tuple)
+    def constructed(self, data: tuple, ctx: None) -> Optional[Exp]:
         if not data:
             return None
 
@@ -51,19 +61,33 @@ def value_to_ast(value: RefValue) -> Optional[Exp]:
             arg_ast = value_to_ast(data[1])
             if arg_ast is None:
                 return None
-            return App(Var(tag), arg_ast)
+            return App(Var(tag), [arg_ast])
 
-        # Binary constructors: cons(h, t), Pair(a, b)
+        # Binary constructors: cons(h, t), Pair(a, b). A spine of the same
+        # constructor (a cons list) is walked in a loop, not recursively.
         if len(data) == 3:
-            arg1_ast = value_to_ast(data[1])
-            arg2_ast = value_to_ast(data[2])
-            if arg1_ast is None or arg2_ast is None:
+            heads = []
+            while isinstance(data, tuple) and len(data) == 3 and data[0] == tag:
+                head_ast = value_to_ast(data[1])
+                if head_ast is None:
+                    return None
+                heads.append(head_ast)
+                data = data[2].data
+            result = self.visit(data)
+            if result is None:
                 return None
-            # cons(h, t) → (cons h) t
-            return App(App(Var(tag), arg1_ast), arg2_ast)
+            for head_ast in reversed(heads):
+                result = App(Var(tag), [head_ast, result])
+            return result
+
+        return None
 
     # Can't convert functions, effects, or other runtime values
-    return None
+    def generic_visit(self, data: object, ctx: None) -> None:
+        return None
+
+
+_value_converter = _ValueConverter()
 
 
 def try_eval_at_comptime(expr: Exp, comptime_env: Dict[str, RefValue]) -> Optional[Exp]:
@@ -90,6 +114,33 @@ def try_eval_at_comptime(expr: Exp, comptime_env: Dict[str, RefValue]) -> Option
         return None
 
 
+def stage_definition(expr: Exp, comptime_env: Dict[str, RefValue]) -> Tuple[Exp, Optional[RefValue], bool]:
+    """Stage one definition against the values of the definitions before it.
+
+    Returns (ast, value, normalized): the normalized AST if the definition
+    could be evaluated and converted back (else the original), its
+    compile-time value if it has one, and whether it was normalized.
+    """
+    # Try to evaluate at compile-time
+    normalized = try_eval_at_comptime(expr, comptime_env)
+
+    if normalized is not None:
+        # Successfully evaluated! Re-evaluate the normalized AST to get the
+        # value subsequent definitions see
+        try:
+            return normalized, eval_exp(normalized, comptime_env), True
+        except:
+            # If re-evaluation fails, just use original
+            return expr, None, False
+
+    # Can't evaluate at compile-time, keep original. Try to evaluate anyway
+    # for the environment (might work at runtime with more context)
+    try:
+        return expr, eval_exp(expr, comptime_env), False
+    except:
+        return expr, None, False
+
+
 def evaluate_consts_at_comptime(defs: Dict[str, Exp]) -> Dict[str, Exp]:
     """Evaluate const definitions at compile-time and inline results.
 
@@ -106,33 +157,12 @@ def evaluate_consts_at_comptime(defs: Dict[str, Exp]) -> Dict[str, Exp]:
     comptime_count = 0
 
     for name, expr in defs.items():
-        # Try to evaluate at compile-time
-        normalized = try_eval_at_comptime(expr, comptime_env)
-
-        if normalized is not None:
-            # Successfully evaluated! Use normalized AST
-            optimized_defs[name] = normalized
-            comptime_count += 1
-
-            # Add to environment for subsequent definitions
-            # Re-evaluate to get the runtime value
-            try:
-                val = eval_exp(normalized, comptime_env)
-                comptime_env[name] = val
-            except:
-                # If re-evaluation fails, just use original
-                optimized_defs[name] = expr
-        else:
-            # Can't evaluate at compile-time, keep original
-            optimized_defs[name] = expr
-
-            # Try to evaluate anyway for environment
-            # (might work at runtime with more context)
-            try:
-                val = eval_exp(expr, comptime_env)
-                comptime_env[name] = val
-            except:
-                pass
+        optimized_defs[name], value, normalized = stage_definition(expr, comptime_env)
+        comptime_count += normalized
+
+        # Add to environment for subsequent definitions
+        if value is not None:
+            comptime_env[name] = value
 
     if comptime_count > 0:
         print(f"✓ Normalized {comptime_count} definitions at compile-time")
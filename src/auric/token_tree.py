@@ -11,7 +11,7 @@ Token Tree Types:
 """
 
 from dataclasses import dataclass
-from typing import List, Union
+from typing import Hashable, List, Union
 
 
 @dataclass
@@ -49,10 +49,55 @@ class TTSequence:
         return ' '.join(str(item) for item in self.items)
 
 
+class TTSlice(TTSequence):
+    """A sequence viewing parent[start:end] of a shared items list.
+
+    Macro matching captures slices without copying; `items` builds the list
+    only when a capture is substituted into an expansion.
+    """
+
+    __slots__ = ("parent", "start", "end")
+
+    def __init__(self, parent: List['TokenTree'], start: int, end: int):
+        self.parent = parent
+        self.start = start
+        self.end = end
+
+    @property
+    def items(self) -> List['TokenTree']:
+        return self.parent[self.start:self.end]
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __eq__(self, other):
+        if isinstance(other, TTSequence):
+            return self.items == other.items
+        return NotImplemented
+
+
 # Token tree can be any of these types
 TokenTree = Union[TTToken, TTGroup, TTSequence]
 
 
+def structural_key(tt: TokenTree) -> Hashable:
+    """Hashable key equal for structurally identical token trees.
+
+    Tokens key as their text, groups as (delim, contents) and sequences as a
+    tuple of their items' keys; slices are keyed without copying their items.
+    """
+    if isinstance(tt, TTToken):
+        return tt.value
+    if isinstance(tt, TTGroup):
+        return (tt.delim, structural_key(tt.contents))
+    if isinstance(tt, TTSlice):
+        parent = tt.parent
+        return tuple(structural_key(parent[i]) for i in range(tt.start, tt.end))
+    if isinstance(tt, TTSequence):
+        return tuple(structural_key(item) for item in tt.items)
+    return tt
+
+
 def group_tokens(tokens: List[str]) -> TokenTree:
     """Convert a flat list of tokens into a token tree.
 
@@ -114,17 +159,26 @@ def group_tokens(tokens: List[str]) -> TokenTree:
 def ungroup_tokens(tt: TokenTree) -> List[str]:
     """Convert a token tree back into a flat list of tokens.
 
-    Used after macro expansion to get tokens for final parsing.
+    Used after macro expansion to get tokens for final parsing. Tokens are
+    appended to one list, so flattening is linear in the size of the tree.
     """
-    if isinstance(tt, TTToken):
-        return [tt.value]
-    elif isinstance(tt, TTGroup):
-        close = {'(': ')', '{': '}', '[': ']'}[tt.delim]
-        return [tt.delim] + ungroup_tokens(tt.contents) + [close]
-    elif isinstance(tt, TTSequence):
-        result = []
-        for item in tt.items:
-            result.extend(ungroup_tokens(item))
-        return result
-    else:
-        raise TypeError(f"Unknown token tree type: {type(tt)}")
+    result: List[str] = []
+
+    def walk(node: TokenTree) -> None:
+        if isinstance(node, TTToken):
+            result.append(node.value)
+        elif isinstance(node, TTGroup):
+            result.append(node.delim)
+            walk(node.contents)
+            result.append(_CLOSE[node.delim])
+        elif isinstance(node, TTSequence):
+            for item in node.items:
+                walk(item)
+        else:
+            raise TypeError(f"Unknown token tree type: {type(node)}")
+
+    walk(tt)
+    return result
+
+
+_CLOSE = {'(': ')', '{': '}', '[': ']'}
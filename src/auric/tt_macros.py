@@ -10,10 +10,11 @@ Macros operate on token trees before parsing, allowing them to define
 custom syntax.
 """
 
-from dataclasses import dataclass
-from typing import Dict, List, Tuple, Optional
-from auric.token_tree import TokenTree, TTToken, TTGroup, TTSequence, group_tokens, ungroup_tokens
-from auric.macro_patterns import parse_pattern, match_pattern, substitute_captures, PatternElement
+from dataclasses import dataclass, field
+from typing import Dict, Hashable, List, Tuple, Optional
+from auric import macro_profile
+from auric.token_tree import TokenTree, TTToken, TTGroup, TTSequence, TTSlice, group_tokens, structural_key, ungroup_tokens
+from auric.macro_patterns import PatternElement, PatternMatcher, compile_pattern, parse_pattern, substitute_captures
 
 
 @dataclass
@@ -21,6 +22,11 @@ class MacroRule:
     """A single pattern -> expansion rule in a macro definition."""
     pattern: List[PatternElement]
     expansion: List[PatternElement]
+    matcher: PatternMatcher = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        # Compile the pattern once; it is matched at many positions
+        self.matcher = compile_pattern(self.pattern)
 
     def try_expand(self, tt: TokenTree) -> Optional[TokenTree]:
         """Try to expand this rule against a token tree.
@@ -28,7 +34,8 @@ class MacroRule:
         Returns:
             Expanded token tree if pattern matches, None otherwise
         """
-        captures = match_pattern(self.pattern, tt)
+        items = tt.items if isinstance(tt, TTSequence) else [tt]
+        captures = self.matcher.match(items)
         if captures is not None:
             return substitute_captures(self.expansion, captures)
         return None
@@ -51,6 +58,129 @@ class TTMacro:
                 return result
         return None
 
+    def match(self, items: List[TokenTree]) -> Optional[Tuple[int, Dict[str, TokenTree]]]:
+        """(rule index, captures) of the first rule matching all of `items`."""
+        profiler = macro_profile.current
+        if profiler is not None:
+            start = macro_profile.clock()
+            found = self._match(items)
+            profiler.attempt("tt", self.name, macro_profile.clock() - start)
+            return found
+        return self._match(items)
+
+    def _match(self, items: List[TokenTree]) -> Optional[Tuple[int, Dict[str, TokenTree]]]:
+        for i, rule in enumerate(self.rules):
+            captures = rule.matcher.match(items)
+            if captures is not None:
+                return i, captures
+        return None
+
+    def match_prefix(self, items: List[TokenTree],
+                     start: int) -> Optional[Tuple[int, int, Dict[str, TokenTree]]]:
+        """(end, rule index, captures) of the shortest invocation at items[start:].
+
+        Among rules matching the same shortest range, the first rule wins.
+        """
+        profiler = macro_profile.current
+        if profiler is not None:
+            began = macro_profile.clock()
+            found = self._match_prefix(items, start)
+            profiler.attempt("tt", self.name, macro_profile.clock() - began)
+            return found
+        return self._match_prefix(items, start)
+
+    def _match_prefix(self, items: List[TokenTree],
+                      start: int) -> Optional[Tuple[int, int, Dict[str, TokenTree]]]:
+        lead = items[start].value if isinstance(items[start], TTToken) else None
+        best = None
+        for i, rule in enumerate(self.rules):
+            leading = rule.matcher.leading
+            if leading is not None and leading != lead:
+                continue
+            end = rule.matcher.match_end(items, start)
+            if end is not None and (best is None or end < best[0]):
+                best = (end, i)
+        if best is None:
+            return None
+        # Only the rule that fires captures anything
+        end, i = best
+        return end, i, self.rules[i].matcher.match(items, start, end)
+
+    def expand_prefix(self, items: List[TokenTree], start: int) -> Optional[Tuple[int, TokenTree]]:
+        """Expand the shortest invocation of this macro at items[start:].
+
+        Returns (end, expansion), or None if no rule matches any items[start:end].
+        Among rules matching the same shortest range, the first rule wins.
+        """
+        match = self.match_prefix(items, start)
+        if match is None:
+            return None
+        end, i, captures = match
+        return end, substitute_captures(self.rules[i].expansion, captures)
+
+
+class ExpansionCache:
+    """Fully expanded macro output, keyed by macro, rule and captures.
+
+    An invocation's expansion depends only on the rule that fired and the
+    structure of what it captured, so repeated identical invocations reuse
+    the tree built (and recursively expanded) the first time. Cached trees
+    are shared and must not be mutated.
+    """
+
+    def __init__(self):
+        self.entries: Dict[Hashable, TokenTree] = {}
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(macro: TTMacro, rule: int, captures: Dict[str, TokenTree]) -> Hashable:
+        return (macro.name, rule, tuple((name, structural_key(tt)) for name, tt in captures.items()))
+
+    def get(self, key: Hashable) -> Optional[TokenTree]:
+        found = self.entries.get(key)
+        if found is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return found
+
+    def put(self, key: Hashable, expanded: TokenTree) -> None:
+        self.entries[key] = expanded
+
+    def stats(self) -> Dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "entries": len(self.entries)}
+
+
+class MacroIndex:
+    """Macros indexed by the literal token their rules start with.
+
+    A macro with a rule that starts with a pattern variable is a candidate at
+    every position. Candidates keep the macros' definition order.
+    """
+
+    def __init__(self, macros: Dict[str, TTMacro]):
+        self.by_leading: Dict[str, List[Tuple[int, TTMacro]]] = {}
+        self.anywhere: List[Tuple[int, TTMacro]] = []
+        for order, macro in enumerate(macros.values()):
+            leads = {rule.matcher.leading for rule in macro.rules}
+            if None in leads:
+                self.anywhere.append((order, macro))
+            else:
+                for lead in leads:
+                    self.by_leading.setdefault(lead, []).append((order, macro))
+        self._candidates: Dict[Optional[str], List[TTMacro]] = {}
+        self.cache = ExpansionCache()
+
+    def candidates(self, item: TokenTree) -> List[TTMacro]:
+        """Macros that may match starting at `item`, in definition order."""
+        lead = item.value if isinstance(item, TTToken) else None
+        found = self._candidates.get(lead)
+        if found is None:
+            ordered = sorted(self.by_leading.get(lead, []) + self.anywhere, key=lambda entry: entry[0])
+            found = self._candidates[lead] = [macro for _, macro in ordered]
+        return found
+
 
 def parse_macro_definition(tt: TokenTree) -> TTMacro:
     """Parse a macro definition from a token tree.
@@ -189,17 +319,50 @@ def collect_tt_macros(tt: TokenTree) -> Tuple[Dict[str, TTMacro], List[TokenTree
     return macros, other_defs
 
 
-def expand_tt_macros(tt: TokenTree, macros: Dict[str, TTMacro], depth: int = 0) -> TokenTree:
+def expand_tt_macros(tt: TokenTree, macros: Dict[str, TTMacro], depth: int = 0,
+                     cache: Optional[ExpansionCache] = None) -> TokenTree:
     """Recursively expand macros in a token tree.
 
     Args:
         tt: Token tree to expand
         macros: Dictionary of macro definitions
         depth: Recursion depth (for preventing infinite loops)
+        cache: Expansion cache to use and fill; pass one to read its
+            hit/miss counters afterwards. It must only be reused with the
+            same macros.
 
     Returns:
         Expanded token tree
     """
+    index = MacroIndex(macros)
+    if cache is not None:
+        index.cache = cache
+    return _expand(tt, index, depth)
+
+
+def _expand_invocation(macro: TTMacro, rule: int, captures: Dict[str, TokenTree],
+                       index: MacroIndex, depth: int, invocation: TokenTree) -> TokenTree:
+    """Substitute captures into a rule's expansion and expand the result, memoized.
+
+    `invocation` is the matched token tree, only measured when profiling.
+    """
+    profiler = macro_profile.current
+    if profiler is not None:
+        start = macro_profile.clock()
+    key = ExpansionCache.key(macro, rule, captures)
+    expanded = index.cache.get(key)
+    cached = expanded is not None
+    if not cached:
+        result = substitute_captures(macro.rules[rule].expansion, captures)
+        expanded = _expand(result, index, depth + 1)
+        index.cache.put(key, expanded)
+    if profiler is not None:
+        profiler.expansion("tt", macro.name, macro_profile.clock() - start,
+                           macro_profile.tt_size(invocation), macro_profile.tt_size(expanded), cached)
+    return expanded
+
+
+def _expand(tt: TokenTree, index: MacroIndex, depth: int) -> TokenTree:
     if depth > 100:
         raise RecursionError("Macro expansion depth exceeded")
 
@@ -208,45 +371,41 @@ def expand_tt_macros(tt: TokenTree, macros: Dict[str, TTMacro], depth: int = 0)
 
     elif isinstance(tt, TTGroup):
         # Expand contents of group
-        expanded_contents = expand_tt_macros(tt.contents, macros, depth)
+        expanded_contents = _expand(tt.contents, index, depth)
         return TTGroup(tt.delim, expanded_contents)
 
     elif isinstance(tt, TTSequence):
+        items = tt.items
         # Try to match entire sequence against macro patterns
-        for macro in macros.values():
-            result = macro.try_expand(tt)
-            if result is not None:
-                # Expansion succeeded - recursively expand result
-                return expand_tt_macros(result, macros, depth + 1)
-
-        # No macro matched entire sequence - try to find macro invocations within it
+        if items:
+            for macro in index.candidates(items[0]):
+                match = macro.match(items)
+                if match is not None:
+                    # Expansion succeeded - recursively expand result
+                    return _expand_invocation(macro, match[0], match[1], index, depth, tt)
+
+        # No macro matched entire sequence - find macro invocations within it.
+        # At each position only macros indexed under that token are tried, and
+        # each reports the end of its shortest match in one pass.
         expanded_items = []
         i = 0
-        while i < len(tt.items):
-            # Try to match a macro starting at position i
-            matched = False
-            for macro in macros.values():
-                # Try to match against a subsequence starting at i
-                for end in range(i + 1, len(tt.items) + 1):
-                    subseq = TTSequence(tt.items[i:end])
-                    result = macro.try_expand(subseq)
-                    if result is not None:
-                        # Found a match! Expand it and add to result
-                        expanded = expand_tt_macros(result, macros, depth + 1)
-                        if isinstance(expanded, TTSequence):
-                            expanded_items.extend(expanded.items)
-                        else:
-                            expanded_items.append(expanded)
-                        i = end  # Skip past the matched tokens
-                        matched = True
-                        break
-                if matched:
+        while i < len(items):
+            for macro in index.candidates(items[i]):
+                match = macro.match_prefix(items, i)
+                if match is not None:
+                    # Found a match! Expand it and add to result
+                    end, rule, captures = match
+                    expanded = _expand_invocation(macro, rule, captures, index, depth,
+                                                  TTSlice(items, i, end))
+                    if isinstance(expanded, TTSequence):
+                        expanded_items.extend(expanded.items)
+                    else:
+                        expanded_items.append(expanded)
+                    i = end  # Skip past the matched tokens
                     break
-
-            if not matched:
+            else:
                 # No macro matched - expand this item and move on
-                expanded = expand_tt_macros(tt.items[i], macros, depth)
-                expanded_items.append(expanded)
+                expanded_items.append(_expand(items[i], index, depth))
                 i += 1
 
         return TTSequence(expanded_items)
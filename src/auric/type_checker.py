@@ -41,6 +41,7 @@ from auric.types import (
     subst,
     subst_index,
 )
+from auric.visitor import Visitor, handles
 
 Env = Dict[str, any]
 
@@ -130,13 +131,21 @@ def check(g: Dict[str, Type], e: Exp, t: Type) -> None:
 
 def synth(g: Dict[str, Type], e: Exp) -> Type:
     """Synthesize (infer) the type of expression e in context g."""
-    if isinstance(e, Var):
+    return _synthesizer.visit(e, g)
+
+
+class _Synthesizer(Visitor):
+    """synth, one handler per expression type."""
+
+    @handles(Var)
+    def var(self, e: Var, g: Dict[str, Type]) -> Type:
         ty = g[e.name]
         # Automatically instantiate polymorphic types
         return instantiate(ty)
 
-    if isinstance(e, App):
-        fn_ty = synth(g, e.fn)
+    @handles(App)
+    def app(self, e: App, g: Dict[str, Type]) -> Type:
+        fn_ty = self.visit(e.fn, g)
         # Instantiate if still polymorphic after initial synth
         fn_ty = instantiate(fn_ty)
         # Type check each argument in sequence (multi-arg application)
@@ -148,14 +157,16 @@ def synth(g: Dict[str, Type], e: Exp) -> Type:
             current_ty = current_ty.ret
         return current_ty
 
-    if isinstance(e, TyAppE):
-        fn_ty = synth(g, e.fn)
+    @handles(TyAppE)
+    def ty_app(self, e: TyAppE, g: Dict[str, Type]) -> Type:
+        fn_ty = self.visit(e.fn, g)
         if not isinstance(fn_ty, Forall):
             raise TypeError(f"type-apply non-generic value: {fn_ty} (expr: {e.fn})")
         return subst(fn_ty.body, fn_ty.tv, e.arg_ty)
 
-    if isinstance(e, Case):
-        scr_ty = synth(g, e.scrut)
+    @handles(Case)
+    def case(self, e: Case, g: Dict[str, Type]) -> Type:
+        scr_ty = self.visit(e.scrut, g)
         scr_shape = shape_of(scr_ty)
         if scr_shape is None:
             raise TypeError("case scrutinee must have a data-constructor shape")
@@ -211,7 +222,7 @@ def synth(g: Dict[str, Type], e: Exp) -> Type:
             for n in binds:
                 loc.setdefault(n, ShapeT(Top()))
 
-            branch_ty = synth(loc, rhs)
+            branch_ty = self.visit(rhs, loc)
 
             if res_ty is None:
                 res_ty = branch_ty
@@ -221,7 +232,8 @@ def synth(g: Dict[str, Type], e: Exp) -> Type:
         assert res_ty is not None
         return res_ty
 
-    if isinstance(e, Perform):
+    @handles(Perform)
+    def perform(self, e: Perform, g: Dict[str, Type]) -> Type:
         # Effect invocation: Print("hello"), Read(), etc
         # Look up the effect in the context
         if e.effect_name not in g:
@@ -230,17 +242,18 @@ def synth(g: Dict[str, Type], e: Exp) -> Type:
         if not isinstance(effect_ty, Arrow):
             raise TypeError(f"{e.effect_name} is not an effect")
         # Check the argument type
-        arg_ty = synth(g, e.args)
+        arg_ty = self.visit(e.args, g)
         if not is_subtype(arg_ty, effect_ty.param):
             raise TypeError(f"Effect {e.effect_name} expects {effect_ty.param}, got {arg_ty}")
         # Return the effect's return type
         return effect_ty.ret
 
-    if isinstance(e, Handle):
+    @handles(Handle)
+    def handle(self, e: Handle, g: Dict[str, Type]) -> Type:
         # Handle expression: handle expr { Effect(...) -> handler; ... }
         # Type of handle expression is the type of the body expression
         # (handlers don't change the type, they just implement effects)
-        body_ty = synth(g, e.body)
+        body_ty = self.visit(e.body, g)
 
         # Verify that all handlers have consistent types
         for effect_name, (binds, handler_body) in e.handlers.items():
@@ -261,24 +274,26 @@ def synth(g: Dict[str, Type], e: Exp) -> Type:
 
             # Handler body should return the same type as the handled body
             # (the resume continuation returns this type)
-            handler_ty = synth(handler_ctx, handler_body)
+            handler_ty = self.visit(handler_body, handler_ctx)
             # Handler return type should be compatible with body type
             # (it's what gets returned when the effect is handled)
 
         return body_ty
 
-    if isinstance(e, Record):
+    @handles(Record)
+    def record(self, e: Record, g: Dict[str, Type]) -> Type:
         # Synthesize type for record literal
         field_types = {}
         for field_name, field_expr in e.fields.items():
-            field_types[field_name] = synth(g, field_expr)
+            field_types[field_name] = self.visit(field_expr, g)
         return RecordT(field_types)
 
-    if isinstance(e, FieldAccess):
+    @handles(FieldAccess)
+    def field_access(self, e: FieldAccess, g: Dict[str, Type]) -> Type:
         # Synthesize type for field access
         from auric.types import normalize_type
 
-        record_ty = synth(g, e.record)
+        record_ty = self.visit(e.record, g)
         # Normalize Vec to RecordT if possible
         record_ty = normalize_type(record_ty)
 
@@ -289,8 +304,13 @@ def synth(g: Dict[str, Type], e: Exp) -> Type:
         return record_ty.fields[e.field]
 
     # Constant literals (int, float, char, bool)
-    if isinstance(e, Const):
+    @handles(Const)
+    def const(self, e: Const, g: Dict[str, Type]) -> Type:
         # Type is already explicit in the Const node
         return e.ty
 
-    raise TypeError("need annotation")
+    def generic_visit(self, e: Exp, g: Dict[str, Type]) -> Type:
+        raise TypeError("need annotation")
+
+
+_synthesizer = _Synthesizer()
@@ -95,7 +95,11 @@ def is_subtype_shape(a: Shape, b: Shape) -> bool:
 
 
 def normalize_type(t: Type) -> Type:
-    """Normalize a type by expanding type-level macros (e.g., Vec to RecordT)."""
+    """Normalize a type by expanding type-level macros (e.g., Vec to RecordT).
+
+    Expansions are cached per distinct type (`macros.type_expansions`), so
+    the normalization at every level of is_subtype is a lookup.
+    """
     from auric.macros import expand_type_macros
     return expand_type_macros(t)
 
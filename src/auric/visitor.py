@@ -0,0 +1,184 @@
+"""Type-keyed dispatch for passes over ASTs and runtime values.
+
+A pass subclasses `Visitor` and marks each handler with the types it
+handles:
+
+    class CountVars(Visitor):
+        def __init__(self):
+            self.count = 0
+
+        @handles(Var)
+        def var(self, e, ctx):
+            self.count += 1
+
+        @handles(App)
+        def app(self, e, ctx):
+            self.visit(e.fn)
+            for arg in e.args:
+                self.visit(arg)
+
+`visit(node, ctx)` looks up `type(node)` in a table built once when the
+class is defined and calls the handler with the node and `ctx`, the one
+piece of state the pass threads down (an environment, a substitution, ...;
+None for passes without one). A fixed argument rather than `*args` keeps
+the call as cheap as a direct one. Every node type costs one dict lookup,
+where a chain of `isinstance` checks costs one failed check per case above
+it. Types without a handler go to `generic_visit`. Dispatch is on the exact
+type, so handlers for a base class do not cover its subclasses.
+
+`Rewriter` is a Visitor whose handlers rebuild each expression from its
+rewritten children and return the node itself when no child changed.
+Rewriting passes override only the cases they care about.
+"""
+
+from __future__ import annotations
+
+from typing import Any, Callable, Dict
+
+from auric.ast import (
+    App,
+    Case,
+    FieldAccess,
+    Handle,
+    If,
+    Lam,
+    Let,
+    Perform,
+    Record,
+    Seq,
+    TyAbs,
+    TyAppE,
+    unchanged,
+)
+
+
+def handles(*types: type) -> Callable[[Callable], Callable]:
+    """Mark a Visitor method as the handler for values of these exact types."""
+
+    def mark(method: Callable) -> Callable:
+        method._handles = types
+        return method
+
+    return mark
+
+
+class _Table(dict):
+    """type -> handler function, falling back to generic_visit."""
+
+    __slots__ = ("fallback",)
+
+    def __missing__(self, t: type) -> Callable:
+        return self.fallback
+
+
+class Visitor:
+    """Base of passes that dispatch on the type of the visited value."""
+
+    # type -> name of the method handling it, accumulated along the bases
+    _handler_names: Dict[type, str] = {}
+    _table: _Table
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        names = dict(cls._handler_names)
+        for name, member in vars(cls).items():
+            for t in getattr(member, "_handles", ()):
+                names[t] = name
+        cls._handler_names = names
+        # Resolve names on this class, so overriding a handler method by
+        # name (without repeating @handles) replaces it in the table
+        table = _Table((t, getattr(cls, name)) for t, name in names.items())
+        table.fallback = cls.generic_visit
+        cls._table = table
+
+    def visit(self, node: Any, ctx: Any = None) -> Any:
+        """Dispatch `node` (and `ctx`) to the handler for its type."""
+        return self._table[type(node)](self, node, ctx)
+
+    def generic_visit(self, node: Any, ctx: Any) -> Any:
+        """Handle a value whose type has no handler; does nothing by default."""
+        return None
+
+
+class Rewriter(Visitor):
+    """Rebuilds expressions from rewritten children, keeping unchanged nodes.
+
+    Expressions without subexpressions, and those a rewrite does not look
+    into (macro invocations, spreads, literals), are returned as they are.
+    """
+
+    def generic_visit(self, e: Any, ctx: Any) -> Any:
+        return e
+
+    @handles(Lam)
+    def rewrite_lam(self, e: Lam, ctx: Any) -> Any:
+        body = self.visit(e.body, ctx)
+        return e if body is e.body else Lam(e.params, body)
+
+    @handles(App)
+    def rewrite_app(self, e: App, ctx: Any) -> Any:
+        fn = self.visit(e.fn, ctx)
+        new_args = [self.visit(arg, ctx) for arg in e.args]
+        return e if fn is e.fn and unchanged(new_args, e.args) else App(fn, new_args)
+
+    @handles(TyAbs)
+    def rewrite_tyabs(self, e: TyAbs, ctx: Any) -> Any:
+        body = self.visit(e.body, ctx)
+        return e if body is e.body else TyAbs(e.tv, body)
+
+    @handles(TyAppE)
+    def rewrite_tyappe(self, e: TyAppE, ctx: Any) -> Any:
+        fn = self.visit(e.fn, ctx)
+        return e if fn is e.fn else TyAppE(fn, e.arg_ty)
+
+    @handles(Case)
+    def rewrite_case(self, e: Case, ctx: Any) -> Any:
+        scr = self.visit(e.scr, ctx)
+        rhss = [self.visit(rhs, ctx) for _, rhs in e.alts.values()]
+        return self.rebuild_case(e, scr, rhss)
+
+    @staticmethod
+    def rebuild_case(e: Case, scr: Any, rhss: list) -> Case:
+        """`e` with a new scrutinee and right-hand sides, or `e` if they are the same."""
+        if scr is e.scr and unchanged(rhss, (rhs for _, rhs in e.alts.values())):
+            return e
+        return Case(scr, {tag: (binds, rhs) for (tag, (binds, _)), rhs in zip(e.alts.items(), rhss)})
+
+    @handles(Perform)
+    def rewrite_perform(self, e: Perform, ctx: Any) -> Any:
+        effect_args = self.visit(e.args, ctx)
+        return e if effect_args is e.args else Perform(e.effect_name, effect_args)
+
+    @handles(Handle)
+    def rewrite_handle(self, e: Handle, ctx: Any) -> Any:
+        body = self.visit(e.body, ctx)
+        handlers = [self.visit(handler, ctx) for _, handler in e.handlers.values()]
+        if body is e.body and unchanged(handlers, (handler for _, handler in e.handlers.values())):
+            return e
+        return Handle(body, {eff: (binds, handler) for (eff, (binds, _)), handler in zip(e.handlers.items(), handlers)})
+
+    @handles(Record)
+    def rewrite_record(self, e: Record, ctx: Any) -> Any:
+        values = [self.visit(val, ctx) for val in e.fields.values()]
+        return e if unchanged(values, e.fields.values()) else Record(dict(zip(e.fields, values)))
+
+    @handles(FieldAccess)
+    def rewrite_field_access(self, e: FieldAccess, ctx: Any) -> Any:
+        record = self.visit(e.record, ctx)
+        return e if record is e.record else FieldAccess(record, e.field)
+
+    @handles(If)
+    def rewrite_if(self, e: If, ctx: Any) -> Any:
+        parts = [self.visit(part, ctx) for part in (e.cond, e.then_branch, e.else_branch)]
+        return e if unchanged(parts, (e.cond, e.then_branch, e.else_branch)) else If(*parts)
+
+    @handles(Seq)
+    def rewrite_seq(self, e: Seq, ctx: Any) -> Any:
+        exprs = [self.visit(expr, ctx) for expr in e.exprs]
+        return e if unchanged(exprs, e.exprs) else Seq(exprs)
+
+    @handles(Let)
+    def rewrite_let(self, e: Let, ctx: Any) -> Any:
+        value = self.visit(e.value, ctx)
+        body = self.visit(e.body, ctx)
+        return e if value is e.value and body is e.body else Let(e.name, value, body)
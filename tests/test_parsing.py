@@ -5,7 +5,7 @@ import sys
 
 sys.path.insert(0, "src")
 
-from auric.lexer import Buf, lex
+from auric.lexer import BUILTIN, INT, SYMBOL, TYPE, VAR, Buf, lex
 from auric.parser import _atom, _expr, parse, parse_expr
 
 
@@ -16,6 +16,17 @@ def test_lex_simple():
     assert tokens == expected, f"Got {tokens}, expected {expected}"
 
 
+def test_lex_kinds_and_spans():
+    """Test that tokens are classified once and carry source offsets."""
+    src = "f(Nat, @zero, 42)"
+    tokens = lex(src)
+    assert list(tokens.kinds) == [VAR, SYMBOL, TYPE, SYMBOL, BUILTIN, SYMBOL, INT, SYMBOL]
+    start, end = tokens.span(2)
+    assert src[start:end] == "Nat"
+    # Identical identifiers share one interned string
+    assert lex("abc abc")[0] is lex("abc")[0]
+
+
 def test_atom_type_name():
     """Test that _atom accepts type names."""
     b = Buf(lex("Nat"))
@@ -61,3 +72,330 @@ const test1 : Nat = identity(Nat, zero)"""
     sigs, defs = parse(source)
     assert "identity" in defs, "Expected identity function"
     assert "test1" in defs, "Expected test1 definition"
+
+
+def test_parse_multiple_definitions():
+    """Test splitting a file into definitions across lines and comments."""
+    source = """// helpers
+const one: i64 = 1  // trailing comment
+const pair = .{
+  one,
+  2
+}
+const f: i64 -> i64 = (n) => {
+  n
+}"""
+    sigs, defs = parse(source)
+    assert list(defs) == ["one", "pair", "f"], f"Expected three definitions, got {list(defs)}"
+    assert "one" in sigs and "f" in sigs, f"Expected signatures for one and f, got {sigs.keys()}"
+
+
+def test_parse_nested_arguments_in_place():
+    """Test that nested calls, records and lambdas parse in place as arguments."""
+    exp = parse_expr("f(.{ g(a, b), c }, (acc, i) => { acc }, h(1))")
+    assert type(exp).__name__ == "App" and len(exp.args) == 3, f"Expected three arguments, got {exp}"
+    assert type(exp.args[0]).__name__ == "Record", f"Expected record argument, got {exp.args[0]}"
+    assert exp.args[1].params == ["acc", "i"], f"Expected two-parameter lambda, got {exp.args[1]}"
+
+    depth = 300
+    exp = parse_expr("f(" * depth + "x" + ")" * depth)
+    for _ in range(depth):
+        exp = exp.args[0]
+    assert exp.name == "x", f"Expected innermost x, got {exp}"
+
+
+def test_load_module_uses_disk_cache(tmp_path, monkeypatch):
+    """Test that an unchanged module is loaded from the disk cache without re-parsing."""
+    from auric import parser
+
+    monkeypatch.setattr(parser, "MODULE_CACHE_DIR", tmp_path)
+    monkeypatch.setattr(parser, "_module_memo", {})
+    sigs, defs = parser._load_module("std/nat")
+    assert list(tmp_path.glob("*.pickle")), "Expected a cache file to be written"
+
+    def fail(src):
+        raise AssertionError("module was re-parsed")
+
+    monkeypatch.setattr(parser, "_module_memo", {})
+    monkeypatch.setattr(parser, "parse", fail)
+    cached_sigs, cached_defs = parser._load_module("std/nat")
+    assert repr((cached_sigs, cached_defs)) == repr((sigs, defs)), "Expected cached module to match"
+
+
+def test_parse_many_merges_in_dependency_order(tmp_path):
+    """Test that parse_many resolves imports between files and orders dependencies first."""
+    from auric.parser import parse_many
+
+    (tmp_path / "app.au").write_text("import geo: origin\nconst main = origin\n")
+    (tmp_path / "geo.au").write_text("import std/nat: is_zero\nconst origin = .{ x = 0, y = 0 }\n")
+    sigs, defs = parse_many([str(tmp_path / "app.au"), str(tmp_path / "geo.au")], max_workers=2)
+    assert list(defs) == ["is_zero", "origin", "main"], f"Expected dependency order, got {list(defs)}"
+    assert "is_zero" in sigs, f"Expected std signature, got {sigs.keys()}"
+
+    (tmp_path / "geo.au").write_text("import app\nconst origin = 1\n")
+    try:
+        parse_many([str(tmp_path / "app.au"), str(tmp_path / "geo.au")], max_workers=1)
+        assert False, "Expected an import cycle error"
+    except SyntaxError as e:
+        assert "cycle" in str(e)
+
+
+def test_bench_program_parses():
+    """Test that the synthetic benchmark program parses into the requested definitions."""
+    from auric.bench import ProgramConfig, generate_program
+
+    cfg = ProgramConfig(defs=5, depth=3, width=3, record_size=2, macro_density=0.5)
+    sigs, defs = parse(generate_program(cfg, macros=False))
+    assert len(defs) == 5 and len(sigs) == 5, f"Expected 5 definitions, got {list(defs)}"
+
+
+def test_ast_nodes_are_hash_consed():
+    """Test that structurally equal nodes are shared, hashable and immutable."""
+    a = parse_expr("f(.{ x = 1 }, g(y))")
+    b = parse_expr("f(.{ x = 1 }, g(y))")
+    assert a is b, "Expected equal trees to be the same object"
+    assert {a: 1}[b] == 1 and a.fingerprint == b.fingerprint
+    assert a.args[1].args == [parse_expr("y")], "Expected list fields to compare equal to lists"
+    try:
+        a.fn = None
+        assert False, "Expected nodes to be immutable"
+    except AttributeError:
+        pass
+
+
+def test_tt_macro_expansion_parses_token_stream():
+    """Test that definitions after token tree macro expansion are split and parsed."""
+    from auric.tt_parser import parse_with_tt_macros
+
+    source = """macro twice => {
+    twice $e -> @seq ( $e , $e ) ;
+}
+const a = twice (f(1))
+const b = g(twice (h(2)), 3)"""
+    sigs, defs = parse_with_tt_macros(source)
+    assert list(defs) == ["a", "b"], f"Expected two definitions, got {list(defs)}"
+    assert defs["a"].fn.name == "@seq", f"Expected expanded macro, got {defs['a']}"
+
+
+def test_macro_matcher_finds_shortest_prefix():
+    """Test that a compiled macro pattern reports the end of its shortest match."""
+    from auric.macro_patterns import compile_pattern, parse_pattern
+    from auric.token_tree import group_tokens
+
+    matcher = compile_pattern(parse_pattern(group_tokens(lex("for $var = .. $expr $block"))))
+    assert matcher.leading == "for"
+    items = group_tokens(lex("x for i = .. v { i } y")).items
+    end, captures = matcher.match_prefix(items, 1)
+    assert end == 7, f"Expected the match to end before 'y', got {end}"
+    assert captures["var"].value == "i" and captures["block"].delim == "{"
+    assert matcher.match_prefix(items, 0) is None
+
+
+def test_macro_captures_are_slices_of_the_input():
+    """Test that spread captures view the matched items instead of copying them."""
+    from auric.macro_patterns import compile_pattern, parse_pattern
+    from auric.token_tree import TTSlice, group_tokens
+
+    matcher = compile_pattern(parse_pattern(group_tokens(lex("show .. $args ;"))))
+    items = group_tokens(lex("show .. a b c ;")).items
+    assert matcher.match_end(items, 0) == 6
+    captures = matcher.match(items)
+    assert isinstance(captures["args"], TTSlice)
+    assert captures["args"].parent is items and len(captures["args"]) == 3
+    assert [t.value for t in captures["args"].items] == ["a", "b", "c"]
+
+
+def test_tt_macro_expansions_are_cached():
+    """Test that identical macro invocations reuse the cached expansion."""
+    from auric.token_tree import TTSequence, group_tokens, ungroup_tokens
+    from auric.tt_macros import ExpansionCache, collect_tt_macros, expand_tt_macros
+
+    src = "macro twice => { twice $e -> @seq ( $e , $e ) ; }\n" + "twice ( f ( x ) ) twice ( f ( x ) ) twice y"
+    macros, defs = collect_tt_macros(group_tokens(lex(src)))
+    cache = ExpansionCache()
+    expanded = expand_tt_macros(TTSequence(defs), macros, cache=cache)
+    assert cache.stats() == {"hits": 1, "misses": 2, "entries": 2}
+    assert " ".join(ungroup_tokens(expanded)).count("@seq") == 3
+
+
+def test_macro_profile_records_tt_expansions():
+    """Test that profile_macros reports per-macro attempts, expansions and growth."""
+    from auric import profile_macros
+    from auric.tt_parser import parse_with_tt_macros
+
+    src = "macro twice => { twice $e -> @seq ( $e , $e ) ; }\nconst a: Int = twice (x)\n"
+    with profile_macros() as profiler:
+        parse_with_tt_macros(src)
+    [row] = profiler.report()
+    assert (row["system"], row["name"]) == ("tt", "twice")
+    assert row["attempts"] == 1 and row["expansions"] == 1
+    assert row["size_in"] == 4 and row["growth"] == 6
+
+
+def test_macro_body_compiled_once():
+    """Test that a compiled macro body expands like eval_comptime and reuses constant subtrees."""
+    from auric.ast import Var
+    from auric.macro_expander import collect_macros, compile_macro, eval_comptime, expand_macro_invocation
+
+    sigs, defs = parse("macro m = (x) => f(g(1), .{ a = x, b = h(2) })\n")
+    macros, _ = collect_macros(defs)
+    code = compile_macro(macros["m"], macros)
+    assert compile_macro(macros["m"], macros) is code
+    result = expand_macro_invocation(macros["m"], [Var("y")], macros)
+    assert result is eval_comptime(macros["m"].body, {"x": Var("y")}, macros)
+    assert result.args[0] is macros["m"].body.args[0]
+
+
+def test_comptime_evaluation_is_memoized():
+    """Test that repeated compile-time evaluations share the prelude and reuse results."""
+    from auric.macro_expander import ComptimeMemo, make_comptime_env, value_to_int
+
+    assert make_comptime_env() is make_comptime_env()
+    memo = ComptimeMemo()
+    assert memo.evaluate("int", parse_expr("3"), value_to_int) == 3
+    assert memo.evaluate("int", parse_expr("3"), value_to_int) == 3
+    assert memo.stats() == {"hits": 1, "misses": 1, "entries": 1}
+
+
+def test_expand_program_reexpands_only_record_users():
+    """Test that the expansion driver revisits only definitions using a staged record."""
+    from auric.expansion import expand_program
+
+    sigs, defs = parse("const v = .{ 1, 2 }\nconst first = v[0]\nconst other = 3\n")
+    final, stats = expand_program(defs, {})
+    assert stats.passes == 2
+    assert stats.expanded == 4  # three definitions, then `first` again
+    assert final["other"] is defs["other"]
+
+
+def test_rewrites_return_unchanged_nodes():
+    """Test that expansion and substitution return the input node when nothing changes."""
+    from auric.ast import Var
+    from auric.macro_expander import expand_expr, substitute
+    from auric.macros import expand_macros
+
+    expr = parse_expr("{ f(x, .{ a = g(1) }); x => { zero -> 1; succ n -> n; } }")
+    assert expand_macros(expr, {}) is expr
+    assert expand_expr(expr, {}, {}) is expr
+    assert substitute(expr, {"y": Var("z")}) is expr
+
+
+def test_comptime_fuel_bounds_recursion_not_depth():
+    """Test that deep recursive macros expand and non-terminating ones run out of fuel."""
+    from auric.ast import App, Var
+    from auric.macro_expander import (
+        ComptimeBudget, ComptimeBudgetExceeded, collect_macros, expand_macro_invocation,
+    )
+    import auric.macro_expander as macro_expander
+
+    sigs, defs = parse(
+        "macro count = (n) => n => { @zero -> z; @succ m -> s(count(m)); }\n"
+        "macro spin = (x) => spin(x)\n"
+    )
+    macros, _ = collect_macros(defs)
+    n = Var("@zero")
+    for _ in range(3000):
+        n = App(Var("@succ"), [n])
+    result = expand_macro_invocation(macros["count"], [n], macros)
+    for _ in range(3000):
+        assert result.fn is Var("s")
+        result = result.args[0]
+    assert result is Var("z")
+
+    saved = macro_expander.comptime_budget
+    macro_expander.comptime_budget = ComptimeBudget(fuel=1000)
+    try:
+        expand_macro_invocation(macros["spin"], [Var("k")], macros)
+        assert False, "Expected spin to run out of fuel"
+    except ComptimeBudgetExceeded as e:
+        assert "macro spin" in str(e)
+    finally:
+        macro_expander.comptime_budget = saved
+
+
+def test_visitor_dispatches_on_exact_type():
+    """Test that visitor tables follow overrides by name and fall back for other types."""
+    from auric.ast import App, Var
+    from auric.visitor import Rewriter, Visitor, handles
+
+    class Names(Visitor):
+        @handles(Var)
+        def var(self, e, ctx):
+            ctx.append(e.name)
+
+        @handles(App)
+        def app(self, e, ctx):
+            self.visit(e.fn, ctx)
+            for arg in e.args:
+                self.visit(arg, ctx)
+
+    class Upper(Names):
+        def var(self, e, ctx):
+            ctx.append(e.name.upper())
+
+    seen = []
+    Upper().visit(parse_expr("f(x, .{ a = y })"), seen)
+    assert seen == ["F", "X"]  # records fall back to generic_visit
+
+    class Rename(Rewriter):
+        @handles(Var)
+        def var(self, e, ctx):
+            return ctx.get(e.name, e)
+
+    expr = parse_expr("f(x, .{ a = g(y) })")
+    assert Rename().visit(expr, {"z": Var("w")}) is expr
+    assert Rename().visit(expr, {"y": Var("w")}) is parse_expr("f(x, .{ a = g(w) })")
+
+
+def test_comptime_list_builtins_handle_long_lists():
+    """Test that list builtins run natively over long cons lists and destructuring inverts construction."""
+    from auric.ast import App, Lam, Var
+    from auric.macro_expander import (
+        COMPTIME_BUILTINS, _comptime_builtins, collect_macros, expand_expr, list_to_python, python_to_list,
+    )
+
+    assert set(_comptime_builtins) == COMPTIME_BUILTINS
+
+    sigs, defs = parse(
+        "macro wrap = (xs) => @map(xs, f)\n"
+        "macro total = (xs) => @fold_right(xs, z, add)\n"
+        "macro parts = (e, l) => @list(@app(@app_fn(e), @app_arg(e)), @lam_body(l))\n"
+    )
+    macros, _ = collect_macros(defs)
+    xs = python_to_list([Var(f"x{i}") for i in range(5000)])
+    wrapped = list_to_python(expand_expr(App(Var("wrap"), [xs]), macros))
+    assert len(wrapped) == 5000 and wrapped[-1] is parse_expr("f(x4999)")
+
+    total = expand_expr(App(Var("total"), [python_to_list([Var("a"), Var("b")])]), macros)
+    assert total is parse_expr("add(a, add(b, z))")
+
+    assert list_to_python(expand_expr(parse_expr("parts(h(a, b), (x, y) => x)"), macros)) == [
+        App(App(Var("h"), [Var("a")]), [Var("b")]),
+        Lam(["y"], Var("x")),
+    ]
+
+
+def test_type_expansion_is_cached_per_type():
+    """Test that Vec types are expanded once and that the cache stays within its bound."""
+    from auric.ast import Arrow, Base, DepApp, ShapeT
+    from auric.macros import TypeExpansionCache, expand_type_macros
+    from auric.types import is_subtype, nat_to_index
+    import auric.macros as macros
+
+    i64 = ShapeT(Base("i64"))
+    vec = DepApp("Vec", [i64], [nat_to_index(50)])
+    saved = macros.type_expansions
+    macros.type_expansions = cache = TypeExpansionCache(max_entries=8)
+    try:
+        for _ in range(10):
+            assert is_subtype(Arrow(vec, vec), Arrow(vec, vec))
+        assert len(expand_type_macros(vec).fields) == 50
+        stats = cache.stats()
+        assert stats["misses"] == 4  # the arrow, the Vec, its record type and i64
+        assert stats["hit_rate"] > 0.9
+
+        for n in range(20):
+            expand_type_macros(DepApp("Vec", [i64], [nat_to_index(n)]))
+        assert cache.stats()["entries"] <= 8 and cache.stats()["evictions"] > 0
+    finally:
+        macros.type_expansions = saved
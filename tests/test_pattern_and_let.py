@@ -124,3 +124,19 @@ def test_multiline_let_block():
 }"""
     expr = parse_expr(expr_str)
     assert isinstance(expr, App)
+
+
+def test_nat_values_are_compact():
+    """Test that @succ builds int-backed naturals that still match @zero/@succ."""
+    from auric.ast import nat_literal
+    from auric.evaluator import builtin_values
+    from auric.memory import Nat
+    from auric.staging import value_to_ast
+
+    env = builtin_values()
+    two = eval_exp(parse_expr("@succ(@succ(@zero))"), env)
+    assert two.data == Nat(2)
+    env["n"] = eval_exp(nat_literal(100000), env)
+    pred = eval_exp(parse_expr("n => { @zero -> @zero; @succ(x) -> x; }"), env)
+    assert pred.data == Nat(99999)
+    assert value_to_ast(pred) is nat_literal(99999)